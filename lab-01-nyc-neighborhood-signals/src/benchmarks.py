@@ -0,0 +1,69 @@
+"""
+Benchmarks for Lab 1's hot paths on synthetic 311 and NYPD data.
+
+    311_borough_month     aggregate_311: stream the 311 CSV to complaint
+                          counts per borough-month
+    crime_borough_month   aggregate_crime: the same for NYPD complaints
+    311_taxonomy          count_311: the shared scanner with the full
+                          complaint taxonomy (exercise 3's alternative)
+
+Synthetic rows all fall in the analysis year, so every row lands on the
+grid. Inputs come from shared/utilities/synthetic_data.py and are cached
+under data/bench/. See shared/utilities/benchmark_suite.py for what is
+measured and how to compare runs.
+
+Run with:
+    make bench
+    python -m src.benchmarks --sizes 1M 10M --only 311_borough_month
+"""
+
+from shared.utilities.benchmark_suite import bench_main
+from shared.utilities.nyc_311 import Taxonomy, count_311, find_311_source
+
+from .pipeline import aggregate_311, aggregate_crime, default_config
+
+SIZES = ["100K", "1M", "4M"]
+YEAR = 2019
+
+
+def pipeline_config(data, rows, dataset):
+    raw_dir = data(dataset, rows, f"{YEAR}-01-01", f"{YEAR + 1}-01-01")
+    # No parquet_dir conversion exists next to the synthetic CSVs, so the CSV path is measured
+    return {**default_config(), "raw_dir": raw_dir, "parquet_dir": raw_dir / "parquet", "year": YEAR}
+
+
+def config_311(data, rows):
+    return pipeline_config(data, rows, "311_requests")
+
+
+def config_crime(data, rows):
+    return pipeline_config(data, rows, "nypd_crime")
+
+
+def requests_311(data, rows):
+    return find_311_source(config_311(data, rows)["raw_dir"] / "311_requests")
+
+
+# Cases run in a spawned process, so setup/run must be module-level functions (lambdas don't pickle)
+
+def complaints_311(config):
+    return aggregate_311(config, {})
+
+
+def crime(config):
+    return aggregate_crime(config, {})
+
+
+def taxonomy_311(source):
+    return count_311(source, Taxonomy(), year=YEAR)
+
+
+CASES = {
+    "311_borough_month": {"setup": config_311, "run": complaints_311, "sizes": SIZES},
+    "crime_borough_month": {"setup": config_crime, "run": crime, "sizes": SIZES},
+    "311_taxonomy": {"setup": requests_311, "run": taxonomy_311, "sizes": SIZES},
+}
+
+
+if __name__ == "__main__":
+    bench_main(CASES)
@@ -0,0 +1,22 @@
+"""
+Dashboard store for Lab 1.
+
+Thin wrapper around shared/utilities/dashboard_store.py that points the
+store at this lab's data/processed/dashboard/. The pipelines publish there
+and app.py reads from it; the files are safe to delete at any time.
+"""
+
+import os
+from pathlib import Path
+
+from shared.utilities.dashboard_store import DashboardStore
+
+LAB_DIR = Path(__file__).resolve().parent.parent
+
+__all__ = ["DashboardStore", "open_store"]
+
+
+def open_store(processed_dir=None):
+    """DashboardStore for this lab (DATA_PROCESSED_DIR is honored)."""
+    processed_dir = Path(processed_dir or os.environ.get("DATA_PROCESSED_DIR", LAB_DIR / "data" / "processed"))
+    return DashboardStore(processed_dir / "dashboard")
@@ -0,0 +1,123 @@
+import json
+import sys
+
+import pandas as pd
+import pytest
+
+from src import pipeline
+from src.pipeline import run_pipeline
+
+# Stages run in this process with workers=1, so CALLS records which ones ran
+CALLS = []
+
+
+def read_source(config, inputs):
+    CALLS.append("source")
+    return {"source": pd.read_csv(config["raw_dir"] / "numbers" / "numbers.csv")}
+
+
+def constant(config, inputs):
+    CALLS.append("constant")
+    return {"constant": pd.DataFrame({"k": [config["year"]]})}
+
+
+def combine(config, inputs):
+    CALLS.append("combine")
+    return {"combined": inputs["source"].assign(k=inputs["constant"]["k"].iloc[0])}
+
+
+def total(config, inputs):
+    CALLS.append("total")
+    return {"total": inputs["combined"].sum().to_frame("total")}
+
+
+def stage(deps, func, datasets=()):
+    return {"deps": deps, "func": func, "datasets": list(datasets), "params": {}, "version": 1}
+
+
+STAGES = {
+    "total": stage(["combine"], total),
+    "combine": stage(["source", "constant"], combine),
+    "source": stage([], read_source, ["numbers"]),
+    "constant": stage([], constant),
+}
+
+
+@pytest.fixture
+def config(tmp_path):
+    CALLS.clear()
+    (tmp_path / "raw" / "numbers").mkdir(parents=True)
+    (tmp_path / "raw" / "numbers" / "numbers.csv").write_text("x\n1\n2\n3\n")
+    return {"raw_dir": tmp_path / "raw", "parquet_dir": tmp_path / "parquet", "processed_dir": tmp_path / "processed",
+            "year": 2019, "chunk_rows": 10}
+
+
+def run(config, **kwargs):
+    CALLS.clear()
+    return run_pipeline(config, workers=1, stages=STAGES, **kwargs)
+
+
+def test_stages_run_after_their_upstream_stages(config):
+    results = run(config)
+    assert CALLS.index("combine") > max(CALLS.index("source"), CALLS.index("constant"))
+    assert CALLS[-1] == "total" and sorted(CALLS) == sorted(STAGES)
+    assert results["total"]["total"].tolist() == [6, 3 * 2019]
+    assert {p.name for p in config["processed_dir"].glob("*.csv")} == {
+        "source.csv", "constant.csv", "combined.csv", "total.csv"}
+
+
+def test_process_pool_gives_the_same_results(config):
+    sequential = run_pipeline(config, workers=1, stages=STAGES, use_cache=False)
+    pooled = run_pipeline(config, workers=2, stages=STAGES, use_cache=False)
+    assert set(pooled) == set(sequential)
+    for name, frame in sequential.items():
+        pd.testing.assert_frame_equal(pooled[name], frame)
+
+
+def test_unchanged_stages_are_loaded_from_the_cache(config):
+    first = run(config)
+    second = run(config)
+    assert CALLS == []
+    pd.testing.assert_frame_equal(second["total"], first["total"])
+    lines = [json.loads(line) for line in (config["processed_dir"] / "stage_metrics.jsonl").open()]
+    assert [line.get("status") for line in lines[-len(STAGES):]] == ["cached"] * len(STAGES)
+
+
+def test_changed_inputs_rerun_the_stage_and_everything_downstream(config):
+    run(config)
+    (config["raw_dir"] / "numbers" / "numbers.csv").write_text("x\n10\n")
+    assert run(config)["total"]["total"].tolist() == [10, 2019]
+    assert sorted(CALLS) == ["combine", "source", "total"]
+
+    config["year"] = 2020                                      # a parameter every stage sees
+    run(config)
+    assert sorted(CALLS) == sorted(STAGES)
+
+
+@pytest.mark.parametrize("options, reran", [
+    ({"from_stage": "combine"}, ["combine", "total"]),
+    ({"from_stage": "constant"}, ["combine", "constant", "total"]),
+    ({"force": True}, sorted(STAGES)),
+    ({"use_cache": False}, sorted(STAGES)),
+])
+def test_from_stage_and_force_rerun_cached_stages(config, options, reran):
+    run(config)
+    run(config, **options)
+    assert sorted(CALLS) == reran
+
+
+def test_unknown_from_stage_is_rejected(config):
+    with pytest.raises(ValueError, match="Unknown stage"):
+        run(config, from_stage="missing")
+
+
+def test_command_line_options_reach_the_runner(monkeypatch):
+    seen = {}
+    monkeypatch.setattr(pipeline, "run_pipeline", lambda config, **kwargs: seen.update(kwargs, year=config["year"]))
+    monkeypatch.setattr(sys, "argv", ["pipeline", "--year", "2020", "--from-stage", "correlation", "--workers", "1"])
+    pipeline.main()
+    assert seen == {"workers": 1, "use_cache": True, "force": False, "from_stage": "correlation", "year": 2020}
+
+    monkeypatch.setattr(sys, "argv", ["pipeline", "--force", "--no-cache"])
+    pipeline.main()
+    assert seen["force"] and not seen["use_cache"] and seen["from_stage"] is None
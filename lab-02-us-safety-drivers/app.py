@@ -7,6 +7,8 @@ Run with: make run
 
 import streamlit as st
 
+from src.dashboard_store import open_store
+
 st.set_page_config(
     page_title="Lab 2: US Safety Drivers",
     page_icon="🚗",
@@ -45,15 +47,17 @@ with col2:
 
 st.markdown("---")
 
-# Quick Stats (placeholder)
+# Quick Stats (published by the pipeline to data/processed/dashboard/, placeholders until then)
+store = open_store()
 st.header("📊 Dashboard Preview")
-st.info("👇 These metrics will show real data after you run the pipeline (`make pipeline`)")
+if not store.published():
+    st.info("👇 These metrics will show real data after you run the pipeline (`make pipeline`)")
 
 col1, col2, col3, col4 = st.columns(4)
-col1.metric("States", "49", help="Continental US states")
-col2.metric("Accidents", "2.8M+", delta="2016-2023")
-col3.metric("Severity Levels", "4", help="1 (minor) to 4 (severe)")
-col4.metric("Weather Types", "12", help="Rain, snow, fog, etc.")
+col1.metric(**store.metric("States", "49", help="Continental US states"))
+col2.metric(**store.metric("Accidents", "2.8M+", delta="2016-2023"))
+col3.metric(**store.metric("Severity Levels", "4", help="1 (minor) to 4 (severe)"))
+col4.metric(**store.metric("Weather Types", "12", help="Rain, snow, fog, etc."))
 
 st.markdown("---")
 
@@ -72,6 +76,25 @@ st.warning("""
 
 st.markdown("---")
 
+# Pipeline Profile (latest run of each stage, logged to data/processed/stage_metrics.jsonl)
+def latest_stages():
+    # Imported on first use so a cold start doesn't load the stage log module
+    from src.stage_metrics import open_log
+
+    return open_log().latest()
+
+
+stages = latest_stages()
+st.header("⏱️ Pipeline Profile")
+if stages is None:
+    st.info("Time, memory and row counts per stage will show here after you run the pipeline (`make pipeline`)")
+else:
+    st.caption("Latest run of each stage. Set STAGE_PROFILE=cprofile,tracemalloc for per-stage profiles.")
+    st.bar_chart(stages.set_index("stage")["wall_s"])
+    st.dataframe(stages.drop(columns=["run_id"]), hide_index=True, use_container_width=True)
+
+st.markdown("---")
+
 # Next Steps
 st.header("🚀 Next Steps")
 
@@ -0,0 +1,86 @@
+"""
+Benchmarks for Lab 2's hot paths on synthetic accidents and GSOD weather.
+
+    accident_weather_join   join_weather: nearest reporting station for each
+                            accident against a year of US GSOD days
+                            (~1M station-days, whatever the accident count)
+    holiday_join            HolidayCalendar.annotate on Start_Time strings
+    zip_resolver            ZipResolver.annotate on Zipcode strings (ZIP+4 included)
+
+Accidents and weather both cover 2019. The holiday table is built in memory
+(fixed-date US federal holidays), as synthetic_data.py has no holidays
+dataset. Inputs are cached under data/bench/. See
+shared/utilities/benchmark_suite.py for what is measured and how to compare runs.
+
+Run with:
+    make bench
+    python -m src.benchmarks --sizes 1M 2.8M --only accident_weather_join
+"""
+
+import pandas as pd
+
+from shared.utilities.benchmark_suite import bench_main
+from shared.utilities.holiday_calendar import HolidayCalendar
+from shared.utilities.noaa_gsod import write_extract
+
+from .geo_resolver import ZipResolver
+from .weather_join import join_weather, read_stations
+
+SIZES = ["100K", "1M", "2.8M"]
+YEAR = 2019
+GSOD_STATION_DAYS = "1M"
+
+US_HOLIDAYS = {"01-01": "New Year's Day", "06-19": "Juneteenth", "07-04": "Independence Day",
+               "11-11": "Veterans Day", "12-25": "Christmas Day"}
+
+
+def accidents(data, rows, columns):
+    raw_dir = data("accidents", rows, f"{YEAR}-01-01", f"{YEAR + 1}-01-01")
+    return pd.read_csv(raw_dir / "accidents" / "US_Accidents.csv", usecols=columns, dtype={"Zipcode": str}), raw_dir
+
+
+def weather_inputs(data, rows):
+    weather_dir = data("gsod", GSOD_STATION_DAYS, f"{YEAR}-01-01", f"{YEAR + 1}-01-01") / "weather"
+    # The exercise joins against a Parquet extract (data/processed/noaa_us.parquet); build it once per dataset
+    extract = weather_dir.parent / "noaa_us.parquet"
+    if not extract.exists():
+        write_extract(weather_dir, extract, country="US")
+    located, _ = accidents(data, rows, ["ID", "Start_Time", "Start_Lat", "Start_Lng"])
+    return located, read_stations(weather_dir / "isd-history.csv"), pd.read_parquet(extract)
+
+
+def weather_join(inputs):
+    return join_weather(*inputs)
+
+
+def holiday_inputs(data, rows):
+    holidays = pd.DataFrame([{"country": "US", "country_name": "United States",
+                              "date": pd.Timestamp(f"{year}-{day}"), "name": name}
+                             for year in range(YEAR - 1, YEAR + 2) for day, name in US_HOLIDAYS.items()])
+    return HolidayCalendar(holidays), accidents(data, rows, ["Start_Time"])[0]["Start_Time"]
+
+
+def holiday_join(inputs):
+    calendar, start_times = inputs
+    return calendar.annotate(start_times, "US")
+
+
+def zip_inputs(data, rows):
+    zipcodes, raw_dir = accidents(data, rows, ["Zipcode"])
+    return ZipResolver.from_csv(raw_dir / "geo_crosswalk" / "ZIP-COUNTY-FIPS_synthetic.csv"), zipcodes["Zipcode"]
+
+
+def resolve_zips(inputs):
+    resolver, zipcodes = inputs
+    return resolver.annotate(zipcodes)
+
+
+CASES = {
+    "accident_weather_join": {"setup": weather_inputs, "run": weather_join, "sizes": SIZES},
+    "holiday_join": {"setup": holiday_inputs, "run": holiday_join, "sizes": SIZES},
+    "zip_resolver": {"setup": zip_inputs, "run": resolve_zips, "sizes": SIZES},
+}
+
+
+if __name__ == "__main__":
+    bench_main(CASES)
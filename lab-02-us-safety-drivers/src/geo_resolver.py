@@ -0,0 +1,274 @@
+"""
+Zipcode -> county FIPS resolver for accidents (Exercise 3).
+
+The exercise left-joins the zipcode crosswalk on zipcode strings. The
+crosswalk is many-to-many: a zipcode can span several counties, so a
+plain merge duplicates accidents. Every key is also a Python string, and
+on 2.8M rows that costs both memory and time. This module instead:
+
+1. Parses zipcodes and FIPS codes into integers with NumPy (ZIP+4 and
+   zipcodes that lost their leading zero, e.g. 2134, are handled).
+2. Keeps one primary county per zipcode: the row with the largest weight
+   (TOT_RATIO / RES_RATIO in HUD-style crosswalks). The danofer crosswalk
+   has no weight column, so there the first row listed wins.
+3. Stores the result in a dense array with one slot per possible zipcode
+   (100,000 int32 = 400 KB). Resolving a column of accidents is one
+   fancy-indexing step, with no merge and no duplicated rows.
+
+FIPS codes come back as 5-character strings ("01001") in a categorical
+column, so the leading zeros survive and each row costs 2 bytes.
+
+Run with:
+    python -m src.geo_resolver --accidents data/raw/accidents/US_Accidents.csv \\
+        --crosswalk data/raw/geo_crosswalk/ZIP-COUNTY-FIPS_2017-06.csv
+    python -m src.geo_resolver --synthetic 2800000        # compare with the string merge
+    python -m src.geo_resolver ... --compare              # same comparison on the real accidents
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .dashboard_store import open_store
+from .stage_metrics import open_log
+
+N_ZIPS = 100_000
+
+# First match wins when picking each zipcode's primary county
+WEIGHT_COLUMNS = ["TOT_RATIO", "RES_RATIO", "BUS_RATIO", "weight"]
+
+
+def _parse_digits(strings, width):
+    """int32 value of each all-digit string of at most width characters, else -1."""
+    text = strings.astype(f"U{width}")
+    chars = text.view(np.uint32).reshape(len(text), width).astype(np.int32) - ord("0")
+    is_digit = (chars >= 0) & (chars <= 9)
+    n_digits = is_digit.sum(axis=1)
+    length = np.char.str_len(text)
+    value = np.zeros(len(chars), dtype=np.int32)
+    for i in range(width):
+        value = np.where(i < length, value * 10 + chars[:, i], value)
+    return np.where((length > 0) & (n_digits == length), value, -1).astype(np.int32)
+
+
+def _digit_prefix(values, width):
+    """The first width characters of each value as int32; -1 unless they are all digits.
+
+    "12345-6789" -> 12345 (width 5), "2134" -> 2134, "" / None / "abc" -> -1.
+    """
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values):
+        numbers = values.to_numpy(dtype="float64", na_value=np.nan)
+        ok = np.isfinite(numbers) & (numbers >= 0) & (numbers < 10 ** width) & (numbers == np.floor(numbers))
+        return np.where(ok, numbers, -1).astype(np.int32)
+
+    # Parse each distinct prefix once: ZIP+4 variants collapse to ~40K zipcodes
+    codes, uniques = pd.factorize(values.astype("string").str.slice(0, width))
+    parsed = np.append(_parse_digits(np.asarray(uniques, dtype=object), width), np.int32(-1))
+    return parsed[codes]
+
+
+def zip_codes(values):
+    """5-digit zipcodes as int32 (ZIP+4 suffix dropped; missing or invalid -> -1)."""
+    return _digit_prefix(values, 5)
+
+
+def fips_codes(values):
+    """County FIPS codes as int32 (missing or invalid -> -1)."""
+    return _digit_prefix(values, 5)
+
+
+def format_fips(codes):
+    """Categorical of 5-character FIPS strings ("01001") from int codes; -1 -> NaN."""
+    codes = np.asarray(codes)
+    valid = codes >= 0
+    present = np.zeros(N_ZIPS, dtype=bool)
+    present[codes[valid]] = True
+    rank = np.cumsum(present) - 1
+    labels = pd.Index([f"{code:05d}" for code in np.flatnonzero(present)])
+    return pd.Categorical.from_codes(np.where(valid, rank[np.maximum(codes, 0)], -1), categories=labels)
+
+
+def _crosswalk_columns(raw):
+    """Upper-cased name -> column, plus the FIPS and weight columns (weight None when absent)."""
+    columns = {c.upper(): c for c in raw.columns}
+    weight = next((columns[c.upper()] for c in WEIGHT_COLUMNS if c.upper() in columns), None)
+    fips = columns.get("STCOUNTYFP") or columns.get("COUNTY") or columns.get("FIPS")
+    return columns, fips, weight
+
+
+def read_crosswalk(path):
+    """Crosswalk as zip, fips (int32), county, state, weight (NaN when the file has none), in file order."""
+    raw = pd.read_csv(path, dtype=str)
+    columns, fips, weight = _crosswalk_columns(raw)
+    return pd.DataFrame({
+        "zip": zip_codes(raw[columns["ZIP"]]),
+        "fips": fips_codes(raw[fips]),
+        "county": raw[columns["COUNTYNAME"]] if "COUNTYNAME" in columns else pd.NA,
+        "state": raw[columns["STATE"]] if "STATE" in columns else pd.NA,
+        "weight": pd.to_numeric(raw[weight], errors="coerce") if weight else np.nan,
+    })
+
+
+def primary_counties(crosswalk):
+    """One row per zipcode: its highest-weight county (first listed on ties or without weights)."""
+    rows = crosswalk[(crosswalk["zip"] >= 0) & (crosswalk["fips"] >= 0)]
+    order = np.lexsort((np.arange(len(rows)), -rows["weight"].fillna(0).to_numpy(), rows["zip"].to_numpy()))
+    rows = rows.iloc[order]
+    return rows[~rows["zip"].duplicated()].reset_index(drop=True)
+
+
+class ZipResolver:
+    """Dense zipcode -> primary county lookup."""
+
+    def __init__(self, crosswalk):
+        valid = crosswalk[(crosswalk["zip"] >= 0) & (crosswalk["fips"] >= 0)]
+        primary = primary_counties(valid)
+        self.fips_by_zip = np.full(N_ZIPS, -1, dtype=np.int32)
+        self.fips_by_zip[primary["zip"].to_numpy()] = primary["fips"].to_numpy()
+        self.counties_by_zip = np.zeros(N_ZIPS, dtype=np.int8)
+        spans = valid.drop_duplicates(["zip", "fips"])["zip"].value_counts()
+        self.counties_by_zip[spans.index.to_numpy()] = np.minimum(spans.to_numpy(), 127)
+        # County names per FIPS (first spelling seen)
+        self.counties = valid.drop_duplicates("fips").set_index("fips")[["county", "state"]].sort_index()
+
+    @classmethod
+    def from_csv(cls, path):
+        return cls(read_crosswalk(path))
+
+    def resolve(self, zipcodes):
+        """Primary county FIPS (int32) for each zipcode; -1 when missing or not in the crosswalk."""
+        zips = zipcodes if isinstance(zipcodes, np.ndarray) and zipcodes.dtype == np.int32 else zip_codes(zipcodes)
+        known = (zips >= 0) & (zips < N_ZIPS)
+        return np.where(known, self.fips_by_zip[np.where(known, zips, 0)], -1)
+
+    def annotate(self, zipcodes, index=None):
+        """DataFrame with fips (5-char categorical), county, state and n_counties for each zipcode.
+
+        n_counties is how many counties the zipcode spans (0 when unmatched),
+        useful for Task 3.4's mismatch analysis.
+        """
+        if index is None and isinstance(zipcodes, pd.Series):
+            index = zipcodes.index
+        zips = zip_codes(zipcodes)
+        fips = self.resolve(zips)
+        fips_labels = format_fips(fips)
+        position = self.counties.index.get_indexer(fips)
+        names = {}
+        for column in ("county", "state"):
+            labels = self.counties[column].astype("category")
+            codes = np.where(position >= 0, labels.cat.codes.to_numpy()[np.maximum(position, 0)], -1)
+            names[column] = pd.Categorical.from_codes(codes, categories=labels.cat.categories)
+        return pd.DataFrame({
+            "fips": fips_labels,
+            "county": names["county"],
+            "state": names["state"],
+            "n_counties": np.where(zips >= 0, self.counties_by_zip[np.maximum(zips, 0)], 0).astype(np.int8),
+        }, index=index)
+
+
+def merge_baseline(zipcodes, crosswalk_path):
+    """The exercise approach: string zipcodes, sort by weight, drop duplicate zips, left merge."""
+    raw = pd.read_csv(crosswalk_path, dtype=str)
+    columns, fips, weight = _crosswalk_columns(raw)
+    lookup = pd.DataFrame({"zip": raw[columns["ZIP"]].str.zfill(5), "fips": raw[fips].str.zfill(5)})
+    if weight:
+        lookup["weight"] = pd.to_numeric(raw[weight], errors="coerce").fillna(0)
+        lookup = lookup.sort_values(["zip", "weight"], ascending=[True, False], kind="stable")
+    lookup = lookup.drop_duplicates("zip")[["zip", "fips"]]
+    accidents = pd.DataFrame({"zip": pd.Series(zipcodes, dtype="string").str.slice(0, 5).str.zfill(5)})
+    return accidents.merge(lookup, on="zip", how="left")["fips"]
+
+
+def _synthetic_inputs(n_accidents, n_zips=40_000, seed=0):
+    """Random crosswalk (~1 in 5 zipcodes spans several counties) and ZIP / ZIP+4 accident zipcodes."""
+    rng = np.random.default_rng(seed)
+    zips = np.sort(rng.choice(np.arange(501, 99_951), n_zips, replace=False))
+    spans = np.where(rng.random(n_zips) < 0.2, rng.integers(2, 4, n_zips), 1)
+    rows = np.repeat(zips, spans)
+    fips = (rows // 100 * 7 + rng.integers(0, 40, len(rows))) % 56_000 + 1000
+    crosswalk = pd.DataFrame({
+        "ZIP": [f"{z:05d}" for z in rows],
+        "COUNTYNAME": [f"County {f}" for f in fips],
+        "STATE": [f"S{f // 1000:02d}" for f in fips],
+        "STCOUNTYFP": [f"{f:05d}" for f in fips],
+        "TOT_RATIO": rng.random(len(rows)).round(4),
+    })
+    picked = rng.choice(zips, n_accidents)
+    plus4 = rng.random(n_accidents) < 0.3
+    unknown = rng.random(n_accidents) < 0.02
+    accident_zips = np.where(unknown, "99999", [f"{z:05d}" for z in picked]).astype(object)
+    accident_zips[plus4] = accident_zips[plus4] + "-" + rng.integers(1000, 9999, plus4.sum()).astype(str)
+    accident_zips[rng.random(n_accidents) < 0.01] = None
+    return pd.Series(accident_zips, name="Zipcode"), crosswalk
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Map accident zipcodes to county FIPS codes")
+    parser.add_argument("--accidents", help="Accidents CSV/Parquet with a Zipcode column")
+    parser.add_argument("--crosswalk", help="Zipcode-county crosswalk CSV (ZIP, STCOUNTYFP, ...)")
+    parser.add_argument("--synthetic", type=int, help="Compare with the string merge on this many synthetic rows")
+    parser.add_argument("--compare", action="store_true",
+                        help="Also run the string merge and count rows where it disagrees (always on with --synthetic)")
+    parser.add_argument("--output", default="data/processed/accident_fips.parquet")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        zipcodes, crosswalk = _synthetic_inputs(args.synthetic)
+        crosswalk_path = Path(tempfile.mkdtemp()) / "crosswalk.csv"
+        crosswalk.to_csv(crosswalk_path, index=False)
+    elif args.accidents and args.crosswalk:
+        path = Path(args.accidents)
+        columns = ["ID", "Zipcode"]
+        accidents = pd.read_parquet(path, columns=columns) if path.suffix == ".parquet" else pd.read_csv(
+            path, usecols=columns, dtype={"Zipcode": str})
+        zipcodes, crosswalk_path = accidents["Zipcode"], Path(args.crosswalk)
+    else:
+        parser.error("give --accidents and --crosswalk, or --synthetic N")
+
+    start = time.perf_counter()
+    with open_log(Path(args.output).parent).stage("zip_resolver", rows_in=len(zipcodes),
+                                                  synthetic=bool(args.synthetic)) as record:
+        resolved = ZipResolver.from_csv(crosswalk_path).annotate(zipcodes)
+        record.set(rows_out=len(resolved))
+    resolver_seconds = time.perf_counter() - start
+    print(f"Mapped {len(zipcodes):,} zipcodes, {resolved['fips'].notna().mean():.1%} matched")
+
+    if args.synthetic or args.compare:
+        start = time.perf_counter()
+        expected = merge_baseline(zipcodes, crosswalk_path)
+        merge_seconds = time.perf_counter() - start
+        mismatches = int((resolved["fips"].astype(object).fillna("").to_numpy()
+                          != expected.astype(object).fillna("").to_numpy()).sum())
+        merge_mb = expected.memory_usage(deep=True) / 1e6
+        resolver_mb = resolved["fips"].memory_usage(deep=True) / 1e6
+        print(f"  string merge  {merge_seconds:6.2f}s  {merge_mb:7.1f} MB")
+        print(f"  zip resolver  {resolver_seconds:6.2f}s  {resolver_mb:7.1f} MB")
+        if mismatches:
+            print(f"⚠️  {mismatches:,} rows ({mismatches / max(len(zipcodes), 1):.2%}) differ from the string merge")
+        else:
+            print("  results identical")
+
+    if args.synthetic:
+        crosswalk_path.unlink()
+        crosswalk_path.parent.rmdir()
+    else:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        pd.concat([accidents[["ID"]], resolved], axis=1).to_parquet(output, index=False)
+        print(f"✓ Saved {output}")
+
+        by_state = resolved["state"].value_counts().rename_axis("state").reset_index(name="accidents")
+        open_store(output.parent).publish(
+            tables={"accidents_by_state": by_state},
+            metrics=[{"label": "Accidents", "value": f"{len(zipcodes):,}"},
+                     {"label": "States", "value": len(by_state), "help": "States with at least one mapped accident"}],
+        )
+
+
+if __name__ == "__main__":
+    main()
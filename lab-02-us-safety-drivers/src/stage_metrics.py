@@ -0,0 +1,23 @@
+"""
+Stage metrics for Lab 2 pipelines.
+
+Thin wrapper around shared/utilities/stage_metrics.py that points the log
+at this lab's data/processed/stage_metrics.jsonl. The pipelines append to
+it and app.py shows the latest run of each stage; the log and the
+profiles/ folder next to it are safe to delete at any time.
+"""
+
+import os
+from pathlib import Path
+
+from shared.utilities.stage_metrics import LOG_FILE, StageLog, count_rows
+
+LAB_DIR = Path(__file__).resolve().parent.parent
+
+__all__ = ["StageLog", "count_rows", "open_log"]
+
+
+def open_log(processed_dir=None):
+    """StageLog for this lab (DATA_PROCESSED_DIR is honored)."""
+    processed_dir = Path(processed_dir or os.environ.get("DATA_PROCESSED_DIR", LAB_DIR / "data" / "processed"))
+    return StageLog(processed_dir / LOG_FILE)
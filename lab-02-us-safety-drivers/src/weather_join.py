@@ -0,0 +1,310 @@
+"""
+Nearest-station weather join for accidents (Exercise 2).
+
+The exercise maps stations to counties and joins on county + date. That
+gives every accident in a county the same averaged weather, even when the
+county is 100 km across, and it needs large intermediate tables. This
+module joins each accident to the stations actually closest to it:
+
+1. Stations go into a KD-tree (scipy cKDTree) as 3-D points on the unit
+   sphere. Straight-line distance there increases with great-circle
+   distance, so the tree's nearest neighbours are the true nearest
+   stations. This holds at any latitude, unlike raw lat/lon.
+2. Accidents are queried in batches for their k nearest stations (k=5),
+   so a station that didn't report that day falls through to the next.
+3. Daily observations are sorted by the key station_code * DAY_SPAN + day.
+   Every (station, date) lookup is one np.searchsorted over that sorted
+   array, with no merge and no intermediate table.
+4. method="nearest" takes, per variable, the closest station that reported
+   it. method="idw" averages all k reporting stations within max_km,
+   weighted by 1 / distance^power.
+
+2.8M accidents x 5 stations take well under a minute.
+
+The daily table is a GSOD extract from shared/utilities/noaa_gsod.py
+(US stations, 2016-2023). The accidents CSV is streamed with compact dtypes
+(shared/utilities/schema_optimizer.py), so Start_Time arrives as datetime64.
+
+Run with:
+    python -m src.weather_join --accidents data/raw/accidents/US_Accidents.csv \\
+        --stations data/raw/weather/isd-history.csv --weather data/processed/noaa_us.parquet
+    python -m src.weather_join --synthetic 2800000        # timing only
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from shared.utilities.noaa_gsod import read_station_history
+from shared.utilities.schema_optimizer import CompactSchema
+
+from .stage_metrics import open_log
+
+EARTH_RADIUS_KM = 6371.0
+
+# Candidate stations per accident, and the farthest one worth using
+K_STATIONS = 5
+MAX_KM = 50.0
+
+# Accidents per KD-tree query batch (memory ~ BATCH_ROWS x k x 16 bytes)
+BATCH_ROWS = 500_000
+
+# Days are counted from this date; DAY_SPAN spaces the station codes in the lookup key
+EPOCH = np.datetime64("1900-01-01", "D")
+DAY_SPAN = 1 << 17
+
+
+def _unit_vectors(lat, lon):
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+
+def chord_to_km(chord):
+    """Great-circle km for a straight-line distance between points on the unit sphere."""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+
+
+def _km_to_chord(km):
+    return 2 * np.sin(km / (2 * EARTH_RADIUS_KM))
+
+
+def day_numbers(dates):
+    """Days since EPOCH as int64 (NaT -> -1)."""
+    days = pd.to_datetime(dates, errors="coerce").to_numpy().astype("datetime64[D]")
+    numbers = (days - EPOCH).astype(np.int64)
+    numbers[np.isnat(days)] = -1
+    return numbers
+
+
+class StationIndex:
+    """KD-tree over station coordinates."""
+
+    def __init__(self, stations):
+        """stations needs station, lat and lon columns; rows without coordinates are dropped."""
+        stations = stations.dropna(subset=["lat", "lon"])
+        stations = stations[(stations["lat"] != 0) | (stations["lon"] != 0)]
+        self.stations = stations.drop_duplicates("station").reset_index(drop=True)
+        self.tree = cKDTree(_unit_vectors(self.stations["lat"], self.stations["lon"]))
+
+    def __len__(self):
+        return len(self.stations)
+
+    def codes(self, station_ids):
+        """Row numbers of station ids in this index (-1 for unknown stations)."""
+        return pd.Index(self.stations["station"]).get_indexer(station_ids)
+
+    def query(self, lat, lon, k=K_STATIONS, max_km=MAX_KM):
+        """(station codes, km) arrays of shape (n, k), nearest first; -1 / inf past max_km or bad coords."""
+        points = _unit_vectors(lat, lon)
+        valid = np.isfinite(points).all(axis=1)
+        k = min(k, len(self))
+        codes = np.full((len(points), k), -1, dtype=np.int64)
+        km = np.full((len(points), k), np.inf)
+        chord, found = self.tree.query(points[valid], k=k, distance_upper_bound=_km_to_chord(max_km), workers=-1)
+        chord, found = chord.reshape(-1, k), found.reshape(-1, k)
+        hit = np.isfinite(chord)
+        codes[valid] = np.where(hit, found, -1)
+        km[valid] = np.where(hit, chord_to_km(np.where(hit, chord, 0)), np.inf)
+        return codes, km
+
+
+class DailyWeather:
+    """Daily observations sorted by (station, day) for vectorized point lookups."""
+
+    def __init__(self, weather, stations, columns):
+        """weather needs station, date and the value columns; stations is the StationIndex."""
+        codes = stations.codes(weather["station"])
+        days = day_numbers(weather["date"])
+        keep = (codes >= 0) & (days >= 0)
+        keys = codes[keep] * DAY_SPAN + days[keep]
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.columns = list(columns)
+        self.values = {column: weather[column].to_numpy(dtype=np.float64, na_value=np.nan)[keep][order]
+                       for column in self.columns}
+
+    def positions(self, codes, days):
+        """Row of each (station code, day) pair in the sorted table, or -1 if there is no report."""
+        keys = codes * DAY_SPAN + days
+        if len(self.keys) == 0:
+            return np.full(keys.shape, -1, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        found = (codes >= 0) & (days >= 0) & (self.keys[positions] == keys)
+        return np.where(found, positions, -1)
+
+    def take(self, column, positions):
+        values = self.values[column][np.maximum(positions, 0)]
+        values[positions < 0] = np.nan
+        return values
+
+
+def _nearest(values):
+    """Per row, the value of the closest candidate that has one (columns are nearest first)."""
+    first = np.argmax(~np.isnan(values), axis=1)
+    return values[np.arange(len(values)), first]
+
+
+def _inverse_distance(values, km, power):
+    available = ~np.isnan(values)
+    weights = np.where(available, 1.0 / np.maximum(km, 0.1) ** power, 0.0)
+    total = weights.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total > 0, (np.where(available, values, 0.0) * weights).sum(axis=1) / total, np.nan)
+
+
+def join_weather(accidents, stations, weather, columns=None, method="nearest", k=K_STATIONS, max_km=MAX_KM,
+                 power=2.0, lat="Start_Lat", lon="Start_Lng", time_column="Start_Time", batch_rows=BATCH_ROWS):
+    """Weather for each accident from its nearest reporting stations.
+
+    Args:
+        accidents: DataFrame with lat/lon and a timestamp column.
+        stations: Station table (station, lat, lon) or a StationIndex.
+        weather: Daily table (station, date, value columns) or a DailyWeather.
+        columns: Value columns to join (default: every non-key weather column).
+        method: "nearest" (closest station reporting each variable) or "idw"
+            (inverse-distance weighted mean of the k stations within max_km).
+
+    Returns:
+        DataFrame on the accidents' index with the value columns plus
+        station / station_km (nearest reporting station) and n_stations
+        (stations reporting that day within max_km).
+    """
+    if method not in ("nearest", "idw"):
+        raise ValueError(f"method must be 'nearest' or 'idw', not {method!r}")
+    index = stations if isinstance(stations, StationIndex) else StationIndex(stations)
+    if not isinstance(weather, DailyWeather):
+        columns = columns or [c for c in weather.columns if c not in ("station", "date")]
+        weather = DailyWeather(weather, index, columns)
+    columns = weather.columns
+
+    days = day_numbers(accidents[time_column])
+    lats = accidents[lat].to_numpy(dtype=np.float64, na_value=np.nan)
+    lons = accidents[lon].to_numpy(dtype=np.float64, na_value=np.nan)
+    n = len(accidents)
+    result = {column: np.full(n, np.nan, dtype=np.float32) for column in columns}
+    station_code = np.full(n, -1, dtype=np.int64)
+    station_km = np.full(n, np.nan, dtype=np.float32)
+    n_stations = np.zeros(n, dtype=np.int8)
+
+    for start in range(0, n, batch_rows):
+        batch = slice(start, min(start + batch_rows, n))
+        codes, km = index.query(lats[batch], lons[batch], k=k, max_km=max_km)
+        positions = weather.positions(codes, days[batch][:, None])
+        reporting = positions >= 0
+        n_stations[batch] = reporting.sum(axis=1)
+
+        # The station reported on the accident day: the first column with any report
+        first = np.argmax(reporting, axis=1)
+        rows = np.arange(len(codes))
+        has_report = reporting.any(axis=1)
+        station_code[batch] = np.where(has_report, codes[rows, first], -1)
+        station_km[batch] = np.where(has_report, km[rows, first], np.nan)
+
+        for column in columns:
+            values = weather.take(column, positions)
+            if method == "nearest":
+                result[column][batch] = _nearest(values)
+            else:
+                result[column][batch] = _inverse_distance(values, km, power)
+
+    names = index.stations["station"].to_numpy()
+    joined = pd.DataFrame(result, index=accidents.index)
+    joined["station"] = pd.array(np.where(station_code >= 0, names[np.maximum(station_code, 0)], None),
+                                 dtype="string")
+    joined["station_km"] = station_km
+    joined["n_stations"] = n_stations
+    return joined
+
+
+def read_stations(path):
+    """Station table (station, lat, lon) from isd-history.csv or a station,lat,lon CSV."""
+    header = pd.read_csv(path, nrows=0).columns
+    if {"USAF", "WBAN"}.issubset(header):
+        return read_station_history(path)[["station", "lat", "lon"]]
+    raw = pd.read_csv(path, dtype=str).rename(columns=str.lower).rename(columns={"latitude": "lat", "longitude": "lon"})
+    return raw.assign(lat=pd.to_numeric(raw["lat"], errors="coerce"),
+                      lon=pd.to_numeric(raw["lon"], errors="coerce"))[["station", "lat", "lon"]]
+
+
+def _read_table(path, columns=None, compact=False):
+    """A CSV/Parquet table; compact CSVs are streamed in chunks with dtypes fixed from a sample."""
+    path = Path(path)
+    if path.suffix == ".parquet" or path.is_dir():
+        return pd.read_parquet(path, columns=columns)
+    if compact:
+        return pd.concat(CompactSchema.from_csv(path, columns=columns).read_csv(path), ignore_index=True)
+    return pd.read_csv(path, usecols=columns)
+
+
+def _synthetic_inputs(n_accidents, n_stations=3000, n_days=365 * 3, seed=0):
+    """US-shaped random accidents, stations and daily weather (stations skip ~10% of days)."""
+    rng = np.random.default_rng(seed)
+    stations = pd.DataFrame({
+        "station": [f"{i:06d}-99999" for i in range(n_stations)],
+        "lat": rng.uniform(25, 49, n_stations),
+        "lon": rng.uniform(-124, -67, n_stations),
+    })
+    dates = pd.date_range("2021-01-01", periods=n_days, freq="D")
+    grid = pd.MultiIndex.from_product([stations["station"], dates], names=["station", "date"]).to_frame(index=False)
+    grid = grid[rng.random(len(grid)) > 0.1].reset_index(drop=True)
+    grid["temp_max"] = rng.normal(20, 10, len(grid)).round(1)
+    grid["precipitation"] = np.where(rng.random(len(grid)) < 0.7, 0.0, rng.exponential(5, len(grid))).round(1)
+    accidents = pd.DataFrame({
+        "Start_Lat": rng.uniform(25, 49, n_accidents),
+        "Start_Lng": rng.uniform(-124, -67, n_accidents),
+        "Start_Time": dates[rng.integers(0, n_days, n_accidents)] + pd.to_timedelta(rng.integers(0, 86400, n_accidents),
+                                                                                     unit="s"),
+    })
+    return accidents, stations, grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Join accidents to weather from their nearest NOAA stations")
+    parser.add_argument("--accidents", help="Accidents CSV/Parquet (Start_Lat, Start_Lng, Start_Time)")
+    parser.add_argument("--stations", help="isd-history.csv or a station,lat,lon table")
+    parser.add_argument("--weather", help="Daily weather CSV/Parquet (station, date, value columns)")
+    parser.add_argument("--method", choices=["nearest", "idw"], default="nearest")
+    parser.add_argument("--k", type=int, default=K_STATIONS, help="Candidate stations per accident")
+    parser.add_argument("--max-km", type=float, default=MAX_KM)
+    parser.add_argument("--synthetic", type=int, help="Time on this many synthetic accidents instead")
+    parser.add_argument("--output", default="data/processed/accidents_with_weather.parquet")
+    args = parser.parse_args()
+
+    log = open_log(Path(args.output).parent)
+    if args.synthetic:
+        accidents, stations, weather = _synthetic_inputs(args.synthetic)
+    elif args.accidents and args.stations and args.weather:
+        with log.stage("weather_inputs") as record:
+            accidents = _read_table(args.accidents, columns=["ID", "Start_Time", "Start_Lat", "Start_Lng"],
+                                    compact=True)
+            stations = read_stations(args.stations)
+            weather = _read_table(args.weather)
+            record.set(rows_out=len(accidents) + len(stations) + len(weather))
+    else:
+        parser.error("give --accidents, --stations and --weather, or --synthetic N")
+
+    start = time.perf_counter()
+    with log.stage("weather_join", rows_in=len(accidents), synthetic=bool(args.synthetic)) as record:
+        joined = join_weather(accidents, stations, weather, method=args.method, k=args.k, max_km=args.max_km)
+        record.set(rows_out=len(joined))
+    elapsed = time.perf_counter() - start
+    matched = joined["n_stations"].gt(0).mean()
+    print(f"Joined {len(accidents):,} accidents in {elapsed:.1f}s ({len(accidents) / elapsed / 1e6:.2f} M rows/s)")
+    print(f"  {matched:.1%} have a reporting station within {args.max_km:g} km "
+          f"(median {joined['station_km'].median():.1f} km)")
+
+    if not args.synthetic:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        pd.concat([accidents, joined], axis=1).to_parquet(output, index=False)
+        print(f"✓ Saved {output}")
+
+
+if __name__ == "__main__":
+    main()
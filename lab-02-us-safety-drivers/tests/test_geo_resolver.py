@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.geo_resolver import ZipResolver, _synthetic_inputs, format_fips, merge_baseline, read_crosswalk, zip_codes
+
+
+def write(tmp_path, crosswalk):
+    path = tmp_path / "crosswalk.csv"
+    crosswalk.to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_matches_the_merge_baseline(tmp_path, seed):
+    zipcodes, crosswalk = _synthetic_inputs(20_000, n_zips=2_000, seed=seed)
+    path = write(tmp_path, crosswalk)
+
+    expected = merge_baseline(zipcodes, path)
+    resolved = ZipResolver.from_csv(path).annotate(zipcodes)
+
+    assert len(resolved) == len(zipcodes)
+    assert resolved.index.equals(zipcodes.index)
+    assert (resolved["fips"].astype(object).fillna("").to_numpy()
+            == expected.astype(object).fillna("").to_numpy()).all()
+    assert resolved["fips"].notna().mean() > 0.9
+
+
+def test_unweighted_crosswalk_keeps_the_first_county(tmp_path):
+    crosswalk = pd.DataFrame({"ZIP": ["02134", "02134", "10001"], "STCOUNTYFP": ["25025", "25017", "36061"],
+                              "COUNTYNAME": ["Suffolk", "Middlesex", "New York"], "STATE": ["MA", "MA", "NY"]})
+    path = write(tmp_path, crosswalk)
+    zipcodes = pd.Series(["02134", "10001-1234", "2134", None, "abcde", "99999"])
+
+    resolved = ZipResolver(read_crosswalk(path)).annotate(zipcodes)
+    assert resolved["fips"].astype(object).tolist()[:3] == ["25025", "36061", "25025"]
+    assert resolved["fips"].iloc[3:].isna().all()
+    assert resolved["county"].astype(object).tolist()[:2] == ["Suffolk", "New York"]
+    assert resolved["n_counties"].tolist() == [2, 1, 2, 0, 0, 0]
+    assert (resolved["fips"].astype(object).fillna("") == merge_baseline(zipcodes, path).fillna("")).iloc[:2].all()
+
+
+def test_zip_codes_parse_strings_and_numbers():
+    assert zip_codes(pd.Series(["02134", "02134-0001", "2134", "", None, "1a345"])).tolist() == [
+        2134, 2134, 2134, -1, -1, -1]
+    assert zip_codes(pd.Series([2134.0, np.nan, -5.0, 123456.0, 10001.5])).tolist() == [2134, -1, -1, -1, -1]
+
+
+def test_format_fips_keeps_leading_zeros():
+    labels = format_fips(np.array([1001, -1, 36061, 1001], dtype=np.int32))
+    assert list(labels.astype(object)[[0, 2, 3]]) == ["01001", "36061", "01001"]
+    assert pd.isna(labels[1])
+
+
+def test_out_of_range_integer_zips_are_unmatched(tmp_path):
+    crosswalk = pd.DataFrame({"ZIP": ["02134", "99999"], "STCOUNTYFP": ["25025", "02185"]})
+    resolver = ZipResolver.from_csv(write(tmp_path, crosswalk))
+    zips = np.array([2134, 99_999, 100_000, 123_456, -1], dtype=np.int32)
+    assert resolver.resolve(zips).tolist() == [25025, 2185, -1, -1, -1]
+
+
+def test_merge_baseline_finds_the_fips_column_like_read_crosswalk(tmp_path):
+    crosswalk = pd.DataFrame({"zip": ["02134", "10001"], "county": ["25025", "36061"]})
+    path = write(tmp_path, crosswalk)
+    zipcodes = pd.Series(["10001", "02134", "55555"])
+    assert merge_baseline(zipcodes, path).fillna("").tolist() == ["36061", "25025", ""]
+    assert ZipResolver.from_csv(path).annotate(zipcodes)["fips"].astype(object).fillna("").tolist() == [
+        "36061", "25025", ""]
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.weather_join import EARTH_RADIUS_KM, _synthetic_inputs, join_weather
+
+K, MAX_KM = 3, 150.0
+
+
+def haversine_km(lat, lon, lats, lons):
+    lat, lon, lats, lons = map(np.radians, (lat, lon, lats, lons))
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def brute_force(accidents, stations, weather, column, method):
+    """One accident at a time: the K closest stations within MAX_KM, then their reports that day."""
+    reports = weather.set_index(["station", "date"])[column]
+    out = []
+    for row in accidents.itertuples():
+        km = haversine_km(row.Start_Lat, row.Start_Lng, stations["lat"].to_numpy(), stations["lon"].to_numpy())
+        order = np.argsort(km)[:K]
+        day = row.Start_Time.normalize()
+        found = [(km[i], reports.get((stations["station"].iloc[i], day), np.nan)) for i in order if km[i] <= MAX_KM]
+        found = [(d, v) for d, v in found if not np.isnan(v)]
+        if not found:
+            out.append(np.nan)
+        elif method == "nearest":
+            out.append(found[0][1])
+        else:
+            weights = np.array([1 / max(d, 0.1) ** 2 for d, _ in found])
+            out.append(np.dot(weights, [v for _, v in found]) / weights.sum())
+    return np.array(out)
+
+
+@pytest.fixture(scope="module")
+def inputs():
+    accidents, stations, weather = _synthetic_inputs(400, n_stations=300, n_days=20, seed=4)
+    # Gaps the join has to fall through: a missing value, missing coordinates and a time outside the data
+    weather.loc[weather.index[::5], "temp_max"] = np.nan
+    accidents.loc[accidents.index[:3], "Start_Lat"] = np.nan
+    accidents.loc[accidents.index[3], "Start_Time"] = pd.Timestamp("2030-01-01")
+    return accidents, stations, weather
+
+
+@pytest.mark.parametrize("method", ["nearest", "idw"])
+def test_matches_a_brute_force_search(inputs, method):
+    accidents, stations, weather = inputs
+    joined = join_weather(accidents, stations, weather, method=method, k=K, max_km=MAX_KM, batch_rows=64)
+    for column in ["temp_max", "precipitation"]:
+        expected = brute_force(accidents, stations, weather, column, method)
+        np.testing.assert_allclose(joined[column].to_numpy(dtype=np.float64), expected, rtol=1e-5, atol=1e-4)
+    assert joined.index.equals(accidents.index)
+    assert joined["n_stations"].iloc[:4].eq(0).all() and joined["station"].iloc[:4].isna().all()
+    assert joined["temp_max"].notna().mean() > 0.5
+
+
+def test_nearest_reporting_station_and_its_distance(inputs):
+    accidents, stations, weather = inputs
+    joined = join_weather(accidents, stations, weather, k=K, max_km=MAX_KM)
+    matched = joined["station"].notna()
+    located = stations.set_index("station").loc[joined.loc[matched, "station"]]
+    km = haversine_km(accidents.loc[matched, "Start_Lat"].to_numpy(), accidents.loc[matched, "Start_Lng"].to_numpy(),
+                      located["lat"].to_numpy(), located["lon"].to_numpy())
+    np.testing.assert_allclose(joined.loc[matched, "station_km"], km, rtol=1e-4)
+    assert (joined["station_km"].dropna() <= MAX_KM).all()
+
+
+def test_rejects_unknown_methods(inputs):
+    with pytest.raises(ValueError, match="method"):
+        join_weather(*inputs, method="mean")
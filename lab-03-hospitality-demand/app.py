@@ -47,7 +47,7 @@ st.markdown("---")
 
 # Quick Stats (placeholder)
 st.header("📊 Dashboard Preview")
-st.info("👇 These metrics will show real data after you run the pipeline (`make pipeline`)")
+st.info("👇 These metrics will show real data once your analysis computes them")
 
 col1, col2, col3, col4 = st.columns(4)
 col1.metric("Total Bookings", "119,390")
@@ -63,18 +63,36 @@ st.header("📈 Cancellation by Lead Time")
 st.info("📊 Chart will appear here after running the pipeline")
 
 # Fake data for preview
-import random
 lead_time_buckets = ["0-7 days", "8-30 days", "31-90 days", "91-180 days", "180+ days"]
 cancel_rates = [15, 25, 38, 45, 52]
 
 # Simple bar representation
-for bucket, rate in zip(lead_time_buckets, cancel_rates):
+for bucket, rate in zip(lead_time_buckets, cancel_rates, strict=True):
     st.write(f"**{bucket}**")
     st.progress(rate / 100)
     st.caption(f"{rate}% cancellation rate")
 
 st.markdown("---")
 
+# Pipeline Profile (latest run of each stage, logged to data/processed/stage_metrics.jsonl)
+def latest_stages():
+    # Imported on first use so a cold start doesn't load the stage log module
+    from src.stage_metrics import open_log
+
+    return open_log().latest()
+
+
+stages = latest_stages()
+st.header("⏱️ Pipeline Profile")
+if stages is None:
+    st.info("Time, memory and row counts per stage will show here after you run the pipeline (`make pipeline`)")
+else:
+    st.caption("Latest run of each stage. Set STAGE_PROFILE=cprofile,tracemalloc for per-stage profiles.")
+    st.bar_chart(stages.set_index("stage")["wall_s"])
+    st.dataframe(stages.drop(columns=["run_id"]), hide_index=True, use_container_width=True)
+
+st.markdown("---")
+
 # Next Steps
 st.header("🚀 Next Steps")
 
@@ -0,0 +1,73 @@
+"""
+Benchmarks for Lab 3's hot paths on synthetic hotel bookings.
+
+    holiday_join        HolidayCalendar.annotate with nights: holiday
+                        features plus holidays_in_stay for each booking
+    seasonal_features   dates_from_parts + temporal_features on the three
+                        arrival-date columns (exercise 4)
+
+The holiday table is built in memory (fixed-date Portuguese holidays), as
+synthetic_data.py has no holidays dataset. Bookings are cached under
+data/bench/. See shared/utilities/benchmark_suite.py for what is measured
+and how to compare runs.
+
+Run with:
+    make bench
+    python -m src.benchmarks --sizes 1M 10M --only holiday_join
+"""
+
+import pandas as pd
+
+from shared.utilities.benchmark_suite import bench_main
+from shared.utilities.holiday_calendar import HolidayCalendar
+from shared.utilities.temporal_features import dates_from_parts, temporal_features
+
+SIZES = ["100K", "1M", "4M"]
+
+ARRIVAL_COLUMNS = ["arrival_date_year", "arrival_date_month", "arrival_date_day_of_month"]
+STAY_COLUMNS = ["stays_in_weekend_nights", "stays_in_week_nights"]
+
+PT_HOLIDAYS = {"01-01": "Ano Novo", "04-25": "Dia da Liberdade", "05-01": "Dia do Trabalhador",
+               "06-10": "Dia de Portugal", "08-15": "Assunção de Nossa Senhora", "10-05": "Implantação da República",
+               "11-01": "Dia de Todos-os-Santos", "12-01": "Restauração da Independência",
+               "12-08": "Imaculada Conceição", "12-25": "Natal"}
+
+
+def bookings(data, rows, columns):
+    return pd.read_csv(data("hotel_bookings", rows) / "hotel_bookings" / "hotel_bookings.csv", usecols=columns)
+
+
+def arrival_dates(frame):
+    return dates_from_parts(*(frame[column] for column in ARRIVAL_COLUMNS))
+
+
+def holiday_inputs(data, rows):
+    holidays = pd.DataFrame([{"country": "PT", "country_name": "Portugal",
+                              "date": pd.Timestamp(f"{year}-{day}"), "name": name}
+                             for year in range(2014, 2019) for day, name in PT_HOLIDAYS.items()])
+    stays = bookings(data, rows, ARRIVAL_COLUMNS + STAY_COLUMNS)
+    return HolidayCalendar(holidays), arrival_dates(stays), stays[STAY_COLUMNS].sum(axis=1)
+
+
+def holiday_join(inputs):
+    calendar, arrival, nights = inputs
+    return calendar.annotate(arrival, "PT", nights=nights)
+
+
+def arrival_parts(data, rows):
+    return bookings(data, rows, ARRIVAL_COLUMNS)
+
+
+def seasonal_features(frame):
+    return temporal_features(arrival_dates(frame), features=["month", "week_of_year", "quarter", "tourism_season",
+                                                             "month_sin", "month_cos"], index=frame.index)
+
+
+CASES = {
+    "holiday_join": {"setup": holiday_inputs, "run": holiday_join, "sizes": SIZES},
+    "seasonal_features": {"setup": arrival_parts, "run": seasonal_features, "sizes": SIZES},
+}
+
+
+if __name__ == "__main__":
+    bench_main(CASES)
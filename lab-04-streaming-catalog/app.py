@@ -7,6 +7,8 @@ Run with: make run
 
 import streamlit as st
 
+from src.dashboard_store import open_store
+
 st.set_page_config(
     page_title="Lab 4: Streaming Catalog",
     page_icon="🎬",
@@ -44,15 +46,17 @@ with col2:
 
 st.markdown("---")
 
-# Quick Stats (placeholder)
+# Quick Stats (published by the pipeline to data/processed/dashboard/, placeholders until then)
+store = open_store()
 st.header("📊 Dashboard Preview")
-st.info("👇 These metrics will show real data after you run the pipeline (`make pipeline`)")
+if not store.published():
+    st.info("👇 These metrics will show real data after you run the pipeline (`make pipeline`)")
 
 col1, col2, col3, col4 = st.columns(4)
-col1.metric("Netflix", "8,807 titles")
-col2.metric("Amazon Prime", "9,668 titles")
-col3.metric("Disney+", "1,450 titles")
-col4.metric("Potential Matches", "~2,500", help="Estimated cross-platform overlap")
+col1.metric(**store.metric("Netflix", "8,807 titles"))
+col2.metric(**store.metric("Amazon Prime", "9,668 titles"))
+col3.metric(**store.metric("Disney+", "1,450 titles"))
+col4.metric(**store.metric("Potential Matches", "~2,500", help="Estimated cross-platform overlap"))
 
 st.markdown("---")
 
@@ -105,6 +109,25 @@ st.markdown("""
 
 st.markdown("---")
 
+# Pipeline Profile (latest run of each stage, logged to data/processed/stage_metrics.jsonl)
+def latest_stages():
+    # Imported on first use so a cold start doesn't load the stage log module
+    from src.stage_metrics import open_log
+
+    return open_log().latest()
+
+
+stages = latest_stages()
+st.header("⏱️ Pipeline Profile")
+if stages is None:
+    st.info("Time, memory and row counts per stage will show here after you run the pipeline (`make pipeline`)")
+else:
+    st.caption("Latest run of each stage. Set STAGE_PROFILE=cprofile,tracemalloc for per-stage profiles.")
+    st.bar_chart(stages.set_index("stage")["wall_s"])
+    st.dataframe(stages.drop(columns=["run_id"]), hide_index=True, use_container_width=True)
+
+st.markdown("---")
+
 # Next Steps
 st.header("🚀 Next Steps")
 
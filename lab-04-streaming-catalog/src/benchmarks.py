@@ -0,0 +1,56 @@
+"""
+Benchmarks for Lab 4's hot paths on synthetic streaming catalogs.
+
+    fuzzy_matching      TitleIndex + match_catalog: best Netflix match for
+                        every Amazon Prime title (trigram shortlist, then
+                        rapidfuzz on the candidates)
+    entity_resolution   resolve_platforms over Netflix, Amazon Prime and
+                        Disney+ (three pairwise matches plus clustering)
+
+Sizes count Netflix titles (the real catalog has ~8.8K); the other catalogs
+are scaled from it, with planted fuzzy duplicates. Inputs are cached under
+data/bench/. See shared/utilities/benchmark_suite.py for what is measured
+and how to compare runs.
+
+Run with:
+    make bench
+    python -m src.benchmarks --sizes 10K 100K --only fuzzy_matching
+"""
+
+from shared.utilities.benchmark_suite import bench_main
+
+from .catalogs import STREAMING_FILES
+from .entity_resolution import resolve_platforms
+from .matcher import TitleIndex, match_catalog
+from .title_table import title_table
+
+SIZES = ["2K", "10K", "40K"]
+
+
+def catalogs(data, rows):
+    raw_dir = data("streaming", rows)
+    return {name: title_table(name, raw_dir, use_cache=False) for name in STREAMING_FILES}
+
+
+def amazon_and_netflix(data, rows):
+    titles = catalogs(data, rows)
+    return titles["amazon"], titles["netflix"]
+
+
+def fuzzy_matching(inputs):
+    queries, catalog = inputs
+    return match_catalog(queries, TitleIndex(catalog))
+
+
+def entity_resolution(titles):
+    return resolve_platforms(titles).entity_table()
+
+
+CASES = {
+    "fuzzy_matching": {"setup": amazon_and_netflix, "run": fuzzy_matching, "sizes": SIZES},
+    "entity_resolution": {"setup": catalogs, "run": entity_resolution, "sizes": SIZES[:2]},
+}
+
+
+if __name__ == "__main__":
+    bench_main(CASES)
@@ -0,0 +1,85 @@
+"""
+Catalog loaders for Lab 4.
+
+Every loader returns the same core columns, so matching code doesn't care
+which platform a table came from:
+
+    catalog | record_id | title | year | kind
+    --------|-----------|-------|------|------
+    netflix | s1        | ...   | 2020 | movie
+
+TMDb tables add original_title, popularity and vote_count (used for
+tie-breaking in Exercises 2-3).
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+# Streaming catalogs (shivamb/*-movies-and-tv-shows); Amazon and Disney+ come from `make download`
+STREAMING_FILES = {
+    "netflix": "netflix_titles*.csv",
+    "amazon": "amazon_prime_titles*.csv",
+    "disney": "disney_plus_titles*.csv",
+}
+
+TMDB_FILES = ["movies_metadata*.csv", "tmdb_5000_movies*.csv"]
+
+CORE_COLUMNS = ["catalog", "record_id", "title", "year", "kind"]
+
+
+def _find(raw_dir, pattern):
+    matches = sorted(Path(raw_dir).rglob(pattern))
+    return matches[0] if matches else None
+
+
+def catalog_files(name, raw_dir="data/raw"):
+    """Raw files a catalog is loaded from ("netflix", "amazon", "disney" or "tmdb")."""
+    patterns = TMDB_FILES if name == "tmdb" else [STREAMING_FILES[name]]
+    return [path for path in (_find(raw_dir, pattern) for pattern in patterns) if path is not None]
+
+
+def load_streaming_catalog(name, raw_dir="data/raw", movies_only=False):
+    """Load the Netflix, Amazon Prime or Disney+ titles file."""
+    path = _find(raw_dir, STREAMING_FILES[name])
+    if path is None:
+        raise FileNotFoundError(f"No {STREAMING_FILES[name]} under {raw_dir}. Run: make download")
+
+    raw = pd.read_csv(path, usecols=["show_id", "type", "title", "release_year"], dtype={"show_id": "string"})
+    catalog = pd.DataFrame({
+        "catalog": name,
+        "record_id": raw["show_id"],
+        "title": raw["title"].astype("string"),
+        "year": pd.to_numeric(raw["release_year"], errors="coerce").astype("Int16"),
+        "kind": raw["type"].str.lower().map({"movie": "movie", "tv show": "tv"}),
+    })
+    if movies_only:
+        catalog = catalog[catalog["kind"] == "movie"]
+    return catalog.dropna(subset=["title"]).reset_index(drop=True)
+
+
+def load_tmdb(raw_dir="data/raw"):
+    """TMDb movies from the-movies-dataset and tmdb-5000, one row per TMDb id."""
+    frames = []
+    for pattern in TMDB_FILES:
+        path = _find(raw_dir, pattern)
+        if path is None:
+            continue
+        raw = pd.read_csv(path, usecols=["id", "title", "original_title", "release_date", "popularity", "vote_count"],
+                          dtype=str)
+        frames.append(pd.DataFrame({
+            "catalog": "tmdb",
+            # movies_metadata.csv has a few shifted rows whose id is a date; they drop out here
+            "record_id": pd.to_numeric(raw["id"], errors="coerce").astype("Int64").astype("string"),
+            "title": raw["title"].astype("string"),
+            "year": pd.to_numeric(raw["release_date"].str[:4], errors="coerce").astype("Int16"),
+            "kind": "movie",
+            "original_title": raw["original_title"].astype("string"),
+            "popularity": pd.to_numeric(raw["popularity"], errors="coerce"),
+            "vote_count": pd.to_numeric(raw["vote_count"], errors="coerce"),
+        }))
+    if not frames:
+        raise FileNotFoundError(f"No TMDb files ({', '.join(TMDB_FILES)}) under {raw_dir}")
+
+    tmdb = pd.concat(frames, ignore_index=True).dropna(subset=["record_id", "title"])
+    return tmdb.drop_duplicates("record_id").reset_index(drop=True)
@@ -0,0 +1,45 @@
+"""
+Title normalization (Exercise 2, Task 2.1).
+
+    normalize_title("The Matrix")                -> "matrix"
+    normalize_title("Spider-Man: Homecoming")    -> "spiderman homecoming"
+    normalize_title("Amélie")                    -> "amelie"
+    normalize_title("Rocky II")                  -> "rocky 2"
+    normalize_title("Iron Man 2")                -> "iron man 2"   (numbers are kept)
+    phonetic_key("rocky 2", jellyfish.soundex)   -> "R200 2"
+"""
+
+import re
+import unicodedata
+
+# Hyphens and apostrophes join words ("Spider-Man" -> "spiderman"); other punctuation splits them
+_JOINERS = re.compile(r"[-'’`]")
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_YEAR = re.compile(r"\(\s*(19|20)\d{2}\s*\)")
+_LEADING_ARTICLE = re.compile(r"^(the|a|an)\s+")
+
+# Sequel numerals only; "i", "v" and "x" are too often real words or letters
+ROMAN_NUMERALS = {"ii": "2", "iii": "3", "iv": "4", "vi": "6", "vii": "7", "viii": "8", "ix": "9"}
+
+
+def fold_accents(text):
+    """'Amélie' -> 'Amelie' (NFKD, then drop the combining marks)."""
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+
+def normalize_title(title, drop_year=True, drop_article=True):
+    """Lowercase, fold accents, strip punctuation, a leading "the"/"a"/"an" and "(2019)"-style years."""
+    if not isinstance(title, str):
+        return ""
+    text = fold_accents(title).lower().replace("&", " and ")
+    if drop_year:
+        text = _YEAR.sub(" ", text)
+    text = _NON_ALNUM.sub(" ", _JOINERS.sub("", text)).strip()
+    if drop_article:
+        text = _LEADING_ARTICLE.sub("", text)
+    return " ".join(ROMAN_NUMERALS.get(token, token) for token in text.split())
+
+
+def phonetic_key(title, encoder):
+    """Encode each word of a normalized title; numbers are kept so "rocky 2" != "rocky 3"."""
+    return " ".join(word if word.isdigit() else encoder(word) for word in title.split())
@@ -0,0 +1,87 @@
+"""
+Normalized title side table (Exercise 2, Task 2.1), computed once per catalog.
+
+Matching (Ex 2), resolution (Ex 3) and enrichment (Ex 4) all compare the
+same titles again and again. This module normalizes each distinct title
+once and stores the derived columns with the catalog:
+
+    normalized     "spiderman homecoming"
+    tokens         ["homecoming", "spiderman"]    (distinct words, sorted)
+    sorted_tokens  "homecoming spiderman"         (token_sort_ratio input)
+    soundex        "S136 H525"                    (per word)
+    metaphone      "SPTRMN HMKMNK"                (per word)
+
+The table is saved as Parquet in the stage cache (data/processed/.stage_cache/).
+Its key covers the raw catalog files and the source of the normalization
+functions, so repeat runs load it in well under a second. It is rebuilt
+only when the download or the normalization rules change.
+
+Usage:
+    from src.title_table import title_table
+
+    netflix = title_table("netflix", movies_only=True)
+    tmdb = title_table("tmdb")
+"""
+
+import jellyfish
+import pandas as pd
+
+from .catalogs import catalog_files, load_streaming_catalog, load_tmdb
+from .normalize import normalize_title, phonetic_key
+from .stage_cache import code_fingerprint, open_cache
+
+TITLE_COLUMNS = ["normalized", "tokens", "sorted_tokens", "soundex", "metaphone"]
+
+
+def _derive(title):
+    normalized = normalize_title(title)
+    words = normalized.split()
+    return (
+        normalized,
+        sorted(set(words)),
+        " ".join(sorted(words)),
+        phonetic_key(normalized, jellyfish.soundex),
+        phonetic_key(normalized, jellyfish.metaphone),
+    )
+
+
+def build_title_table(titles):
+    """TITLE_COLUMNS for a Series of raw titles (each distinct title is processed once)."""
+    titles = pd.Series(titles).astype(object).where(lambda s: s.notna(), "")
+    codes, distinct = pd.factorize(titles)
+    derived = pd.DataFrame([_derive(title) for title in distinct], columns=TITLE_COLUMNS)
+    return derived.iloc[codes].reset_index(drop=True).set_axis(titles.index)
+
+
+def with_title_columns(catalog):
+    """Catalog with TITLE_COLUMNS added (no caching; see title_table)."""
+    return pd.concat([catalog, build_title_table(catalog["title"])], axis=1)
+
+
+def _load_catalog(name, raw_dir):
+    return load_tmdb(raw_dir) if name == "tmdb" else load_streaming_catalog(name, raw_dir)
+
+
+def title_table(name, raw_dir=None, movies_only=False, use_cache=True):
+    """Catalog ("netflix", "amazon", "disney" or "tmdb") with TITLE_COLUMNS, cached as Parquet."""
+    cache = open_cache(raw_dir)
+    if not use_cache:
+        return _filter(with_title_columns(_load_catalog(name, cache.raw_dir)), movies_only)
+
+    files = catalog_files(name, cache.raw_dir)
+    stage = f"titles_{name}"
+    key = cache.fingerprint(stage, with_title_columns, datasets=files, params={
+        "catalog": name,
+        "code": [code_fingerprint(func) for func in (_derive, normalize_title, phonetic_key, _load_catalog)],
+    })
+    outputs = cache.load(stage, key)
+    if outputs is None:
+        outputs = {"titles": with_title_columns(_load_catalog(name, cache.raw_dir))}
+        cache.store(stage, key, outputs, params={"catalog": name})
+    return _filter(outputs["titles"], movies_only)
+
+
+def _filter(catalog, movies_only):
+    if movies_only:
+        catalog = catalog[catalog["kind"] == "movie"].reset_index(drop=True)
+    return catalog
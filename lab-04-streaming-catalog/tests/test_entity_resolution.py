@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.entity_resolution import EntityResolver, UnionFind
+
+RECORDS = 40
+
+
+def catalog(name, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "record_id": [f"{name}{i}" for i in range(RECORDS)],
+        "title": [f"title number {i}" for i in rng.permutation(RECORDS)],
+        "year": rng.choice([2001, 2002, 2010], RECORDS),
+    })
+
+
+def edges(left, right, seed, n=60):
+    """Random match edges; some fail the score or year rules."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "left_id": [f"{left}{i}" for i in rng.integers(0, RECORDS, n)],
+        "right_id": [f"{right}{i}" for i in rng.integers(0, RECORDS, n)],
+        "score": rng.choice([70, 90, 100], n),
+    })
+
+
+def build(order, catalogs, all_edges):
+    """Add catalogs in order, each with its edges to the catalogs already added."""
+    resolver = EntityResolver()
+    added = []
+    for name in order:
+        mine = {}
+        for (left, right), frame in all_edges.items():
+            if left == name and right in added:
+                mine[right] = frame
+            elif right == name and left in added:
+                mine[left] = frame.rename(columns={"left_id": "right_id", "right_id": "left_id"})
+        resolver.add_catalog(name, catalogs[name], mine)
+        added.append(name)
+    return resolver
+
+
+def edges_of(name, all_edges):
+    return {right if left == name else left:
+            frame if left == name else frame.rename(columns={"left_id": "right_id", "right_id": "left_id"})
+            for (left, right), frame in all_edges.items() if name in (left, right)}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_replace_catalog_matches_a_fresh_build(seed):
+    catalogs = {"a": catalog("a", seed), "b": catalog("b", seed + 10), "c": catalog("c", seed + 20)}
+    all_edges = {("a", "b"): edges("a", "b", seed), ("a", "c"): edges("a", "c", seed + 1),
+                 ("b", "c"): edges("b", "c", seed + 2)}
+    resolver = build(["a", "b", "c"], catalogs, all_edges)
+
+    # The new b drops some records, keeps others and adds new ones
+    new_b = pd.concat([catalogs["b"].iloc[10:], catalog("b", seed + 30).assign(
+        record_id=lambda f: f["record_id"].str.replace("b", "b_new"))], ignore_index=True)
+    new_edges = {**all_edges, ("a", "b"): edges("a", "b", seed + 3), ("b", "c"): pd.concat(
+        [edges("b", "c", seed + 4), edges("b_new", "c", seed + 5)], ignore_index=True)}
+    resolver.replace_catalog("b", new_b, edges_of("b", new_edges))
+
+    fresh = build(["a", "c", "b"], {**catalogs, "b": new_b}, new_edges)
+    assert resolver.overlap_counts() == fresh.overlap_counts()
+    pd.testing.assert_frame_equal(resolver.entity_table(), fresh.entity_table())
+
+
+def test_union_find_members_follow_unions():
+    sets = UnionFind()
+    nodes = [sets.add() for _ in range(6)]
+    sets.union(nodes[0], nodes[1])
+    sets.union(nodes[2], nodes[1])
+    sets.union(nodes[4], nodes[5])
+    assert sets.find(nodes[0]) == sets.find(nodes[2]) != sets.find(nodes[4])
+    assert sorted(sorted(m) for m in sets.members.values()) == [[0, 1, 2], [3], [4, 5]]
+
+    sets.reset(sets.members[sets.find(nodes[0])][:])
+    assert sorted(sorted(m) for m in sets.members.values()) == [[0], [1], [2], [3], [4, 5]]
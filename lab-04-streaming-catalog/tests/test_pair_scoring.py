@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+from rapidfuzz import fuzz
+from rapidfuzz.distance import Levenshtein
+
+from src.pair_scoring import FEATURES, _synthetic_catalog, score_pairs
+from src.title_table import with_title_columns
+
+
+@pytest.fixture(scope="module")
+def catalogs():
+    return (with_title_columns(_synthetic_catalog("netflix", 300, 1)),
+            with_title_columns(_synthetic_catalog("amazon", 200, 2)))
+
+
+def random_pairs(n, left, right, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"query_index": rng.integers(0, len(left), n), "record_index": rng.integers(0, len(right), n)})
+
+
+def test_scores_match_rapidfuzz_pair_by_pair(catalogs):
+    left, right = catalogs
+    pairs = random_pairs(200, left, right)
+    scored = score_pairs(pairs, left, right, workers=1, chunk_pairs=64)
+
+    assert list(scored.columns) == ["query_index", "record_index", *FEATURES]
+    for row in scored.sample(25, random_state=0).itertuples():
+        a, b = left.iloc[row.query_index], right.iloc[row.record_index]
+        assert row.levenshtein == pytest.approx(100 * Levenshtein.normalized_similarity(a.normalized, b.normalized))
+        assert row.token_set == pytest.approx(fuzz.token_set_ratio(a.normalized, b.normalized), abs=1e-4)
+        assert row.partial == pytest.approx(fuzz.partial_ratio(a.normalized, b.normalized), abs=1e-4)
+        assert row.soundex == pytest.approx(fuzz.token_set_ratio(a.soundex, b.soundex), abs=1e-4)
+    assert ((scored[list(FEATURES)] >= 0) & (scored[list(FEATURES)] <= 100)).all().all()
+
+
+def test_workers_and_chunking_keep_rows_in_order(catalogs):
+    left, right = catalogs
+    pairs = random_pairs(1_000, left, right, seed=1).set_index(pd.RangeIndex(1_000)[::-1])
+    one = score_pairs(pairs, left, right, workers=1)
+    pooled = score_pairs(pairs, left, right, workers=3, chunk_pairs=97)
+    pd.testing.assert_frame_equal(pooled, one)
+    assert one.index.equals(pairs.index)
+    assert score_pairs(pairs.iloc[:0], left, right, workers=2).shape == (0, 2 + len(FEATURES))
+
+
+def test_raw_title_lists_are_normalized_first():
+    pairs = pd.DataFrame({"query_index": [0, 1, 1], "record_index": [0, 1, 0]})
+    scored = score_pairs(pairs, ["The Matrix (1999)", "Rocky II"], ["Matrix", "ROCKY 2"], workers=1)
+    assert scored[list(FEATURES)].iloc[:2].eq(100).all().all()
+    assert (scored[list(FEATURES)].iloc[2] < 100).all()
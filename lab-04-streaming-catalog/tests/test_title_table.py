@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+from src import title_table as titles
+from src.title_table import TITLE_COLUMNS, build_title_table, title_table
+
+
+@pytest.fixture
+def derived(monkeypatch):
+    """Titles passed to _derive, in call order."""
+    calls = []
+    real = titles._derive
+    monkeypatch.setattr(titles, "_derive", lambda title: calls.append(title) or real(title))
+    return calls
+
+
+@pytest.fixture
+def raw_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_PROCESSED_DIR", str(tmp_path / "processed"))
+    raw = tmp_path / "raw"
+    (raw / "netflix").mkdir(parents=True)
+    pd.DataFrame({
+        "show_id": ["s1", "s2", "s3", "s4"],
+        "type": ["Movie", "TV Show", "Movie", "Movie"],
+        "title": ["Spider-Man: Homecoming", "The Crown", "Rocky II", "Spider-Man: Homecoming"],
+        "release_year": [2017, 2016, 1979, 2017],
+    }).to_csv(raw / "netflix" / "netflix_titles.csv", index=False)
+    return raw
+
+
+def test_derived_columns_for_each_distinct_title_once(derived):
+    raw = pd.Series(["Spider-Man: Homecoming", None, "Rocky II", "Spider-Man: Homecoming"], index=[7, 3, 5, 1])
+    table = build_title_table(raw)
+
+    assert derived == ["Spider-Man: Homecoming", "", "Rocky II"]
+    assert list(table.columns) == TITLE_COLUMNS
+    assert table.index.equals(raw.index)
+    first = table.iloc[0]
+    assert first["normalized"] == "spiderman homecoming"
+    assert list(first["tokens"]) == ["homecoming", "spiderman"]
+    assert first["sorted_tokens"] == "homecoming spiderman"
+    assert first["soundex"] == "S136 H525"
+    assert first["metaphone"] == "SPTRMN HMKMNK"
+    assert table.loc[5, "soundex"] == "R200 2"
+    assert table.loc[3].tolist()[0] == "" and table.loc[1].equals(table.loc[7])
+
+
+def test_title_table_is_built_once_then_loaded(raw_dir, derived):
+    built = title_table("netflix", raw_dir)
+    assert len(derived) == 3
+    derived.clear()
+
+    loaded = title_table("netflix", raw_dir)
+    assert derived == []
+    assert loaded["normalized"].tolist() == ["spiderman homecoming", "crown", "rocky 2", "spiderman homecoming"]
+    pd.testing.assert_frame_equal(loaded[["record_id", "normalized", "metaphone"]],
+                                  built[["record_id", "normalized", "metaphone"]], check_dtype=False)
+    assert title_table("netflix", raw_dir, movies_only=True)["record_id"].tolist() == ["s1", "s3", "s4"]
+
+
+def test_a_new_download_rebuilds_the_table(raw_dir, derived):
+    title_table("netflix", raw_dir)
+    path = raw_dir / "netflix" / "netflix_titles.csv"
+    path.write_text(path.read_text() + "s5,Movie,Amélie,2001\n")
+    derived.clear()
+
+    rebuilt = title_table("netflix", raw_dir)
+    assert len(derived) == 4
+    assert rebuilt["normalized"].iloc[-1] == "amelie"
@@ -1,2 +1,11 @@
 """Lab 5: NYC Mobility Externalities - Source Package"""
+
+import sys
+from pathlib import Path
+
 __version__ = "1.0.0"
+
+# Make the repo's shared/ package importable (from shared.utilities import ...)
+_REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.append(str(_REPO_ROOT))
@@ -0,0 +1,87 @@
+"""
+Benchmarks for Lab 5's hot paths on synthetic taxi and 311 data.
+
+    taxi_borough_month   aggregate_taxi_borough_month: read, bucket and
+                         aggregate the trips CSV (one worker, so the timing
+                         doesn't depend on the core count)
+    zone_bucketing       ZoneLookup.bucket on PULocationIDs already in memory
+    311_ingestion        count_311: scan and categorize the 311 CSV
+    correlation          Pearson + Spearman sketch over trip columns, 1M rows
+                         per chunk
+
+Inputs come from shared/utilities/synthetic_data.py and are cached under
+data/bench/. See shared/utilities/benchmark_suite.py for what is measured
+and how to compare runs.
+
+Run with:
+    make bench
+    python -m src.benchmarks --sizes 1M 10M --only taxi_borough_month zone_bucketing
+"""
+
+import pandas as pd
+
+from shared.utilities.benchmark_suite import bench_main
+from shared.utilities.nyc_311 import Taxonomy, count_311, find_311_source
+from shared.utilities.streaming_correlation import correlate_chunks
+
+from .chunked_aggregation import aggregate_taxi_borough_month
+from .zone_lookup import ZoneLookup
+
+SIZES = ["100K", "1M", "4M"]
+
+CORRELATION_COLUMNS = ["trip_distance", "fare_amount", "tip_amount", "total_amount"]
+CORRELATION_CHUNK_ROWS = 1_000_000
+
+
+def taxi_files(data, rows):
+    taxi = data("taxi", rows) / "taxi"
+    return taxi, taxi / "taxi_zone_lookup.csv"
+
+
+def taxi_columns(data, rows, columns):
+    taxi, lookup = taxi_files(data, rows)
+    return pd.read_csv(taxi / "yellow_tripdata.csv", usecols=columns, engine="pyarrow"), lookup
+
+
+def taxi_borough_month(inputs):
+    taxi, lookup = inputs
+    return aggregate_taxi_borough_month(taxi, lookup, year=2019, workers=1, verbose=False)
+
+
+def pickup_ids(data, rows):
+    trips, lookup = taxi_columns(data, rows, ["PULocationID"])
+    return ZoneLookup.from_csv(lookup), trips["PULocationID"].to_numpy()
+
+
+def bucket(inputs):
+    zones, ids = inputs
+    return zones.bucket(ids)
+
+
+def requests_311(data, rows):
+    return find_311_source(data("311_requests", rows, "2019-01-01", "2020-01-01") / "311_requests")
+
+
+def categorize_311(source):
+    return count_311(source, Taxonomy(), year=2019)
+
+
+def trip_values(data, rows):
+    return taxi_columns(data, rows, CORRELATION_COLUMNS)[0]
+
+
+def correlate(trips):
+    chunks = (trips.iloc[i:i + CORRELATION_CHUNK_ROWS] for i in range(0, len(trips), CORRELATION_CHUNK_ROWS))
+    return correlate_chunks(chunks, CORRELATION_COLUMNS)
+
+
+CASES = {
+    "taxi_borough_month": {"setup": taxi_files, "run": taxi_borough_month, "sizes": SIZES},
+    "zone_bucketing": {"setup": pickup_ids, "run": bucket, "sizes": SIZES},
+    "311_ingestion": {"setup": requests_311, "run": categorize_311, "sizes": SIZES},
+    "correlation": {"setup": trip_values, "run": correlate, "sizes": SIZES},
+}
+
+
+if __name__ == "__main__":
+    bench_main(CASES)
@@ -0,0 +1,419 @@
+"""
+Chunked, out-of-core aggregation for the Lab 5 taxi data.
+
+Implements the chunk -> aggregate -> combine strategy from app.py and
+exercises/01_volume_handling.md as a reusable engine:
+
+1. Each input file is split into work units (line-aligned byte ranges for
+   CSV, row groups for Parquet) so several processes can parse in parallel.
+2. Every worker streams its unit in chunks sized to the memory budget,
+   aggregates each chunk to the target grain and keeps only a running
+   partial (count/sum/min/max, all mergeable).
+3. The partials are merged into the final table: 100M trips become the
+   60-row borough x month table (5 boroughs x 12 months).
+
+Run with:
+    python -m src.chunked_aggregation data/raw/taxi --year 2019 --memory-limit-mb 4000
+"""
+
+import argparse
+import io
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+
+from .dashboard_store import open_store
+from .stage_cache import open_cache
+from .stage_metrics import open_log
+from .zone_lookup import ZoneLookup, find_zone_lookup
+
+# Default peak memory budget for all workers together
+MEMORY_LIMIT_MB = int(os.environ.get("MEMORY_LIMIT_MB", 4096))
+
+# Parsing a chunk briefly needs about this multiple of its final DataFrame size
+PARSE_OVERHEAD = 2.5
+
+MIN_CHUNK_ROWS = 10_000
+MAX_CHUNK_ROWS = 2_000_000
+
+# Rows read up front to measure the in-memory size of one row
+SAMPLE_ROWS = 10_000
+
+# Aim for at least this many work units per worker so they finish together
+UNITS_PER_WORKER = 4
+
+# Column names differ between yellow, green and older taxi files
+PICKUP_COLUMNS = ["tpep_pickup_datetime", "lpep_pickup_datetime", "pickup_datetime"]
+PICKUP_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Tried in order on the pickups the fast format doesn't parse (ISO 8601 with "T" or fractions, then anything)
+PICKUP_FALLBACK_FORMATS = ["ISO8601", "mixed"]
+
+# How each kind of partial aggregate is merged with another partial
+MERGE_FUNCS = {"count": "sum", "sum": "sum", "min": "min", "max": "max"}
+
+
+class _ByteRange(io.RawIOBase):
+    """Read-only view of bytes [start, end) of an open binary file, for pd.read_csv.
+
+    Closing the view leaves the file open; its owner closes it.
+    """
+
+    def __init__(self, file, start, end):
+        self._file = file
+        self._file.seek(start)
+        self._remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        view = memoryview(buffer)[:min(len(buffer), self._remaining)]
+        n = self._file.readinto(view)
+        self._remaining -= n
+        return n
+
+
+def find_input_files(path):
+    """Return the CSV/Parquet files at path (a file or a directory tree)."""
+    path = Path(path)
+    if path.is_file():
+        return [path]
+    return sorted(
+        p for p in path.rglob("*")
+        if p.is_file() and p.suffix.lower() in (".csv", ".parquet")
+        and not any(part.startswith((".", "_")) for part in p.relative_to(path).parts)
+    )
+
+
+def read_header(path):
+    """Column names of a CSV or Parquet file."""
+    if path.suffix.lower() == ".parquet":
+        import pyarrow.parquet as pq
+
+        return pq.ParquetFile(path).schema_arrow.names
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def _csv_units(path, n_units):
+    """Split a CSV into line-aligned byte ranges, skipping the header line."""
+    size = path.stat().st_size
+    with open(path, "rb") as f:
+        f.readline()
+        data_start = f.tell()
+        bounds = [data_start]
+        step = max((size - data_start) // n_units, 1)
+        for target in range(data_start + step, size, step):
+            if target <= bounds[-1]:
+                continue
+            f.seek(target)
+            f.readline()
+            if f.tell() >= size:
+                break
+            bounds.append(f.tell())
+    bounds.append(size)
+    return [("csv", str(path), start, end) for start, end in itertools.pairwise(bounds) if end > start]
+
+
+def _parquet_units(path):
+    import pyarrow.parquet as pq
+
+    return [("parquet", str(path), group, None) for group in range(pq.ParquetFile(path).num_row_groups)]
+
+
+def plan_units(files, workers):
+    """Split the input files into work units for the process pool."""
+    total_size = sum(f.stat().st_size for f in files) or 1
+    target_units = workers * UNITS_PER_WORKER
+
+    units = []
+    for path in files:
+        if path.suffix.lower() == ".parquet":
+            units.extend(_parquet_units(path))
+        else:
+            share = max(1, round(target_units * path.stat().st_size / total_size))
+            units.extend(_csv_units(path, share))
+    return units
+
+
+def _iter_chunks(unit, columns, usecols, dtype, chunk_rows):
+    kind, path, start, end = unit
+    if kind == "parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, row_groups=[start], columns=usecols):
+            yield batch.to_pandas()
+        return
+
+    with open(path, "rb") as f, io.BufferedReader(_ByteRange(f, start, end), buffer_size=1024 * 1024) as stream:
+        yield from pd.read_csv(stream, header=None, names=columns, usecols=usecols, dtype=dtype,
+                               chunksize=chunk_rows)
+
+
+def _partial_aggregate(frame, keys, aggregations):
+    named = {out: pd.NamedAgg(column=col, aggfunc=func) for out, (col, func) in aggregations.items()}
+    return frame.groupby(keys, observed=True, sort=False).agg(**named)
+
+
+def merge_partials(partials, aggregations):
+    """Merge partial aggregates (indexed by the group keys) into one."""
+    partials = [p for p in partials if p is not None and len(p)]
+    if not partials:
+        return None
+    combined = pd.concat(partials)
+    merge = {out: MERGE_FUNCS[func] for out, (_, func) in aggregations.items()}
+    return combined.groupby(level=list(range(combined.index.nlevels)), observed=True).agg(merge)
+
+
+def _aggregate_unit(unit, columns, usecols, dtype, chunk_rows, prepare, keys, aggregations):
+    """Worker body: stream one unit chunk by chunk, keeping only the running partial."""
+    running = None
+    rows = skipped = 0
+    for chunk in _iter_chunks(unit, columns, usecols, dtype, chunk_rows):
+        rows += len(chunk)
+        prepared = prepare(chunk)
+        skipped += prepared.attrs.get("rows_skipped", 0)
+        part = _partial_aggregate(prepared, keys, aggregations)
+        running = merge_partials([running, part], aggregations)
+    return running, rows, skipped
+
+
+def estimate_row_bytes(path, usecols=None, dtype=None):
+    """Measure the in-memory bytes per row of the columns we load, from a sample."""
+    if path.suffix.lower() == ".parquet":
+        import pyarrow.parquet as pq
+
+        sample = next(pq.ParquetFile(path).iter_batches(batch_size=SAMPLE_ROWS, columns=usecols)).to_pandas()
+    else:
+        sample = pd.read_csv(path, nrows=SAMPLE_ROWS, usecols=usecols, dtype=dtype)
+    if sample.empty:
+        return 1
+    return sample.memory_usage(deep=True, index=False).sum() / len(sample)
+
+
+def plan_chunks(row_bytes, memory_limit_mb, workers):
+    """Pick (workers, chunk_rows) so all workers' chunks fit in memory_limit_mb.
+
+    Workers are dropped before chunks shrink below MIN_CHUNK_ROWS, since
+    tiny chunks spend their time on per-chunk overhead. Raises ValueError
+    if one worker's MIN_CHUNK_ROWS chunk already exceeds the budget.
+    """
+    budget = memory_limit_mb * 1024 * 1024 / PARSE_OVERHEAD
+    while workers > 1 and budget / workers / row_bytes < MIN_CHUNK_ROWS:
+        workers -= 1
+    chunk_rows = int(budget / workers / row_bytes)
+    if chunk_rows < MIN_CHUNK_ROWS:
+        needed_mb = MIN_CHUNK_ROWS * row_bytes * PARSE_OVERHEAD / 1024 / 1024
+        raise ValueError(f"A memory limit of {memory_limit_mb} MB can't hold one chunk of {MIN_CHUNK_ROWS:,} rows "
+                         f"(~{row_bytes:.0f} B/row); raise it to at least {needed_mb:.0f} MB")
+    return workers, min(MAX_CHUNK_ROWS, chunk_rows)
+
+
+def aggregate(path, prepare, keys, aggregations, usecols=None, dtype=None,
+              memory_limit_mb=MEMORY_LIMIT_MB, workers=None, chunk_rows=None, verbose=True):
+    """Group-aggregate CSV/Parquet data larger than memory.
+
+    Args:
+        path: A CSV/Parquet file, a directory searched recursively, or a list of files.
+        prepare: Picklable function chunk -> DataFrame that adds the key and
+            value columns (filtering rows is fine). Runs inside the workers.
+            Rows it drops because they can't be read can be counted in the
+            returned frame's .attrs["rows_skipped"].
+        keys: Column names to group by, produced by prepare.
+        aggregations: {output: (column, "count" | "sum" | "min" | "max")}.
+            Means are sum / count, computed by the caller after merging.
+        usecols, dtype: Passed to the reader; load only what prepare needs.
+        memory_limit_mb: Peak memory budget for all workers' chunks.
+        workers: Process count (default: CPU count).
+        chunk_rows: Override the chunk size derived from the memory budget.
+
+    Returns:
+        DataFrame indexed by ``keys`` with one column per aggregation, the
+        number of rows read (before prepare filters them) in
+        ``.attrs["rows_read"]`` and the rows prepare skipped in
+        ``.attrs["rows_skipped"]``; None if no group has any rows.
+    """
+    files = list(path) if isinstance(path, (list, tuple)) else find_input_files(path)
+    if not files:
+        raise FileNotFoundError(f"No CSV or Parquet files found at {path}")
+
+    columns = read_header(files[0])
+    workers = workers or os.cpu_count() or 1
+    row_bytes = estimate_row_bytes(files[0], usecols, dtype)
+    workers, planned_rows = plan_chunks(row_bytes, memory_limit_mb, workers)
+    chunk_rows = chunk_rows or planned_rows
+    units = plan_units(files, workers)
+
+    if verbose:
+        print(f"Aggregating {len(files)} files as {len(units)} units: {workers} workers x "
+              f"{chunk_rows:,} rows/chunk (~{row_bytes:.0f} B/row, budget {memory_limit_mb} MB)")
+
+    work = partial(_aggregate_unit, columns=columns, usecols=usecols, dtype=dtype, chunk_rows=chunk_rows,
+                   prepare=prepare, keys=keys, aggregations=aggregations)
+    partials = []
+    total_rows = total_skipped = 0
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        results = pool.map(work, units) if pool else map(work, units)
+        for done, (part, rows, skipped) in enumerate(results, 1):
+            partials.append(part)
+            total_rows += rows
+            total_skipped += skipped
+            if verbose:
+                print(f"  [{done}/{len(units)}] {total_rows:,} rows read")
+    finally:
+        if pool:
+            pool.shutdown()
+
+    result = merge_partials(partials, aggregations)
+    if verbose:
+        print(f"Done: {total_rows:,} rows -> {0 if result is None else len(result)} groups")
+    if result is not None:
+        result.attrs["rows_read"] = total_rows
+        result.attrs["rows_skipped"] = total_skipped
+    return result
+
+
+# --- Taxi: borough x month -------------------------------------------------
+
+def parse_pickups(values):
+    """Pickup times as datetime64: PICKUP_DATETIME_FORMAT first, the fallbacks only for rows it misses."""
+    pickup = pd.to_datetime(values, format=PICKUP_DATETIME_FORMAT, errors="coerce")
+    for fmt in PICKUP_FALLBACK_FORMATS:
+        missed = pickup.isna() & values.notna()
+        if not missed.any():
+            break
+        # Times with a UTC offset come back in UTC; the rest are kept as written
+        retry = pd.to_datetime(values[missed], format=fmt, errors="coerce", utc=True).dt.tz_localize(None)
+        pickup = pickup.where(~missed, retry.astype(pickup.dtype))
+    return pickup
+
+
+def prepare_taxi_chunk(chunk, pickup_column, zones, year=None):
+    """Add borough and year_month keys; drop trips outside NYC or the target year.
+
+    zones is a ZoneLookup, so the borough comes from an array take rather than
+    a merge against the zone table. Trips whose pickup time doesn't parse are
+    dropped and counted in .attrs["rows_skipped"].
+    """
+    pickup = chunk[pickup_column]
+    if not pd.api.types.is_datetime64_any_dtype(pickup):
+        pickup = parse_pickups(pickup)
+
+    positions = zones.positions(chunk["PULocationID"])
+    out = pd.DataFrame({
+        "borough": zones.bucket(positions, "Borough"),
+        "year": pickup.dt.year,
+        "month": pickup.dt.month,
+        # Fares are money and are read as float64; distance is read as float32 to save
+        # memory. Both are summed as float64 so 100M rows don't drift
+        "fare_amount": chunk["fare_amount"].astype("float64"),
+        "trip_distance": chunk["trip_distance"].astype("float64"),
+    })
+    keep = zones.nyc_mask(positions) & out["month"].notna().to_numpy()
+    if year is not None:
+        keep &= out["year"] == year
+    out = out[keep]
+    out.attrs["rows_skipped"] = int((pickup.isna() & chunk[pickup_column].notna()).sum())
+    return out
+
+
+TAXI_AGGREGATIONS = {
+    "trip_count": ("fare_amount", "count"),
+    "total_fare": ("fare_amount", "sum"),
+    "total_distance": ("trip_distance", "sum"),
+}
+
+
+def aggregate_taxi_borough_month(taxi_path, zone_lookup_path, year=None, **kwargs):
+    """Aggregate raw taxi trips to the borough x month table (60 rows for one year).
+
+    Extra keyword arguments (memory_limit_mb, workers, chunk_rows) go to aggregate().
+    .attrs["rows_read"] counts the trips read, including those outside NYC or the year;
+    .attrs["rows_skipped"] the trips dropped because their pickup time didn't parse.
+    """
+    # The taxi folder also holds taxi_zone_lookup.csv; only files with a pickup column are trips
+    headers = {f: read_header(f) for f in find_input_files(taxi_path)}
+    pickup_column = next((c for c in PICKUP_COLUMNS for header in headers.values() if c in header), None)
+    if pickup_column is None:
+        raise FileNotFoundError(f"No taxi trip files (with one of {PICKUP_COLUMNS}) found at {taxi_path}")
+    files = [f for f, header in headers.items() if pickup_column in header]
+
+    prepare = partial(prepare_taxi_chunk, pickup_column=pickup_column,
+                      zones=ZoneLookup.from_csv(zone_lookup_path), year=year)
+    usecols = [pickup_column, "PULocationID", "fare_amount", "trip_distance"]
+    dtype = {"PULocationID": "float32", "fare_amount": "float64", "trip_distance": "float32"}
+
+    result = aggregate(files, prepare, ["borough", "year", "month"],
+                       TAXI_AGGREGATIONS, usecols=usecols, dtype=dtype, **kwargs)
+    if result is None:
+        return pd.DataFrame(columns=["borough", "year_month", *TAXI_AGGREGATIONS, "avg_fare", "avg_distance"])
+
+    counts = {name: result.attrs[name] for name in ("rows_read", "rows_skipped")}
+    result = result.reset_index()
+    result["year_month"] = (result["year"].astype(int).astype(str) + "-"
+                            + result["month"].astype(int).astype(str).str.zfill(2))
+    result["avg_fare"] = result["total_fare"] / result["trip_count"]
+    result["avg_distance"] = result["total_distance"] / result["trip_count"]
+    result = result.drop(columns=["year", "month"]).sort_values(["borough", "year_month"])
+    result = result[["borough", "year_month", *TAXI_AGGREGATIONS, "avg_fare", "avg_distance"]].reset_index(drop=True)
+    result.attrs.update(counts)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate taxi trips to borough x month out of core")
+    parser.add_argument("taxi_path", nargs="?", default="data/raw/taxi", help="Taxi CSV/Parquet file or directory")
+    parser.add_argument("--zone-lookup", help="taxi_zone_lookup.csv (default: searched under data/raw)")
+    parser.add_argument("--year", type=int, help="Keep only trips from this year (gives 60 rows)")
+    parser.add_argument("--memory-limit-mb", type=int, default=MEMORY_LIMIT_MB,
+                        help=f"Peak memory budget for all workers (default: {MEMORY_LIMIT_MB})")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--output", default="data/processed/taxi_borough_month.csv")
+    parser.add_argument("--force", action="store_true", help="Rescan the taxi data even if the stage cache is current")
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor write the stage cache")
+    args = parser.parse_args()
+
+    zone_lookup = Path(args.zone_lookup or find_zone_lookup("data/raw")).resolve()
+    taxi_path = Path(args.taxi_path).resolve()
+
+    # Rescanning 10GB of trips only happens when the trips, the zone lookup or this code change
+    cache = None if args.no_cache else open_cache()
+    key = cache and cache.fingerprint("taxi_borough_month", aggregate_taxi_borough_month, params={"year": args.year},
+                                      datasets=[taxi_path, zone_lookup], helpers=[ZoneLookup])
+    cached = cache.load("taxi_borough_month", key) if cache and not args.force else None
+    log = open_log(Path(args.output).parent)
+    if cached is not None:
+        result = cached["taxi_borough_month"]
+        log.write("taxi_borough_month", status="cached", wall_s=0.0, rows_out=len(result))
+        print("· Taxi data unchanged since the last run, using the stage cache (--force to rescan)")
+    else:
+        # The chunks are read in worker processes, which this process's I/O counter doesn't see
+        taxi_bytes = sum(f.stat().st_size for f in find_input_files(taxi_path))
+        with log.stage("taxi_borough_month", bytes_read=taxi_bytes) as record:
+            result = aggregate_taxi_borough_month(taxi_path, zone_lookup, year=args.year,
+                                                  memory_limit_mb=args.memory_limit_mb, workers=args.workers)
+            record.set(rows_in=result.attrs.get("rows_read"), rows_out=len(result),
+                       rows_skipped=result.attrs.get("rows_skipped"))
+        if result.attrs.get("rows_skipped"):
+            print(f"⚠️  {result.attrs['rows_skipped']:,} trips skipped: pickup time not in a known format")
+        if cache:
+            cache.store("taxi_borough_month", key, {"taxi_borough_month": result}, params={"year": args.year})
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    result.to_csv(output, index=False)
+    print(f"✓ Saved {len(result)} rows to {output}")
+
+    open_store(output.parent).publish(
+        tables={"taxi_borough_month": result},
+        metrics=[{"label": "Taxi Trips", "value": f"{int(result['trip_count'].sum()):,}",
+                  "help": f"Trips in {args.year}" if args.year else "All trips scanned"}],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""
+Stage cache for Lab 5 pipelines.
+
+Thin wrapper around shared/utilities/stage_cache.py that points the cache
+at this lab's data directories. Cached stage outputs live in
+data/processed/.stage_cache/ and are safe to delete at any time.
+"""
+
+import os
+from pathlib import Path
+
+from shared.utilities.stage_cache import MAX_CACHE_MB, StageCache, stages_to_rerun
+
+LAB_DIR = Path(__file__).resolve().parent.parent
+
+__all__ = ["StageCache", "open_cache", "stages_to_rerun"]
+
+
+def open_cache(raw_dir=None, processed_dir=None, max_mb=MAX_CACHE_MB):
+    """StageCache for this lab (DATA_RAW_DIR / DATA_PROCESSED_DIR are honored)."""
+    raw_dir = Path(raw_dir or os.environ.get("DATA_RAW_DIR", LAB_DIR / "data" / "raw"))
+    processed_dir = Path(processed_dir or os.environ.get("DATA_PROCESSED_DIR", LAB_DIR / "data" / "processed"))
+    return StageCache(processed_dir / ".stage_cache", raw_dir, max_mb=max_mb)
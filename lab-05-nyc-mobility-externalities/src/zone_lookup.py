@@ -0,0 +1,170 @@
+"""
+Array-backed taxi zone lookup for vectorized spatial bucketing.
+
+Exercise 3 maps PULocationID to a borough by joining each chunk against
+taxi_zone_lookup.csv. LocationIDs are small dense integers (1-265), so the
+lookup table fits in a few arrays indexed directly by LocationID:
+
+    borough_codes[161] -> code of "Manhattan"
+
+Bucketing a chunk is then one NumPy take per column. There is no merge,
+no hashing and no per-row string. The result comes back as a pandas
+Categorical that shares the category list.
+
+Run the benchmark with:
+    python -m src.zone_lookup --rows 10000000
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ["Borough", "Zone", "service_zone"]
+
+NYC_BOROUGHS = ["Manhattan", "Brooklyn", "Queens", "Bronx", "Staten Island"]
+
+# Label for zones with a missing name (the lookup has "N/A"/blank rows for 264/265)
+UNKNOWN = "Unknown"
+
+
+class ZoneLookup:
+    """Dense LocationID -> borough/zone/service_zone lookup stored as categorical codes.
+
+    codes[field] is an int16 array where position LocationID holds the index
+    of that zone's value in categories[field]. The final slot holds -1 and
+    absorbs IDs that are missing, negative or past the end of the table, so
+    they come out as NaN.
+    """
+
+    def __init__(self, zones):
+        zones = zones.dropna(subset=["LocationID"])
+        ids = zones["LocationID"].astype(np.int64).to_numpy()
+        self.max_id = int(ids.max())
+
+        self.categories = {}
+        self.codes = {}
+        for field in FIELDS:
+            values = zones[field].fillna(UNKNOWN).astype(str).replace({"N/A": UNKNOWN, "NV": UNKNOWN})
+            categorical = pd.Categorical(values)
+            codes = np.full(self.max_id + 2, -1, dtype=np.int16)
+            codes[ids] = categorical.codes
+            self.categories[field] = categorical.categories
+            self.codes[field] = codes
+
+        borough_names = np.asarray(self.categories["Borough"])
+        self.is_nyc = np.append(np.isin(borough_names, NYC_BOROUGHS), False)[self.codes["Borough"]]
+
+    @classmethod
+    def from_csv(cls, path):
+        return cls(pd.read_csv(path))
+
+    def positions(self, location_ids):
+        """Turn LocationIDs (ints, floats with NaN, a Series) into safe array positions.
+
+        The result can be passed to bucket() and nyc_mask() in place of the
+        IDs to skip the bounds check when several fields are looked up.
+        """
+        ids = np.asarray(location_ids, dtype=np.float64)
+        valid = (ids >= 0) & (ids <= self.max_id)
+        return np.where(valid, ids, self.max_id + 1).astype(np.intp).view(Positions)
+
+    def bucket(self, location_ids, field="Borough"):
+        """Map LocationIDs to a Categorical of field values (NaN for unknown IDs)."""
+        positions = location_ids if _is_positions(location_ids) else self.positions(location_ids)
+        codes = self.codes[field].take(positions)
+        return pd.Categorical.from_codes(codes, categories=self.categories[field])
+
+    def nyc_mask(self, location_ids):
+        """Boolean mask of IDs inside the five boroughs (drops EWR and Unknown)."""
+        positions = location_ids if _is_positions(location_ids) else self.positions(location_ids)
+        return self.is_nyc.take(positions)
+
+
+class Positions(np.ndarray):
+    """Array positions returned by ZoneLookup.positions(), already bounds-checked."""
+
+
+def _is_positions(values):
+    # Only arrays from positions(): a raw int array of IDs still needs checking
+    return isinstance(values, Positions)
+
+
+def find_zone_lookup(raw_dir):
+    """Locate taxi_zone_lookup.csv (or similar) under the raw data directory."""
+    matches = sorted(Path(raw_dir).rglob("*zone*lookup*.csv"))
+    if not matches:
+        raise FileNotFoundError(f"No taxi zone lookup CSV found under {raw_dir}")
+    return matches[0]
+
+
+# --- Benchmark -------------------------------------------------------------
+
+def _synthetic_zones(n_zones=265, seed=0):
+    rng = np.random.default_rng(seed)
+    boroughs = ["EWR"] + list(rng.choice(NYC_BOROUGHS, n_zones - 3)) + [UNKNOWN, "N/A"]
+    return pd.DataFrame({
+        "LocationID": np.arange(1, n_zones + 1),
+        "Borough": boroughs,
+        "Zone": [f"Zone {i}" for i in range(1, n_zones + 1)],
+        "service_zone": rng.choice(["Yellow Zone", "Boro Zone", "Airports"], n_zones),
+    })
+
+
+def _best_time(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark(zones, n_rows=10_000_000, repeat=3, seed=0):
+    """Time merge vs Series.map vs array take for the borough column of n_rows trips."""
+    rng = np.random.default_rng(seed)
+    trips = pd.DataFrame({"PULocationID": rng.integers(1, len(zones) + 1, n_rows)})
+    lookup = ZoneLookup(zones)
+    zone_table = zones[["LocationID", "Borough"]]
+    borough_by_id = dict(zip(zones["LocationID"], zones["Borough"], strict=True))
+
+    methods = {
+        "merge": lambda: trips.merge(zone_table, left_on="PULocationID", right_on="LocationID", how="left")["Borough"],
+        "Series.map(dict)": lambda: trips["PULocationID"].map(borough_by_id),
+        "array take": lambda: lookup.bucket(trips["PULocationID"].to_numpy()),
+    }
+
+    reference = methods["merge"]().fillna(UNKNOWN).replace({"N/A": UNKNOWN}).to_numpy()
+    taken = np.asarray(methods["array take"]().astype(str))
+    assert (taken == reference).all(), "array lookup disagrees with merge"
+
+    results = {}
+    for name, func in methods.items():
+        results[name] = _best_time(func, repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LocationID -> borough lookups")
+    parser.add_argument("--lookup", help="taxi_zone_lookup.csv (default: searched under data/raw)")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    try:
+        zones = pd.read_csv(args.lookup or find_zone_lookup("data/raw"))
+    except FileNotFoundError:
+        print("⚠️  No taxi zone lookup found, benchmarking against a synthetic 265-zone table")
+        zones = _synthetic_zones()
+
+    print(f"Mapping {args.rows:,} PULocationIDs to boroughs (best of {args.repeat})")
+    results = benchmark(zones, args.rows, args.repeat)
+    baseline = results["merge"]
+    for name, seconds in results.items():
+        print(f"  {name:<18} {seconds:8.3f}s  {args.rows / seconds / 1e6:8.1f} M rows/s  {baseline / seconds:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
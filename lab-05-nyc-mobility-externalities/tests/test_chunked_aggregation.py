@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.chunked_aggregation import (
+    MIN_CHUNK_ROWS,
+    PARSE_OVERHEAD,
+    aggregate,
+    aggregate_taxi_borough_month,
+    plan_chunks,
+)
+from src.zone_lookup import ZoneLookup, _synthetic_zones
+
+ROWS = 20_000
+
+
+@pytest.fixture(scope="module")
+def taxi(tmp_path_factory):
+    rng = np.random.default_rng(0)
+    folder = tmp_path_factory.mktemp("taxi")
+    zones = _synthetic_zones()
+    zones.to_csv(folder / "taxi_zone_lookup.csv", index=False)
+    pickup = pd.Timestamp("2018-12-01") + pd.to_timedelta(rng.integers(0, 120 * 86_400, ROWS), unit="s")
+    trips = pd.DataFrame({
+        "tpep_pickup_datetime": pickup.strftime("%Y-%m-%d %H:%M:%S"),
+        # Includes IDs outside the lookup and missing ones
+        "PULocationID": pd.Series(rng.integers(-5, 280, ROWS), dtype="Int64").where(rng.random(ROWS) > 0.01),
+        "fare_amount": np.round(rng.uniform(2.5, 80, ROWS), 2),
+        "trip_distance": np.round(rng.lognormal(0.4, 0.8, ROWS), 2),
+    })
+    trips.to_csv(folder / "yellow_tripdata.csv", index=False)
+    return folder, zones, trips
+
+
+def expected(zones, trips, year=None):
+    """The borough x month table computed in memory with a pandas groupby."""
+    boroughs = ZoneLookup(zones).bucket(trips["PULocationID"].astype("float64"))
+    in_nyc = ZoneLookup(zones).nyc_mask(trips["PULocationID"].astype("float64"))
+    pickup = pd.to_datetime(trips["tpep_pickup_datetime"])
+    frame = trips.assign(borough=boroughs, year_month=pickup.dt.strftime("%Y-%m"), year=pickup.dt.year)[in_nyc]
+    if year is not None:
+        frame = frame[frame["year"] == year]
+    grouped = frame.groupby(["borough", "year_month"]).agg(
+        trip_count=("fare_amount", "count"), total_fare=("fare_amount", "sum"),
+        total_distance=("trip_distance", "sum"))
+    return grouped.reset_index().sort_values(["borough", "year_month"]).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("year", [None, 2019])
+@pytest.mark.parametrize("chunk_rows", [1_000, 50_000])
+def test_matches_pandas_groupby(taxi, year, chunk_rows):
+    folder, zones, trips = taxi
+    result = aggregate_taxi_borough_month(folder, folder / "taxi_zone_lookup.csv", year=year, workers=1,
+                                          chunk_rows=chunk_rows, verbose=False)
+    want = expected(zones, trips, year)
+
+    assert result[["borough", "year_month"]].astype(str).equals(want[["borough", "year_month"]].astype(str))
+    assert result["trip_count"].tolist() == want["trip_count"].tolist()
+    np.testing.assert_allclose(result["total_distance"], want["total_distance"], rtol=1e-6)
+    # Fares are read as float64, so the cents add up exactly as in memory
+    np.testing.assert_allclose(result["total_fare"], want["total_fare"], rtol=1e-12)
+
+
+def test_rows_read_counts_every_trip(taxi):
+    folder, _, trips = taxi
+    result = aggregate_taxi_borough_month(folder, folder / "taxi_zone_lookup.csv", year=2019, workers=1,
+                                          verbose=False)
+    assert result.attrs["rows_read"] == len(trips)
+    assert result["trip_count"].sum() < len(trips)
+
+
+def one_group(chunk):
+    return chunk.assign(key=0)
+
+
+def test_csv_units_cover_every_row(taxi):
+    folder, _, trips = taxi
+    result = aggregate(folder / "yellow_tripdata.csv", one_group, ["key"],
+                       {"rows": ("fare_amount", "count")}, workers=2, chunk_rows=777, verbose=False)
+    assert result["rows"].tolist() == [len(trips)]
+    assert result.attrs["rows_read"] == len(trips)
+
+
+def test_other_pickup_layouts_are_parsed_and_bad_ones_counted(tmp_path):
+    zones = _synthetic_zones()
+    zones.to_csv(tmp_path / "taxi_zone_lookup.csv", index=False)
+    manhattan = int(zones.loc[zones["Borough"] == "Manhattan", "LocationID"].iloc[0])
+    pickups = ["2019-01-05 10:00:00", "2019-01-05T11:00:00", "2019-02-01 09:30:00.250", "2019-02-01T09:30:00Z",
+               "02/03/2019 08:00", "not a date", ""]
+    pd.DataFrame({"tpep_pickup_datetime": pickups, "PULocationID": manhattan, "fare_amount": 10.0,
+                  "trip_distance": 1.0}).to_csv(tmp_path / "yellow_tripdata.csv", index=False)
+
+    result = aggregate_taxi_borough_month(tmp_path, tmp_path / "taxi_zone_lookup.csv", workers=1, verbose=False)
+    assert result["year_month"].tolist() == ["2019-01", "2019-02"]
+    assert result["trip_count"].tolist() == [2, 3]
+    assert result.attrs["rows_read"] == len(pickups)
+    assert result.attrs["rows_skipped"] == 1                   # the empty pickup is missing, not unreadable
+
+
+def test_plan_chunks_drops_workers_then_refuses_a_budget_it_cant_meet():
+    workers, chunk_rows = plan_chunks(row_bytes=100, memory_limit_mb=10, workers=8)
+    assert workers * chunk_rows * 100 * PARSE_OVERHEAD <= 10 * 1024 * 1024
+    assert chunk_rows >= MIN_CHUNK_ROWS
+    with pytest.raises(ValueError, match="memory limit"):
+        plan_chunks(row_bytes=100, memory_limit_mb=1, workers=8)
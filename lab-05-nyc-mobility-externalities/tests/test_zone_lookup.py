@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.zone_lookup import UNKNOWN, ZoneLookup, _synthetic_zones
+
+
+@pytest.fixture(scope="module")
+def zones():
+    return _synthetic_zones()
+
+
+@pytest.fixture(scope="module")
+def lookup(zones):
+    return ZoneLookup(zones)
+
+
+@pytest.mark.parametrize("ids", [[1, 300, -1], np.array([1, 300, -1]), np.array([1, 300, -1], dtype=np.intp),
+                                 pd.Series([1.0, 300.0, -1.0]), np.array([1, 300, -1], dtype=np.int16)])
+def test_out_of_range_ids_are_nan(lookup, zones, ids):
+    boroughs = lookup.bucket(ids)
+    assert boroughs[0] == zones.loc[0, "Borough"]
+    assert pd.isna(boroughs[1]) and pd.isna(boroughs[2])
+    assert not lookup.nyc_mask(ids)[1:].any()
+
+
+def test_missing_ids_are_nan(lookup):
+    assert pd.isna(lookup.bucket(pd.Series([np.nan, 2.0]))[0])
+
+
+def test_positions_are_reused_without_rechecking(lookup):
+    ids = np.array([5, 1000, 7])
+    positions = lookup.positions(ids)
+    assert lookup.bucket(positions, "Zone").tolist() == lookup.bucket(ids, "Zone").tolist()
+    assert (lookup.nyc_mask(positions) == lookup.nyc_mask(ids)).all()
+
+
+def test_bucket_matches_merge(zones, lookup):
+    rng = np.random.default_rng(0)
+    trips = pd.DataFrame({"PULocationID": rng.integers(0, len(zones) + 5, 10_000)})
+    merged = trips.merge(zones[["LocationID", "Borough"]], left_on="PULocationID", right_on="LocationID",
+                         how="left")["Borough"]
+    expected = merged.fillna(UNKNOWN).replace({"N/A": UNKNOWN}).to_numpy()
+    taken = np.asarray(lookup.bucket(trips["PULocationID"].to_numpy()).astype(object))
+    taken = np.where(pd.isna(taken), UNKNOWN, taken)
+    assert (taken == expected).all()
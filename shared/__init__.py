@@ -0,0 +1 @@
+"""Code shared by all labs (see shared/utilities/)."""
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from shared.utilities import csv_to_parquet
+from shared.utilities.csv_to_parquet import _Source, convert_source
+
+
+def convert(tmp_path, lines):
+    path = tmp_path / "requests.csv"
+    path.write_text("\n".join(lines) + "\n")
+    output = tmp_path / "parquet" / "requests"
+    status, skipped = convert_source(_Source(path), output, force=True)
+    assert status == "converted"
+    return output
+
+
+def test_unspecified_is_data_not_null(tmp_path):
+    output = convert(tmp_path, ["Created Date,Borough",
+                                "01/02/2019 12:00:00 AM,Unspecified",
+                                "01/03/2019 12:00:00 AM,QUEENS"])
+    assert sorted(pd.read_parquet(output)["Borough"]) == ["QUEENS", "Unspecified"]
+
+
+def test_rows_without_a_date_read_back(tmp_path):
+    output = convert(tmp_path, ["Created Date,Borough,n",
+                                "01/02/2019 12:00:00 AM,BRONX,1",
+                                ",QUEENS,2",
+                                "02/03/2019 01:00:00 PM,BROOKLYN,3"])
+    assert not list(output.glob("year=__HIVE_DEFAULT_PARTITION__"))
+    frame = pd.read_parquet(output).sort_values("n")
+    assert frame["year"].astype(int).tolist() == [2019, 0, 2019]
+    assert frame["month"].astype(int).tolist() == [1, 0, 2]
+
+
+def test_widening_reads_the_csv_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(csv_to_parquet, "SAMPLE_BYTES", 1 << 14)
+    monkeypatch.setattr(csv_to_parquet, "BLOCK_BYTES", 1 << 14)
+    opened = []
+    real_open = _Source.open
+    monkeypatch.setattr(_Source, "open", lambda self: opened.append(1) or real_open(self))
+
+    lines = ["Created Date,code"] + [f"01/{i % 28 + 1:02d}/2019 12:00:00 AM,{i}" for i in range(5000)]
+    output = convert(tmp_path, lines + ["02/01/2019 01:00:00 PM,12A"])
+
+    frame = pd.read_parquet(output)
+    assert len(frame) == 5001
+    assert pd.api.types.is_string_dtype(frame["code"])
+    assert set(frame["code"]) == {str(i) for i in range(5000)} | {"12A"}
+    # Once to infer the schema, once to convert: widening doesn't restart the read
+    assert len(opened) == 2
+
+
+@pytest.mark.parametrize("value", ["3.5", "not a number"])
+def test_integer_column_widens_without_losing_values(tmp_path, value):
+    output = convert(tmp_path, ["id,value", "1,1", "2,2", f"3,{value}"])
+    frame = pd.read_parquet(output).sort_values("id")
+    assert frame["value"].astype(str).tolist()[-1] == value
@@ -0,0 +1,226 @@
+import csv
+import hashlib
+import json
+import os
+import stat
+from pathlib import Path
+
+import pytest
+
+from shared.utilities import download_datasets
+from shared.utilities.download_datasets import (
+    describe_files,
+    download_labs_parallel,
+    fetch_into_cache,
+    find_stale_files,
+    link_from_cache,
+    load_cache_index,
+    load_dataset_manifest,
+    profile_csv,
+    prune_cache,
+    scan_file,
+    verify_lab,
+)
+
+REF = "owner/shared-data"
+
+
+@pytest.fixture
+def kaggle(monkeypatch):
+    """Fake `kaggle datasets download`: writes one CSV whose content changes per call (-f: the first one)."""
+    calls = []
+
+    def run(cmd, **kwargs):
+        calls.append(cmd)
+        target = Path(cmd[cmd.index("-p") + 1])
+        if "-f" in cmd:                                         # one file, as first published
+            (target / cmd[cmd.index("-f") + 1]).write_text("a,b\n1,2\n")
+        else:
+            (target / "data.csv").write_text(f"a,b\n{len(calls)},2\n")
+
+    monkeypatch.setattr(download_datasets.subprocess, "run", run)
+    monkeypatch.setattr(download_datasets, "_refreshed_refs", set())
+    return calls
+
+
+@pytest.fixture
+def labs(tmp_path, monkeypatch):
+    """Two labs in tmp_path sharing REF, the second with one more dataset."""
+    datasets = {
+        1: {"name": "lab-a", "datasets": [{"kaggle_ref": REF, "target_dir": "data/raw/shared", "description": "A"}]},
+        2: {"name": "lab-b", "datasets": [{"kaggle_ref": REF, "target_dir": "data/raw/shared", "description": "B"},
+                                          {"kaggle_ref": "owner/own", "target_dir": "data/raw/own",
+                                           "description": "C"}]},
+    }
+    monkeypatch.setattr(download_datasets, "BASE_DIR", tmp_path)
+    monkeypatch.setattr(download_datasets, "DATASETS", datasets)
+    for config in datasets.values():
+        (tmp_path / config["name"]).mkdir()
+    return tmp_path
+
+
+def test_force_refreshes_a_shared_ref_once_per_run(tmp_path, kaggle):
+    fetch_into_cache(REF, tmp_path)
+    assert fetch_into_cache(REF, tmp_path, refresh=True)[1] is False
+    assert len(kaggle) == 1
+
+    download_datasets._refreshed_refs.clear()                  # a later run
+
+    # Two labs share the ref and both ask for a refresh
+    first, downloaded = fetch_into_cache(REF, tmp_path, refresh=True)
+    assert downloaded
+    second, downloaded = fetch_into_cache(REF, tmp_path, refresh=True)
+    assert not downloaded
+    assert len(kaggle) == 2
+    assert first == second
+
+
+def test_prune_removes_only_orphaned_objects(tmp_path, kaggle, monkeypatch):
+    lab = tmp_path / "lab-x"
+    monkeypatch.setattr(download_datasets, "BASE_DIR", tmp_path)
+    monkeypatch.setattr(download_datasets, "DATASETS", {1: {"name": "lab-x", "datasets": []}})
+    cache = tmp_path / "cache"
+
+    old = fetch_into_cache(REF, cache)[0]["files"]["data.csv"]["sha256"]
+    pinned = fetch_into_cache("owner/other", cache)[0]["files"]["data.csv"]["sha256"]
+    download_datasets._refreshed_refs.clear()                  # a later run
+    fetch_into_cache(REF, cache, refresh=True)
+    fetch_into_cache("owner/other", cache, refresh=True)
+    # A lab manifest still names the old copy of owner/other, e.g. through a symlink
+    manifest = lab / "data" / "raw" / "dataset_manifest.json"
+    manifest.parent.mkdir(parents=True)
+    manifest.write_text(json.dumps({"datasets": [
+        {"directory": "other", "files": [{"name": "data.csv", "sha256": pinned}]}]}))
+
+    removed, freed = prune_cache(cache)
+    assert (removed, freed) == (1, len("a,b\n1,2\n"))
+    assert not download_datasets._object_path(cache, old).exists()
+    assert download_datasets._object_path(cache, pinned).exists()
+    assert load_cache_index(cache, REF) is not None
+    assert load_cache_index(cache, "owner/other") is not None
+
+
+def writable(path):
+    return bool(os.stat(path).st_mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+
+def test_links_share_a_read_only_object_and_relink_to_a_refresh(tmp_path, kaggle):
+    cache, lab = tmp_path / "cache", tmp_path / "lab"
+    index = fetch_into_cache(REF, cache)[0]
+    old = download_datasets._object_path(cache, index["files"]["data.csv"]["sha256"])
+    link_from_cache(cache, index, lab)
+    assert os.path.samefile(lab / "data.csv", old)
+    assert not writable(old)
+
+    link_from_cache(cache, index, lab)                         # already linked: nothing to do
+    assert os.path.samefile(lab / "data.csv", old)
+
+    download_datasets._refreshed_refs.clear()
+    index = fetch_into_cache(REF, cache, refresh=True)[0]
+    link_from_cache(cache, index, lab)
+    assert (lab / "data.csv").read_text() == "a,b\n2,2\n"
+    assert not os.path.samefile(lab / "data.csv", old)
+    assert old.read_text() == "a,b\n1,2\n"                   # the old object is untouched
+
+
+def test_copies_are_writable_and_edits_leave_the_object_alone(tmp_path, kaggle, monkeypatch):
+    def no_links(*args):
+        raise OSError("links not supported")
+
+    monkeypatch.setattr(download_datasets.os, "link", no_links)
+    monkeypatch.setattr(download_datasets.os, "symlink", no_links)
+    cache, lab = tmp_path / "cache", tmp_path / "lab"
+    index = fetch_into_cache(REF, cache)[0]
+    obj = download_datasets._object_path(cache, index["files"]["data.csv"]["sha256"])
+    link_from_cache(cache, index, lab)
+
+    assert not os.path.samefile(lab / "data.csv", obj)
+    assert writable(lab / "data.csv")
+    (lab / "data.csv").write_text("edited\n")
+    assert obj.read_text() == "a,b\n1,2\n"
+    assert load_cache_index(cache, REF) is not None
+
+
+def test_parallel_run_downloads_each_ref_once_and_rerun_is_current(labs, kaggle, capsys):
+    cache = labs / "cache"
+    assert download_labs_parallel([1, 2], jobs=3, cache_dir=cache)
+    assert sorted(cmd[cmd.index("-d") + 1] for cmd in kaggle) == ["owner/own", REF]
+    for lab, directory in [("lab-a", "shared"), ("lab-b", "shared"), ("lab-b", "own")]:
+        assert (labs / lab / "data" / "raw" / directory / "data.csv").is_file()
+    assert [d["directory"] for d in load_dataset_manifest(labs / "lab-b")["datasets"]] == ["own", "shared"]
+
+    capsys.readouterr()
+    download_datasets._refreshed_refs.clear()                  # a later run: everything matches the manifests
+    assert download_labs_parallel([1, 2], jobs=3, cache_dir=cache)
+    assert len(kaggle) == 2
+    assert "Lab 2 Summary: 2/2 datasets ready (2 current)" in capsys.readouterr().out
+
+
+def test_damaged_lab_files_are_found_and_repaired(labs, kaggle):
+    cache = labs / "cache"
+    download_labs_parallel([1], jobs=1, cache_dir=cache)
+    target = labs / "lab-a" / "data" / "raw" / "shared"
+    recorded = load_dataset_manifest(labs / "lab-a")["datasets"][0]["files"]
+    assert find_stale_files(target, recorded) == []
+
+    # Same size, different content: found by the mtime check and a rehash
+    (target / "data.csv").unlink()
+    (target / "data.csv").write_text("a,b\n9,2\n")
+    assert find_stale_files(target, recorded) == ["data.csv"]
+    assert not verify_lab(1)
+
+    # The cache object is intact, so the repair relinks without Kaggle
+    download_labs_parallel([1], jobs=1, cache_dir=cache)
+    assert len(kaggle) == 1
+    assert verify_lab(1)
+
+    # With the object damaged too, only that one file is fetched again
+    obj = download_datasets._object_path(cache, recorded[0]["sha256"])
+    (target / "data.csv").unlink()
+    os.chmod(obj, 0o644)
+    obj.write_text("a,b\n0,0\n")
+    download_labs_parallel([1], jobs=1, cache_dir=cache)
+    assert "-f" in kaggle[-1] and len(kaggle) == 2
+    assert verify_lab(1)
+
+
+@pytest.mark.parametrize("block", [7, 64, 1 << 20])
+def test_scan_file_counts_records_like_the_csv_module(tmp_path, monkeypatch, block):
+    monkeypatch.setattr(download_datasets, "SCAN_BLOCK_BYTES", block)
+    path = tmp_path / "quoted.csv"
+    rows = [["id", "note"]] + [[str(i), 'a "quoted"\nmulti-line\nnote' if i % 3 else "plain"] for i in range(50)]
+    with open(path, "w", newline="") as f:
+        csv.writer(f).writerows(rows)
+
+    sha256, records = scan_file(path, want_rows=True)
+    assert sha256 == hashlib.sha256(path.read_bytes()).hexdigest()
+    with open(path, newline="") as f:
+        assert records == sum(1 for _ in csv.reader(f)) == 51
+
+    path.write_bytes(path.read_bytes().rstrip(b"\r\n"))     # no newline after the last record
+    assert scan_file(path, want_hash=False, want_rows=True) == (None, 51)
+
+
+def test_profile_csv_infers_dtypes_from_a_sample(tmp_path):
+    path = tmp_path / "sample.csv"
+    path.write_text("id,score,flag,created,name,gap\n"
+                    "1,2.5,true,01/02/2019 10:00:00 AM,alice,3\n"
+                    "2,3,false,2019-01-03,bob,\n")
+    columns, row_bytes = profile_csv(path)
+    assert [c["dtype"] for c in columns] == ["int64", "float64", "bool", "datetime64[ns]", "object", "float64"]
+    assert row_bytes > 5 * 8
+
+
+def test_describe_files_reuses_hashes_of_unchanged_files(tmp_path, monkeypatch):
+    (tmp_path / "a.csv").write_text("x\n1\n2\n")
+    (tmp_path / ".hidden").write_text("skipped")
+    first = describe_files(tmp_path)
+    assert [(e["name"], e["rows"]) for e in first] == [("a.csv", 2)]
+
+    scanned = []
+    real_scan = download_datasets.scan_file
+    monkeypatch.setattr(download_datasets, "scan_file", lambda *a, **k: scanned.append(a) or real_scan(*a, **k))
+    assert describe_files(tmp_path, previous_files=first) == first
+    assert scanned == []
+    assert describe_files(tmp_path, previous_files=first, full=True) == first
+    assert len(scanned) == 1
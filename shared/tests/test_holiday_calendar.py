@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from shared.utilities.holiday_calendar import HolidayCalendar, read_holidays
+
+
+def random_holidays(seed=0):
+    """~15 holidays a year per country over 2015-2017, some sharing a date."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for code, name in [("PT", "Portugal"), ("US", "United States")]:
+        dates = pd.Timestamp("2015-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 3 * 365, 45)), unit="D")
+        frames.append(pd.DataFrame({"country": code, "country_name": name, "date": dates,
+                                    "name": [f"{code} day {i}" for i in range(len(dates))]}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def brute_force(holidays, dates, countries, nights):
+    """Scan the country's holiday dates for every row (holidays sharing a date count once)."""
+    rows = []
+    for date, country, stay in zip(dates, countries, nights, strict=True):
+        days = holidays.loc[(holidays["country"] == country) | (holidays["country_name"] == country), "date"]
+        days = pd.Series(days.unique())
+        if pd.isna(date) or days.empty:
+            rows.append((False, pd.NA, pd.NA, pd.NA))
+            continue
+        after = (days - date).dt.days[days >= date]
+        before = (date - days).dt.days[days <= date]
+        to_next = after.min() if len(after) else pd.NA
+        since_prev = before.min() if len(before) else pd.NA
+        in_stay = pd.NA if pd.isna(stay) else int(((days >= date) & (days < date + pd.Timedelta(days=stay))).sum())
+        rows.append((bool((days == date).any()), to_next, since_prev, in_stay))
+    return pd.DataFrame(rows, columns=["is_holiday", "days_to_next", "days_since_prev", "holidays_in_stay"])
+
+
+def test_matches_a_brute_force_scan():
+    holidays = random_holidays()
+    calendar = HolidayCalendar(holidays)
+    rng = np.random.default_rng(1)
+    n = 800
+    dates = pd.Series(pd.Timestamp("2014-10-01") + pd.to_timedelta(rng.integers(0, 4 * 365, n), unit="D"))
+    dates[rng.random(n) < 0.02] = pd.NaT
+    countries = rng.choice(["PT", "US", "Portugal", "XX"], n)
+    nights = pd.Series(rng.integers(0, 30, n).astype(float))
+    nights[rng.random(n) < 0.02] = np.nan
+
+    result = calendar.annotate(dates, countries, nights=nights)
+    expected = brute_force(holidays, dates, countries, nights)
+    assert result["is_holiday"].tolist() == expected["is_holiday"].tolist()
+    for column in ["days_to_next", "days_since_prev", "holidays_in_stay"]:
+        assert result[column].astype(object).where(result[column].notna(), None).tolist() == \
+            expected[column].astype(object).where(expected[column].notna(), None).tolist(), column
+
+    # The signed distance picks the nearer side, the upcoming one on ties
+    nearest = np.where(expected["days_to_next"].fillna(10**6) <= expected["days_since_prev"].fillna(10**6),
+                       expected["days_to_next"].fillna(0), -expected["days_since_prev"].fillna(0))
+    known = result["days_to_holiday"].notna()
+    assert (known == (dates.notna() & (countries != "XX"))).all()
+    assert (result.loc[known, "days_to_holiday"].to_numpy() == nearest[known]).all()
+
+
+def test_shared_dates_and_names():
+    holidays = pd.DataFrame({"country": "GB", "country_name": "United Kingdom",
+                             "date": pd.to_datetime(["2016-12-25", "2016-12-25", "2016-12-25", "2017-01-01"]),
+                             "name": ["Christmas Day", "Christmas Day", "Boxing Day", "New Year's Day"]})
+    calendar = HolidayCalendar(holidays)
+    result = calendar.annotate(["2016-12-25", "2016-12-26", "2016-12-30"], "United Kingdom", nights=[10, 1, 1])
+    assert result["holiday_name"].iloc[0] == "Christmas Day / Boxing Day"
+    assert result["holiday_name"].iloc[1:].isna().all()
+    assert result["holidays_in_stay"].tolist() == [2, 0, 0]
+    assert result["days_to_holiday"].tolist() == [0, -1, 2]
+    daily = calendar.daily("GB")
+    assert len(daily) == 8 and daily["is_holiday"].sum() == 2
+    with pytest.raises(KeyError, match="No holidays"):
+        calendar.annotate(["2016-12-25"], "FR")
+
+
+def test_reads_the_kaggle_layout(tmp_path):
+    path = tmp_path / "holidays.csv"
+    pd.DataFrame({"countryOrRegion": ["Portugal", "Portugal", "Norway"], "countryRegionCode": ["PT", "PT", None],
+                  "date": ["2016-06-10", "2016-12-25 00:00:00", "2016-05-17"],
+                  "holidayName": ["Dia de Portugal", "Natal", "Grunnlovsdag"],
+                  "normalizeHolidayName": ["Portugal Day", "Christmas", "Constitution Day"]}).to_csv(path, index=False)
+    holidays = read_holidays(path)
+    assert holidays["country"].tolist() == ["PT", "PT", "Norway"]
+    assert holidays["name"].tolist() == ["Portugal Day", "Christmas", "Constitution Day"]
+    calendar = HolidayCalendar.from_csv(path, countries=["PT"], start="2016-07-01")
+    assert calendar.countries == ["PT"]
+    assert calendar.annotate(["2016-12-25"], "Portugal")["holiday_name"].tolist() == ["Christmas"]
@@ -0,0 +1,115 @@
+import csv
+import gzip
+import io
+import os
+import tarfile
+
+import pandas as pd
+import pytest
+
+from shared.utilities import noaa_gsod
+from shared.utilities.noaa_gsod import build_file_index, read_gsod, select_files, write_extract
+
+OP_HEADER = "STN--- WBAN   YEARMODA    TEMP       DEWP      SLP        STP       VISIB      WDSP     MXSPD   GUST" \
+            "    MAX     MIN   PRCP   SNDP   FRSHTT\n"
+
+
+def op_file(station, days):
+    """Legacy .op text; days are (YYYYMMDD, TEMP, MAX, PRCP, SNDP, FRSHTT) in GSOD units."""
+    usaf, wban = station.split("-")
+    lines = [f"{usaf} {wban}  {day}  {temp:>6} 24  20.0 24  1010.0 24  1000.0 24    6.2 24    5.0 24   10.0  999.9"
+             f"  {tmax:>6}  23.0  {prcp:>5} {sndp:>5}  {frshtt}\n" for day, temp, tmax, prcp, sndp, frshtt in days]
+    return (OP_HEADER + "".join(lines)).encode()
+
+
+def csv_file(station, days):
+    """New-style per-station CSV (quoted, with attribute columns) for the same day tuples."""
+    out = io.StringIO()
+    writer = csv.writer(out, quoting=csv.QUOTE_ALL)
+    writer.writerow(["STATION", "DATE", "TEMP", "TEMP_ATTRIBUTES", "DEWP", "VISIB", "WDSP", "MAX", "MIN", "PRCP",
+                     "SNDP", "FRSHTT"])
+    for day, temp, tmax, prcp, sndp, frshtt in days:
+        writer.writerow([station.replace("-", ""), f"{day[:4]}-{day[4:6]}-{day[6:]}", temp, "24", "20.0", "6.2",
+                         "5.0", tmax, "23.0", prcp, sndp, frshtt])
+    return out.getvalue().encode()
+
+
+def add_member(archive, name, data):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    archive.addfile(info, io.BytesIO(data))
+
+
+@pytest.fixture
+def weather_dir(tmp_path):
+    pd.DataFrame({
+        "USAF": ["725030", "722950", "085360"], "WBAN": ["14732", "23174", "99999"],
+        "STATION NAME": ["LA GUARDIA", "LOS ANGELES", "LISBOA"], "CTRY": ["US", "US", "PO"],
+        "STATE": ["NY", "CA", None], "LAT": [40.78, 33.94, 38.77], "LON": [-73.88, -118.41, -9.13],
+        "ELEV(M)": [3.4, 29.6, 114.0], "BEGIN": ["19730101"] * 3, "END": ["20231231"] * 3,
+    }).to_csv(tmp_path / "isd-history.csv", index=False)
+
+    with tarfile.open(tmp_path / "gsod_2016.tar", "w") as archive:
+        add_member(archive, "./725030-14732-2016.op.gz", gzip.compress(op_file("725030-14732", [
+            ("20161230", "32.0", "41.0*", "0.10G", "999.9", "010000"),
+            ("20161231", "9999.9", "50.0", "99.99", "2.0", "001000"),
+        ])))
+        add_member(archive, "./085360-99999-2016.op.gz", gzip.compress(op_file("085360-99999", [
+            ("20161231", "59.0", "68.0", "0.00", "999.9", "000000"),
+        ])))
+    (tmp_path / "2017").mkdir()
+    (tmp_path / "2017" / "72295023174.csv").write_bytes(csv_file("722950-23174", [
+        ("20170101", "68.0", "77.0", "0.01", "999.9", "100010"),
+        ("20170201", "86.0", "95.0", "0.00", "999.9", "000000"),
+    ]))
+    return tmp_path
+
+
+def test_reads_both_formats_with_units_and_events(weather_dir):
+    weather = read_gsod(weather_dir, country="US", start="2016-12-30", end="2017-01-31")
+    assert weather["station"].astype(str).tolist() == ["722950-23174", "725030-14732", "725030-14732"]
+    assert weather["date"].dt.strftime("%Y-%m-%d").tolist() == ["2017-01-01", "2016-12-30", "2016-12-31"]
+
+    la, first, second = (weather.iloc[i] for i in range(3))
+    assert (first["temp_mean"], first["temp_max"], first["precipitation"]) == (0, 50, 25)   # tenths of °C / mm
+    assert pd.isna(second["temp_mean"]) and pd.isna(second["precipitation"]) and second["snow_depth"] == 51
+    assert pd.isna(first["snow_depth"])
+    assert (la["temp_mean"], la["temp_max"]) == (200, 250)
+    assert first["rain"] and not first["fog"] and second["snow"]
+    assert la["fog"] and la["thunder"] and not (la["rain"] or la["tornado"])
+    assert str(weather["temp_mean"].dtype) == "Int16"
+
+
+def test_filters_pick_stations_and_years_before_reading(weather_dir):
+    assert select_files(weather_dir, country="PO")["station"].tolist() == ["085360-99999"]
+    assert select_files(weather_dir, bbox=(30, -125, 35, -110))["station"].tolist() == ["722950-23174"]
+    assert select_files(weather_dir, stations=["725030-14732"], start="2017-01-01").empty
+    assert len(read_gsod(weather_dir, country="PO", bbox=(36.9, -9.6, 42.2, -6.2))) == 1
+    assert len(read_gsod(weather_dir, stations=["nope"])) == 0
+
+
+def test_tar_index_is_cached_until_the_archive_changes(weather_dir, monkeypatch):
+    first = build_file_index(weather_dir)
+    assert sorted(first["member"].dropna()) == ["./085360-99999-2016.op.gz", "./725030-14732-2016.op.gz"]
+
+    scanned = []
+    real_scan = noaa_gsod._scan_tar
+    monkeypatch.setattr(noaa_gsod, "_scan_tar", lambda path: scanned.append(path) or real_scan(path))
+    pd.testing.assert_frame_equal(build_file_index(weather_dir), first)
+    assert scanned == []
+
+    tar = weather_dir / "gsod_2016.tar"
+    os.utime(tar, ns=(tar.stat().st_atime_ns, tar.stat().st_mtime_ns + 10**9))
+    build_file_index(weather_dir)
+    assert scanned == [tar]
+
+
+def test_extract_matches_read_gsod(weather_dir, tmp_path):
+    output = tmp_path / "out" / "noaa_us.parquet"
+    assert write_extract(weather_dir, output, country="US") == 4
+    extract = pd.read_parquet(output).sort_values(["station", "date"], ignore_index=True)
+    expected = read_gsod(weather_dir, country="US")
+    pd.testing.assert_frame_equal(extract.astype({"station": str}), expected.astype({"station": str}),
+                                  check_dtype=False)
+    assert write_extract(weather_dir, output, stations=["nope"]) == 0
+    assert pd.read_parquet(output).empty
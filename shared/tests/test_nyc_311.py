@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from shared.utilities import nyc_311
+from shared.utilities.nyc_311 import (
+    ANY,
+    BOROUGHS,
+    NUISANCE_TAXONOMY,
+    Taxonomy,
+    count_311,
+    read_taxonomy,
+    scan_311,
+    taxonomy_table,
+)
+from shared.utilities.stage_cache import StageCache
+
+TYPES = ["Noise - Vehicle", "NOISE - VEHICLE ", "Noise - Street/Sidewalk", "Illegal Parking", "Blocked Driveway",
+         "Street Condition", "Noise - Residential", "HEAT/HOT WATER", None]
+DESCRIPTORS = ["Engine Idling", "Car/Truck Horn", "Loud Music/Party", "Posted Parking Sign Violation", None]
+BOROUGH_LABELS = ["MANHATTAN", "BROOKLYN", "QUEENS", "BRONX", "STATEN ISLAND", "Unspecified", None]
+
+
+@pytest.fixture(scope="module")
+def requests():
+    rng = np.random.default_rng(0)
+    n = 5_000
+    created = pd.Timestamp("2018-11-01") + pd.to_timedelta(rng.integers(0, 500 * 86_400, n), unit="s")
+    dates = pd.Series(created.strftime("%m/%d/%Y %I:%M:%S %p"))
+    iso = rng.random(n) < 0.05
+    dates[iso] = created[iso].strftime("%Y-%m-%dT%H:%M:%S")
+    dates[rng.random(n) < 0.01] = None
+    return pd.DataFrame({
+        "Unique Key": np.arange(n),
+        "Created Date": dates,
+        "Complaint Type": rng.choice(np.array(TYPES, dtype=object), n),
+        "Descriptor": rng.choice(np.array(DESCRIPTORS, dtype=object), n),
+        "Borough": rng.choice(np.array(BOROUGH_LABELS, dtype=object), n),
+    })
+
+
+@pytest.fixture(scope="module")
+def csv_path(requests, tmp_path_factory):
+    path = tmp_path_factory.mktemp("311") / "311_requests.csv"
+    requests.to_csv(path, index=False)
+    return path
+
+
+def categorize(requests, taxonomy):
+    """Category per row with plain pandas: pair rules first, then type rules, then other."""
+    def norm(values):
+        return values.fillna("").str.split().str.join(" ").str.lower()
+
+    rules = taxonomy_table(taxonomy.rules).assign(complaint_type=lambda t: norm(t["complaint_type"]),
+                                                  descriptor=lambda t: norm(t["descriptor"]))
+    frame = pd.DataFrame({"complaint_type": norm(requests["Complaint Type"]),
+                          "descriptor": norm(requests["Descriptor"])})
+    by_pair = frame.merge(rules[rules["descriptor"] != ANY], how="left",
+                          on=["complaint_type", "descriptor"])["category"]
+    by_type = frame.merge(rules[rules["descriptor"] == ANY].drop(columns="descriptor"), how="left",
+                          on="complaint_type")["category"]
+    category = by_pair.fillna(by_type)
+    if taxonomy.other >= 0:
+        category = category.fillna(taxonomy.categories[taxonomy.other])
+    return category.to_numpy()
+
+
+def expected_counts(requests, taxonomy, year=None, freq="month"):
+    created = pd.to_datetime(requests["Created Date"], format="mixed")
+    frame = pd.DataFrame({
+        "borough": requests["Borough"].str.title(),
+        "period": created.dt.strftime("%Y-%m") if freq == "month" else created.dt.normalize(),
+        "category": categorize(requests, taxonomy),
+        "year": created.dt.year,
+    }).dropna()
+    frame = frame[frame["borough"].isin(BOROUGHS)]
+    if year is not None:
+        frame = frame[frame["year"] == year]
+    counts = frame.groupby(["borough", "period", "category"]).size()
+    return {(b, str(p)[:10], c): n for (b, p, c), n in counts.items()}
+
+
+def as_dict(counts, freq="month"):
+    period = counts["year_month"] if freq == "month" else counts["date"].dt.strftime("%Y-%m-%d")
+    return dict(zip(zip(counts["borough"].astype(str), period, counts["category"].astype(str), strict=True),
+                    counts["complaints"], strict=True))
+
+
+@pytest.mark.parametrize("year", [None, 2019])
+@pytest.mark.parametrize("freq", ["month", "day"])
+def test_csv_counts_match_a_pandas_groupby(requests, csv_path, year, freq):
+    taxonomy = Taxonomy()
+    counts = count_311(("csv", csv_path), taxonomy, year=year, freq=freq, block_bytes=64 * 1024)
+    assert as_dict(counts, freq) == expected_counts(requests, taxonomy, year, freq)
+    assert (counts["complaints"] > 0).all()
+
+
+def test_other_category_keeps_unmatched_rows(requests, csv_path):
+    taxonomy = Taxonomy(other="Other")
+    counts = count_311(("csv", csv_path), taxonomy, year=2019, block_bytes=256 * 1024)
+    assert as_dict(counts) == expected_counts(requests, taxonomy, 2019)
+    assert "Other" in set(counts["category"].astype(str))
+
+
+def test_parquet_input_matches_csv(requests, csv_path, tmp_path):
+    table = tmp_path / "311_requests"
+    created = pd.to_datetime(requests["Created Date"], format="mixed")
+    requests.assign(**{"Created Date": created, "year": created.dt.year.astype("Int64")}).to_parquet(
+        table, partition_cols=["year"])
+    parquet = count_311(("parquet", table), year=2019, freq="day")
+    pd.testing.assert_frame_equal(parquet, count_311(("csv", csv_path), year=2019, freq="day"))
+
+
+def test_scan_311_caches_the_counts(csv_path, tmp_path, monkeypatch):
+    cache = StageCache(tmp_path / "cache", csv_path.parent)
+    first = scan_311(csv_path.parent, year=2019, cache=cache)
+    monkeypatch.setattr(nyc_311, "_csv_batches", lambda *args: pytest.fail("read the CSV again"))
+    pd.testing.assert_frame_equal(scan_311(csv_path.parent, year=2019, cache=cache), first, check_dtype=False,
+                                  check_categorical=False)
+
+
+def test_taxonomy_csv_round_trip(tmp_path):
+    path = tmp_path / "taxonomy.csv"
+    taxonomy_table().to_csv(path, index=False)
+    assert read_taxonomy(path) == NUISANCE_TAXONOMY
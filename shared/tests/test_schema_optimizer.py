@@ -0,0 +1,83 @@
+import pandas as pd
+
+from shared.utilities.schema_optimizer import CompactSchema
+
+
+def stream(schema, *chunks):
+    return pd.concat([schema.apply(pd.DataFrame(chunk)) for chunk in chunks], ignore_index=True)
+
+
+def test_inferred_integers_are_nullable():
+    schema = CompactSchema.profile(pd.DataFrame({"n": [1, 2, 3]}))
+    assert schema.rules["n"]["dtype"] == "Int8"
+
+    frame = stream(schema, {"n": [1, 2]}, {"n": [3, None]})
+    assert frame["n"].dtype == "Int8"
+    assert frame["n"].isna().tolist() == [False, False, False, True]
+    assert not schema.unseen
+
+
+def test_integers_that_dont_fit_become_missing_and_are_counted():
+    schema = CompactSchema.profile(pd.DataFrame({"n": [1, 2, 3]}))
+    frame = stream(schema, {"n": [1, 2]}, {"n": [300, -70_000]}, {"n": [4.0, 2.5]}, {"n": ["5", "12A"]})
+    assert frame["n"].dtype == "Int8"
+    assert frame["n"].tolist() == [1, 2, pd.NA, pd.NA, 4, pd.NA, 5, pd.NA]
+    assert schema.unseen["n"] == 4
+
+
+def test_pinned_int_becomes_nullable():
+    schema = CompactSchema.profile(pd.DataFrame({"n": [1, 2]}), dtypes={"n": "int16"})
+    frame = stream(schema, {"n": [1.0, None]})
+    assert frame["n"].dtype == "Int16"
+    assert frame["n"].isna().tolist() == [False, True]
+
+
+def test_unseen_category_maps_to_other():
+    sample = pd.DataFrame({"borough": ["BRONX", "QUEENS"] * 10})
+    schema = CompactSchema.profile(sample)
+    assert list(schema.rules["borough"]["dtype"].categories) == ["BRONX", "QUEENS", "Other"]
+
+    frame = stream(schema, {"borough": ["BRONX"]}, {"borough": ["STATEN ISLAND", "QUEENS", None]})
+    assert frame["borough"].dtype == schema.rules["borough"]["dtype"]
+    assert frame["borough"].astype(object).tolist()[:3] == ["BRONX", "Other", "QUEENS"]
+    assert frame["borough"].isna().tolist() == [False, False, False, True]
+    assert schema.unseen["borough"] == 1
+
+
+def test_unseen_category_becomes_missing_without_other():
+    sample = pd.DataFrame({"borough": ["BRONX", "QUEENS"] * 10})
+    schema = CompactSchema.profile(sample, other=None)
+    frame = stream(schema, {"borough": ["STATEN ISLAND", "QUEENS"]})
+    assert frame["borough"].isna().tolist() == [True, False]
+    assert schema.unseen["borough"] == 1
+
+
+def test_unknown_flags_and_dates_become_missing():
+    sample = pd.DataFrame({"created": ["01/02/2019 12:00:00 AM", "01/03/2019 01:00:00 PM"], "closed": ["Y", "N"]})
+    schema = CompactSchema.profile(sample)
+    assert schema.rules["created"]["kind"] == "datetime"
+    assert schema.rules["closed"]["kind"] == "flag"
+
+    frame = schema.apply(pd.DataFrame({"created": ["01/04/2019 12:00:00 AM", "unknown"], "closed": ["y", "maybe"]}))
+    assert frame["created"].isna().tolist() == [False, True]
+    assert frame["closed"].tolist() == [True, pd.NA]
+    assert schema.unseen == {"created": 1, "closed": 1}
+
+
+def test_every_chunk_has_the_same_dtypes(tmp_path):
+    path = tmp_path / "requests.csv"
+    sample = pd.DataFrame({"borough": ["BRONX", "QUEENS"] * 5, "n": range(10), "closed": ["Y", "N"] * 5,
+                           "created": ["01/02/2019 12:00:00 AM"] * 10, "fare": [1.5] * 10})
+    # Later rows break every rule the sample implies
+    later = pd.DataFrame({"borough": ["STATEN ISLAND", None], "n": ["70000", None], "closed": ["?", None],
+                          "created": ["2019-13-45", None], "fare": ["free", None]})
+    pd.concat([sample, later], ignore_index=True).to_csv(path, index=False)
+
+    schema = CompactSchema.from_csv(path, sample_rows=10)
+    chunks = list(schema.read_csv(path, chunk_rows=3))
+    assert len(chunks) == 4
+    for chunk in chunks:
+        assert chunk.dtypes.equals(chunks[0].dtypes)
+    assert len(pd.concat(chunks)) == 12
+    assert pd.concat(chunks).dtypes.equals(chunks[0].dtypes)
+    assert set(schema.unseen) == {"borough", "n", "closed", "created", "fare"}
@@ -0,0 +1,46 @@
+import importlib
+import sys
+
+import pytest
+
+from shared.utilities.stage_cache import code_fingerprint
+
+STAGE = """
+def helper(x):
+    return x + {step}
+
+
+def stage(x):
+    return helper(x) * {scale}
+"""
+
+
+@pytest.fixture
+def stage_module(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    def load(step=1, scale=1):
+        (tmp_path / "cached_stage.py").write_text(STAGE.format(step=step, scale=scale))
+        sys.modules.pop("cached_stage", None)
+        importlib.invalidate_caches()
+        return importlib.import_module("cached_stage")
+
+    yield load
+    sys.modules.pop("cached_stage", None)
+
+
+def test_only_the_stage_function_is_hashed(stage_module):
+    before = code_fingerprint(stage_module().stage)
+    assert code_fingerprint(stage_module().stage) == before
+    assert code_fingerprint(stage_module(scale=2).stage) != before
+    assert code_fingerprint(stage_module(step=2).stage) == before        # an edit elsewhere in the module
+
+
+def test_helpers_hash_their_modules(stage_module):
+    module = stage_module()
+    before = code_fingerprint(module.stage, helpers=[module.helper])
+    assert before != code_fingerprint(module.stage)
+    edited = stage_module(step=2)
+    assert code_fingerprint(edited.stage, helpers=[edited.helper]) != before
+    assert code_fingerprint(module.stage, helpers=[pytest.approx]) != code_fingerprint(module.stage)
+    assert code_fingerprint(module.stage, version=2) != code_fingerprint(module.stage)
@@ -0,0 +1,36 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import UTC, datetime
+
+from shared.utilities.stage_metrics import StageLog
+
+
+def work(log, n):
+    with log.stage("work", rows_in=n) as record:
+        record.set(rows_out=n * 2)
+
+
+def test_each_log_gets_its_own_utc_run_id(tmp_path, monkeypatch):
+    monkeypatch.delenv("STAGE_RUN_ID", raising=False)
+    first, second = StageLog(tmp_path / "a.jsonl"), StageLog(tmp_path / "b.jsonl")
+    assert first.run_id != second.run_id
+    started = datetime.strptime(first.run_id.split("-")[0], "%Y%m%dT%H%M%S.%fZ").replace(tzinfo=UTC)
+    assert abs((datetime.now(UTC) - started).total_seconds()) < 60
+    assert StageLog(tmp_path / "c.jsonl", run_id="parent").run_id == "parent"
+
+
+def test_worker_processes_log_under_the_parent_run(tmp_path, monkeypatch):
+    monkeypatch.delenv("STAGE_RUN_ID", raising=False)
+    log = StageLog(tmp_path / "stage_metrics.jsonl")
+    with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context("spawn")) as pool:
+        list(pool.map(work, [log, log], [1, 2]))
+    work(StageLog(log.path), 3)                   # a later run
+
+    records = log.records()
+    assert len(records) == 6
+    assert {r["run_id"] for r in records[:4]} == {log.run_id}
+    assert records[-1]["run_id"] != log.run_id
+    latest = log.latest()
+    assert latest["stage"].tolist() == ["work"]
+    assert latest["rows_out"].tolist() == [6]
+    assert latest["status"].tolist() == ["ok"]
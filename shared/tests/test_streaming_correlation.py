@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from shared.utilities.streaming_correlation import (
+    CorrelationAccumulator,
+    CovarianceAccumulator,
+    SpearmanSketch,
+    correlate_chunks,
+)
+
+COLUMNS = ["x", "y", "z"]
+
+
+def frame(n=5_000, mean=0.0, scale=1.0, seed=0):
+    rng = np.random.default_rng(seed)
+    x = rng.normal(size=n)
+    return pd.DataFrame({"x": x, "y": 0.6 * x + rng.normal(size=n), "z": rng.exponential(size=n)}) * scale + mean
+
+
+def split(data, sizes):
+    bounds = np.cumsum([0, *sizes])
+    return [data.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:], strict=True)]
+
+
+@pytest.mark.parametrize("mean, scale", [(0.0, 1.0), (1e6, 1e-2), (1e9, 1e-3)])
+def test_chunked_updates_match_pandas(mean, scale):
+    data = frame(mean=mean, scale=scale)
+    acc = CorrelationAccumulator(COLUMNS)
+    for chunk in split(data, [1, 999, 3000, 1000]):
+        acc.update(chunk)
+
+    # pandas itself loses digits around a large mean; moved to zero (exactly) it doesn't
+    reference = data - data.iloc[0]
+    assert acc.n == len(data)
+    np.testing.assert_allclose(acc.mean, data.mean(), rtol=1e-12)
+    pd.testing.assert_frame_equal(acc.covariance(), reference.cov(), rtol=1e-9)
+    pd.testing.assert_frame_equal(acc.covariance(ddof=0), reference.cov(ddof=0), rtol=1e-9)
+    pd.testing.assert_frame_equal(acc.pearson(), reference.corr(), rtol=1e-9)
+
+
+def test_merging_uneven_partitions_matches_one_pass():
+    data = frame(mean=1e9, scale=1e-3, seed=1)
+    parts = [CovarianceAccumulator(COLUMNS)]                     # an empty partition
+    parts += [CovarianceAccumulator(COLUMNS).update(chunk) for chunk in split(data, [1, 7, 4_000, 992])]
+    total = CovarianceAccumulator.combine(parts[::-1])
+    one_pass = CovarianceAccumulator(COLUMNS).update(data)
+
+    assert total.n == one_pass.n == len(data)
+    np.testing.assert_allclose(total.mean, one_pass.mean, rtol=1e-15)
+    pd.testing.assert_frame_equal(total.covariance(), one_pass.covariance(), rtol=1e-9)
+    pd.testing.assert_frame_equal(total.covariance(), (data - data.iloc[0]).cov(), rtol=1e-9)
+
+
+def test_rows_with_gaps_are_dropped_listwise():
+    data = frame(n=200, seed=2)
+    data.iloc[::7, 1] = np.nan
+    acc = CorrelationAccumulator(COLUMNS).update(data)
+    pd.testing.assert_frame_equal(acc.pearson(), data.dropna().corr(), rtol=1e-9)
+
+
+def test_combine_needs_at_least_one_partition():
+    with pytest.raises(ValueError, match="at least one"):
+        CorrelationAccumulator.combine([])
+    with pytest.raises(ValueError, match="at least one"):
+        SpearmanSketch.combine([])
+
+
+def test_spearman_is_exact_below_k_and_merges():
+    data = frame(n=2_000, seed=3)
+    result = correlate_chunks(split(data, [500, 1_500]), COLUMNS, k=5_000)
+    pd.testing.assert_frame_equal(result["spearman"], data.corr(method="spearman"), rtol=1e-7)
+
+    sketches = [SpearmanSketch(COLUMNS, k=5_000, seed=seed).update(chunk)
+                for seed, chunk in enumerate(split(data, [700, 1_300]))]
+    merged = SpearmanSketch.combine(sketches)
+    assert merged.exact and merged.n == len(data)
+    pd.testing.assert_frame_equal(merged.spearman(), data.corr(method="spearman"), rtol=1e-7)
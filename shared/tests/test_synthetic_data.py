@@ -0,0 +1,82 @@
+import hashlib
+
+import pandas as pd
+import pytest
+
+from shared.utilities import synthetic_data
+from shared.utilities.noaa_gsod import read_gsod
+from shared.utilities.nyc_311 import count_311
+from shared.utilities.synthetic_data import DATASETS, generate, parse_rows
+
+ROWS = 2_500
+
+# The main row table of each dataset and its timestamp column
+ROW_TABLES = {
+    "311_requests": ("311_requests/311_Service_Requests", "Created Date"),
+    "nypd_crime": ("nypd_crime/NYPD_Complaint_Data_Historic", "CMPLNT_FR_DT"),
+    "taxi": ("taxi/yellow_tripdata", "tpep_pickup_datetime"),
+    "accidents": ("accidents/US_Accidents", "Start_Time"),
+    "hotel_bookings": ("hotel_bookings/hotel_bookings", None),
+}
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    """Several chunks per file, so chunk seeding and streaming are exercised."""
+    monkeypatch.setattr(synthetic_data, "CHUNK_ROWS", 1_000)
+
+
+def digests(paths):
+    return {path.name: hashlib.sha256(path.read_bytes()).hexdigest() for path in paths}
+
+
+@pytest.mark.parametrize("name", list(DATASETS))
+def test_same_seed_same_bytes(tmp_path, name):
+    first = generate(name, ROWS, tmp_path / "a", seed=3)
+    assert digests(first) == digests(generate(name, ROWS, tmp_path / "b", seed=3))
+    assert digests(first) != digests(generate(name, ROWS, tmp_path / "c", seed=4))
+    assert all(path.stat().st_size > 0 for path in first)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+@pytest.mark.parametrize("name", list(ROW_TABLES))
+def test_row_tables_have_the_requested_rows_and_period(tmp_path, name, fmt):
+    generate(name, ROWS, tmp_path, fmt=fmt, start="2019-03-01", end="2019-05-01")
+    stem, time_column = ROW_TABLES[name]
+    path = tmp_path / f"{stem}.{fmt}"
+    table = pd.read_parquet(path) if fmt == "parquet" else pd.read_csv(path, low_memory=False)
+    assert len(table) == ROWS
+    if time_column is not None:
+        times = pd.to_datetime(table[time_column], format="mixed", errors="coerce").dropna()
+        assert len(times) > 0.9 * ROWS
+        assert times.min() >= pd.Timestamp("2019-03-01") and times.max() < pd.Timestamp("2019-05-01")
+
+
+def test_outputs_load_with_the_lab_readers(tmp_path):
+    generate("311_requests", ROWS, tmp_path, start="2019-01-01", end="2020-01-01")
+    counts = count_311(("csv", tmp_path / "311_requests" / "311_Service_Requests.csv"), year=2019)
+    assert 0 < counts["complaints"].sum() < ROWS
+
+    generate("gsod", ROWS, tmp_path, start="2019-01-01", end="2020-01-01")
+    weather = read_gsod(tmp_path / "weather", start="2019-01-01", end="2019-12-31")
+    assert len(weather) >= ROWS and weather["date"].dt.year.eq(2019).all()
+    assert weather["temp_max"].notna().mean() > 0.8
+
+
+def test_planted_matches_point_at_real_titles(tmp_path):
+    paths = {path.name: path for path in generate("streaming", 800, tmp_path)}
+    planted = pd.read_csv(paths["planted_matches.csv"], dtype=str)
+    ids = {path.name.split("_titles")[0]: set(pd.read_csv(path, dtype=str)["show_id"])
+           for path in paths.values() if "_titles" in path.name}
+    platforms = {"netflix": "netflix", "amazon": "amazon_prime", "disney": "disney_plus"}
+    assert len(planted) > 0
+    for row in planted.itertuples():
+        assert row.left_id in ids[platforms[row.left_platform]]
+        assert row.right_id in ids[platforms[row.right_platform]]
+
+
+def test_parse_rows_and_unknown_datasets(tmp_path):
+    assert [parse_rows(t) for t in ["100K", "2.5M", "1B", "12_345", " 1,000 "]] == [
+        100_000, 2_500_000, 1_000_000_000, 12_345, 1_000]
+    with pytest.raises(ValueError, match="Unknown dataset"):
+        generate("weather", 10, tmp_path)
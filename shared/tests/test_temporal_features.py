@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from shared.utilities.temporal_features import (
+    FEATURES,
+    _synthetic_timestamps,
+    benchmark,
+    civil_from_days,
+    dates_from_parts,
+    days_from_civil,
+    epoch_seconds,
+    temporal_features,
+)
+
+
+@pytest.fixture(scope="module")
+def stamps():
+    rng = np.random.default_rng(0)
+    # 1600-2400 covers century and 400-year leap rules; every ISO week edge case falls in there
+    seconds = rng.integers(-11_676_096_000, 13_569_465_600, 20_000)
+    return pd.Series(pd.to_datetime(seconds, unit="s"))
+
+
+def test_matches_the_dt_accessors(stamps):
+    features = temporal_features(stamps.dt.strftime("%Y-%m-%d %H:%M:%S"), holidays=stamps.iloc[:50].dt.date)
+    dt = stamps.dt
+    iso = dt.isocalendar()
+    expected = {
+        "year": dt.year, "month": dt.month, "day": dt.day, "day_of_week": dt.dayofweek, "hour": dt.hour,
+        "minute": dt.minute, "quarter": dt.quarter, "day_of_year": dt.dayofyear, "week_of_year": iso["week"],
+        "day_name": dt.day_name(), "is_weekend": dt.dayofweek >= 5, "is_friday": dt.dayofweek == 4,
+        "month_sin": np.sin(2 * np.pi * dt.month / 12), "month_cos": np.cos(2 * np.pi * dt.month / 12),
+        "is_holiday": dt.normalize().isin(stamps.iloc[:50].dt.normalize()),
+    }
+    assert list(features.columns) == FEATURES
+    for name, want in expected.items():
+        if name.startswith("month_"):                            # stored as float32
+            np.testing.assert_allclose(features[name], want, atol=1e-6, err_msg=name)
+        else:
+            assert features[name].astype(object).tolist() == want.astype(object).tolist(), name
+
+
+def test_labels_match_the_apply_baseline():
+    results = benchmark(_synthetic_timestamps(5_000, seed=3))            # raises if any column differs
+    assert results["vectorized"][1] < results["apply"][1]
+
+
+def test_text_datetime_and_other_layouts_parse_alike(stamps):
+    text = stamps.dt.strftime("%Y-%m-%d %H:%M:%S")
+    assert (epoch_seconds(text) == epoch_seconds(stamps)).all()
+    assert (epoch_seconds(stamps.dt.tz_localize("UTC")) == epoch_seconds(stamps)).all()
+    odd = pd.Series(["07/04/2019 17:30", "2019-07-04T17:30:00.250", "2019-07-04", "", None, "not a date",
+                     "2019-13-01 00:00:00"])
+    seconds = epoch_seconds(odd)
+    assert seconds[0] == seconds[1] == epoch_seconds(pd.Series(["2019-07-04 17:30:00"]))[0]
+    assert seconds[2] == epoch_seconds(pd.Series([pd.Timestamp("2019-07-04")]))[0]
+    assert (seconds[3:] == np.iinfo(np.int64).min).all()
+
+
+def test_missing_timestamps_get_the_documented_fill_values():
+    features = temporal_features(pd.Series(["2019-07-04 08:00:00", None], index=[10, 20]))
+    assert features.index.tolist() == [10, 20]
+    missing = features.loc[20]
+    assert missing["year"] == -1 and missing["hour"] == -1
+    assert not missing["is_weekend"] and not missing["is_rush_hour"]
+    assert pd.isna(missing["season"]) and pd.isna(missing["month_sin"])
+    assert features.loc[10, "time_of_day"] == "Morning Rush" and features.loc[10, "tourism_season"] == "Peak"
+
+
+def test_civil_dates_round_trip():
+    days = np.arange(-200_000, 200_000, 7)
+    year, month, day = civil_from_days(days)
+    assert (days_from_civil(year, month, day) == days).all()
+    inside = np.abs(days) < 100_000                          # within the datetime64[ns] range
+    expected = pd.to_datetime(days[inside], unit="D")
+    assert (year[inside] == expected.year).all() and (month[inside] == expected.month).all()
+    assert (day[inside] == expected.day).all()
+
+
+def test_dates_from_parts_accepts_month_names():
+    seconds = dates_from_parts([2015, 2016, None], ["July", "feb", "March"], [1, 29, 3])
+    assert seconds[0] == epoch_seconds(pd.Series(["2015-07-01"]))[0]
+    assert seconds[1] == epoch_seconds(pd.Series(["2016-02-29"]))[0]
+    assert seconds[2] == np.iinfo(np.int64).min
+
+
+def test_unknown_features_are_rejected():
+    with pytest.raises(ValueError, match="Unknown features"):
+        temporal_features(pd.Series(["2019-01-01"]), features=["year", "fortnight"])
@@ -0,0 +1 @@
+"""Shared utilities: dataset download/conversion and pipeline helpers used by every lab."""
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite
+Time and peak memory of each lab's hot paths on synthetic data at several
+sizes, saved as JSON so runs from different commits can be compared.
+
+A lab declares its cases in src/benchmarks.py, in the same shape as the
+other registries here (name -> dict):
+
+    CASES = {
+        "zone_bucketing": {"setup": trip_ids, "run": bucket, "sizes": ["100K", "1M", "10M"]},
+    }
+
+setup(data, rows) builds the inputs and returns them; run(inputs) is the
+code being measured. Both run in a spawned process, so they must be
+module-level functions. data(name, rows, start=None, end=None) returns a raw
+folder holding that synthetic dataset (synthetic_data.py). It is generated
+once and kept under data/bench/synthetic/, keyed by generator version,
+size, period and seed.
+
+Each case and size is measured in a fresh process, so memory one case
+leaves behind never counts against the next:
+
+1. setup(data, rows)
+2. one warm-up run with the peak RSS reset beforehand: peak_mb is how far
+   RSS rose above where it started (stage_metrics.PeakMemory: Linux VmHWM,
+   elsewhere psutil sampled from a thread)
+3. --repeat timed runs: min/median/mean/stddev seconds, rows/s of the best
+
+Results go to data/bench/results/<lab>-<commit>.json. compare lists every
+case and size present in both files and flags those whose time or memory
+grew by more than --threshold. It also flags a worse scaling exponent
+(log time ratio / log rows ratio between consecutive sizes): a path that
+went from O(n) to O(n log n) or O(n^2) shows up there before it shows up
+in a single timing.
+
+Usage:
+    make bench                                      # every case at its default sizes
+    make bench SIZES="100K 1M 10M" ONLY=zone_bucketing
+    python -m src.benchmarks --repeat 5 --baseline data/bench/results/lab-05-nyc-mobility-externalities-abc1234.json
+
+    python benchmark_suite.py compare old.json new.json --threshold 0.2
+"""
+
+import argparse
+import contextlib
+import gc
+import itertools
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import UTC, datetime
+from functools import partial
+from multiprocessing import get_context
+from pathlib import Path
+
+DATA_DIR = Path("data/bench")
+REPEAT = 3
+
+# Below these, timings and memory deltas are mostly noise: no regression or scaling exponent is reported
+MIN_SECONDS = 0.05
+MIN_MB = 5.0
+
+# How much the scaling exponent may grow before it is flagged
+SCALING_SLACK = 0.15
+
+MB = 1024 * 1024
+
+
+def _synthetic():
+    try:
+        from shared.utilities import synthetic_data
+    except ImportError:
+        import synthetic_data
+    return synthetic_data
+
+
+def _peak_memory():
+    try:
+        from shared.utilities.stage_metrics import PeakMemory
+    except ImportError:
+        from stage_metrics import PeakMemory
+    return PeakMemory()
+
+
+# --- Synthetic inputs ------------------------------------------------------------
+
+def generator_version():
+    """Checksum of synthetic_data.py: cached inputs are regenerated when the generators change."""
+    return f"{zlib.crc32(Path(_synthetic().__file__).read_bytes()):08x}"
+
+
+def synthetic_dir(name, rows, start=None, end=None, seed=0, data_dir=DATA_DIR):
+    """A raw folder holding dataset name at rows rows, generated on first use."""
+    synthetic_data = _synthetic()
+    rows = synthetic_data.parse_rows(rows)
+    period = "-".join(str(p).replace("-", "") for p in (start, end) if p)
+    folder = Path(data_dir) / "synthetic" / generator_version() / f"{name}-{rows}-{period or 'default'}-seed{seed}"
+    done = folder / ".complete"
+    if not done.exists():
+        started = time.perf_counter()
+        synthetic_data.generate(name, rows, folder, seed=seed, start=start, end=end)
+        done.touch()
+        print(f"  · generated {name} ({rows:,} rows) in {time.perf_counter() - started:.1f}s -> {folder}")
+    return folder
+
+
+# --- Measuring -------------------------------------------------------------------
+
+def measure(case, rows, repeat=REPEAT, seed=0, data_dir=DATA_DIR):
+    """Set up and measure one case at one size (call in a fresh process, see run_case)."""
+    inputs = case["setup"](partial(synthetic_dir, seed=seed, data_dir=data_dir), rows)
+
+    gc.collect()
+    with _peak_memory() as memory:
+        started = time.perf_counter()
+        case["run"](inputs)
+        first = time.perf_counter() - started
+
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        case["run"](inputs)
+        times.append(time.perf_counter() - started)
+    times = times or [first]
+
+    return {
+        "rows": rows,
+        "first_s": first,
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "mean_s": statistics.fmean(times),
+        "stddev_s": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "rounds": len(times),
+        "rows_per_s": rows / min(times) if min(times) > 0 else None,
+        "peak_mb": round(memory.peak_mb or 0, 2),
+        "rss_mb": round((memory.peak_bytes or 0) / MB, 2),
+    }
+
+
+def run_case(case, rows, repeat=REPEAT, seed=0, data_dir=DATA_DIR):
+    """measure() in a new interpreter, so the process starts with no memory from earlier cases."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(measure, case, rows, repeat, seed, data_dir).result()
+
+
+def scaling(results):
+    """{case: {"<rows>-><rows>": exponent}} between consecutive sizes (1.0 = linear)."""
+    by_case = {}
+    for result in results:
+        by_case.setdefault(result["case"], []).append(result)
+    exponents = {}
+    for name, runs in by_case.items():
+        runs = sorted(runs, key=lambda r: r["rows"])
+        for small, large in itertools.pairwise(runs):
+            if small["rows"] < large["rows"] and small["min_s"] >= MIN_SECONDS:
+                exponent = math.log(large["min_s"] / small["min_s"]) / math.log(large["rows"] / small["rows"])
+                exponents.setdefault(name, {})[f"{small['rows']}->{large['rows']}"] = round(exponent, 3)
+    return exponents
+
+
+def git_commit():
+    """Short HEAD hash, with -dirty if tracked files are modified; "unknown" outside git."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+def machine():
+    versions = {}
+    for module in ("numpy", "pandas", "pyarrow"):
+        with contextlib.suppress(ImportError):
+            versions[module] = __import__(module).__version__
+    return {"python": platform.python_version(), "platform": platform.platform(), "processor": platform.machine(),
+            "cpus": os.cpu_count(), **versions}
+
+
+def _format_result(result):
+    rate = result["rows_per_s"] or 0
+    rate = f"{rate / 1e6:8.2f} M rows/s" if rate >= 1e6 else f"{rate / 1e3:8.1f} K rows/s"
+    return (f"  {result['case']:<24} {result['rows']:>12,} rows  {result['min_s']:9.3f}s  {rate}"
+            f"  peak {result['peak_mb']:8.1f} MB")
+
+
+def run_suite(cases, sizes=None, only=None, repeat=REPEAT, seed=0, data_dir=DATA_DIR):
+    """Measure every case (or only those named) at its sizes (or the given sizes); returns the report."""
+    parse_rows = _synthetic().parse_rows
+    unknown = set(only or []) - set(cases)
+    if unknown:
+        raise ValueError(f"Unknown benchmark(s) {', '.join(sorted(unknown))}. Cases: {', '.join(cases)}")
+
+    results = []
+    for name, case in cases.items():
+        if only and name not in only:
+            continue
+        for size in sizes or case["sizes"]:
+            result = {"case": name, **run_case(case, parse_rows(size), repeat, seed, data_dir)}
+            print(_format_result(result))
+            results.append(result)
+
+    return {
+        "lab": Path.cwd().name,
+        "commit": git_commit(),
+        "created": datetime.now(UTC).isoformat(timespec="seconds"),
+        "machine": machine(),
+        "seed": seed,
+        "repeat": repeat,
+        "results": results,
+        "scaling": scaling(results),
+    }
+
+
+# --- Comparing -------------------------------------------------------------------
+
+def compare(baseline, current, threshold=0.2):
+    """Rows comparing two reports case by case; "flags" lists what regressed."""
+    before = {(r["case"], r["rows"]): r for r in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        old = before.get((result["case"], result["rows"]))
+        if old is None:
+            continue
+        time_ratio = result["min_s"] / old["min_s"] if old["min_s"] > 0 else math.inf
+        memory_ratio = result["peak_mb"] / old["peak_mb"] if old["peak_mb"] > 0 else math.inf
+        flags = []
+        if time_ratio > 1 + threshold and result["min_s"] >= MIN_SECONDS:
+            flags.append("slower")
+        if result["peak_mb"] - old["peak_mb"] >= max(MIN_MB, threshold * old["peak_mb"]):
+            flags.append("more memory")
+        rows.append({"case": result["case"], "rows": result["rows"], "time_ratio": time_ratio,
+                     "memory_ratio": memory_ratio, "flags": flags})
+
+    old_scaling = baseline.get("scaling", {})
+    for name, steps in current.get("scaling", {}).items():
+        for step, exponent in steps.items():
+            old = old_scaling.get(name, {}).get(step)
+            if old is not None and exponent > old + SCALING_SLACK:
+                rows.append({"case": name, "rows": step, "scaling": (old, exponent), "flags": ["scales worse"]})
+    return rows
+
+
+def print_comparison(baseline, current, threshold=0.2):
+    """Print compare() as a table; returns the number of regressions."""
+    print(f"Comparing {current.get('commit')} against {baseline.get('commit')} (threshold {threshold:.0%})")
+    if baseline.get("machine") != current.get("machine"):
+        print("⚠️  The two runs come from different machines or library versions")
+    rows = compare(baseline, current, threshold)
+    for row in rows:
+        flags = f"  ⚠️  {', '.join(row['flags'])}" if row["flags"] else ""
+        if "scaling" in row:
+            old, new = row["scaling"]
+            print(f"  {row['case']:<24} {row['rows']:>21}  exponent {old:.2f} -> {new:.2f}{flags}")
+        else:
+            print(f"  {row['case']:<24} {row['rows']:>12,} rows  time {row['time_ratio']:6.2f}x  "
+                  f"memory {row['memory_ratio']:6.2f}x{flags}")
+    regressions = sum(bool(row["flags"]) for row in rows)
+    print(f"{'⚠️ ' if regressions else '✅'} {regressions} regression{'s' if regressions != 1 else ''}")
+    return regressions
+
+
+def _read_report(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def bench_main(cases, argv=None):
+    """Command line for a lab's src/benchmarks.py."""
+    parser = argparse.ArgumentParser(description="Time and measure peak memory of this lab's hot paths")
+    parser.add_argument("--sizes", nargs="+", help="Row counts for every case, e.g. 100K 1M 10M "
+                                                    "(default: each case's own sizes)")
+    parser.add_argument("--only", nargs="+", choices=list(cases), metavar="CASE",
+                        help=f"Cases to run: {', '.join(cases)}")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help=f"Timed runs after the warm-up (default: {REPEAT})")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR, help=f"Synthetic inputs and results "
+                                                                         f"(default: {DATA_DIR})")
+    parser.add_argument("--output", type=Path, help="Results JSON (default: <data-dir>/results/<lab>-<commit>.json)")
+    parser.add_argument("--baseline", type=Path, help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown flagged (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    print(f"⏱️  Benchmarking {Path.cwd().name} (best of {args.repeat} after a warm-up run)")
+    report = run_suite(cases, args.sizes, args.only, args.repeat, args.seed, args.data_dir)
+
+    output = args.output or args.data_dir / "results" / f"{report['lab']}-{report['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"📂 Results saved to {output}")
+
+    if args.baseline and print_comparison(_read_report(args.baseline), report, args.threshold):
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    compare_parser = subcommands.add_parser("compare", help="Flag regressions of new against old")
+    compare_parser.add_argument("old", type=Path)
+    compare_parser.add_argument("new", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown flagged "
+                                                                                "(default: 0.2)")
+    args = parser.parse_args()
+
+    if print_comparison(_read_report(args.old), _read_report(args.new), args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
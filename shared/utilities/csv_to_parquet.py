@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+CSV to Parquet Conversion
+Streams large CSV files (or CSV members of zip archives) into compressed,
+year/month-partitioned Parquet datasets so later exercises read columnar
+files instead of re-parsing multi-GB CSVs.
+
+Usage:
+    python csv_to_parquet.py data/raw/311_requests data/parquet/311_requests
+    python csv_to_parquet.py path/to/file.csv path/to/output_dir
+
+Output layout (one dataset per source CSV):
+    <output_dir>/<table>/year=2019/month=1/part-0-0.parquet
+    <output_dir>/<table>/year=0/month=0/...      rows without a usable date
+
+Read it back with:
+    pd.read_parquet("data/parquet/311_requests/311_Service_Requests")
+
+Requires pyarrow (pinned in every lab's pyproject.toml). The download
+script imports this module only when run with --parquet.
+"""
+
+import itertools
+import json
+import re
+import shutil
+import sys
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Column types are inferred from the first SAMPLE_BYTES of each file
+SAMPLE_BYTES = 16 * 1024 * 1024
+
+# Rows are streamed in blocks of this size; peak memory is a few blocks
+BLOCK_BYTES = 64 * 1024 * 1024
+
+COMPRESSION = "zstd"
+
+# Date formats found in the lab datasets (311 and NYPD use US-style dates)
+TIMESTAMP_PARSERS = [
+    pv.ISO8601,
+    "%m/%d/%Y %I:%M:%S %p",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y",
+]
+
+# Text layouts tried with strptime when a timestamp column isn't plain ISO 8601
+STRPTIME_FORMATS = [fmt for fmt in TIMESTAMP_PARSERS if isinstance(fmt, str)] + ["%Y-%m-%dT%H:%M:%S",
+                                                                                  "%Y-%m-%d %H:%M:%S", "%Y-%m-%d"]
+
+# Generic missing-value markers. Values such as 311's "Unspecified" borough are
+# data, left for the exercises to handle; pass null_values for dataset-specific markers.
+NULL_VALUES = ["", "NA", "N/A", "NaN", "nan", "NULL", "null"]
+
+# Partition columns taken from the date column. Rows with a missing or
+# unparseable date go to year=0/month=0, since null partition keys
+# (__HIVE_DEFAULT_PARTITION__) make pd.read_parquet fail on the table.
+PARTITION_COLUMNS = [("year", pa.int16()), ("month", pa.int8())]
+NO_DATE = 0
+
+# Name of the sidecar file that records which source a table was built from
+SOURCE_FILE = "_source.json"
+
+
+class _Source:
+    """A CSV file on disk, or a CSV member inside a zip archive."""
+
+    def __init__(self, path, member=None, root=None):
+        self.path = path
+        self.member = member
+        self.root = root if root is not None else path.parent
+
+    @property
+    def table_name(self):
+        """Relative path without extensions, e.g. "2019__010010-99999" for 2019/010010-99999.csv."""
+        parts = list(self.path.relative_to(self.root).parts)
+        if self.member:
+            parts = parts[:-1] + list(Path(self.member).parts)
+        name = parts[-1]
+        for suffix in (".gz", ".csv", ".zip"):
+            name = name.removesuffix(suffix)
+        return re.sub(r"[^\w.-]+", "_", "__".join(parts[:-1] + [name]))
+
+    def fingerprint(self):
+        stat = self.path.stat()
+        return {"source": str(self.path), "member": self.member,
+                "size_bytes": stat.st_size, "mtime": stat.st_mtime}
+
+    @contextmanager
+    def open(self):
+        if self.member is None:
+            with pa.input_stream(str(self.path)) as stream:
+                yield stream
+        else:
+            with zipfile.ZipFile(self.path) as zf, zf.open(self.member) as stream:
+                yield stream
+
+
+def find_csv_sources(dataset_path):
+    """Return every CSV under dataset_path, including CSV members of zip files."""
+    sources = []
+    for file in sorted(dataset_path.rglob("*")):
+        if not file.is_file() or any(part.startswith(".") for part in file.relative_to(dataset_path).parts):
+            continue
+        name = file.name.lower()
+        if name.endswith((".csv", ".csv.gz")):
+            sources.append(_Source(file, root=dataset_path))
+        elif name.endswith(".zip"):
+            with zipfile.ZipFile(file) as zf:
+                for member in zf.namelist():
+                    if member.lower().endswith(".csv"):
+                        sources.append(_Source(file, member, root=dataset_path))
+    return sources
+
+
+def infer_schema(source, null_values=NULL_VALUES):
+    """Infer column types from the first SAMPLE_BYTES of a CSV.
+
+    Columns that are entirely empty in the sample become strings, since a
+    null type can't hold whatever appears further down the file.
+    """
+    with source.open() as stream:
+        reader = pv.open_csv(
+            stream,
+            read_options=pv.ReadOptions(block_size=SAMPLE_BYTES),
+            parse_options=pv.ParseOptions(invalid_row_handler=lambda row: "skip"),
+            convert_options=pv.ConvertOptions(timestamp_parsers=TIMESTAMP_PARSERS,
+                                              null_values=null_values,
+                                              strings_can_be_null=True),
+        )
+        schema = reader.schema
+
+    return pa.schema([
+        pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f
+        for f in schema
+    ])
+
+
+def find_date_column(schema):
+    """Pick the column to partition by: the first timestamp/date column, if any."""
+    for field in schema:
+        if pa.types.is_timestamp(field.type) or pa.types.is_date(field.type):
+            return field.name
+    return None
+
+
+def _widen(field):
+    """The next, more permissive type to try after a conversion error."""
+    if pa.types.is_integer(field.type):
+        return field.with_type(pa.float64())
+    return field.with_type(pa.string())
+
+
+def _parse_timestamps(values, unit):
+    """Timestamps from text in any of TIMESTAMP_PARSERS (null where none fits)."""
+    try:
+        return values.cast(pa.timestamp(unit))
+    except pa.ArrowInvalid:
+        pass
+    return pc.coalesce(*(pc.strptime(values, format=fmt, unit=unit, error_is_null=True)
+                         for fmt in STRPTIME_FORMATS))
+
+
+def _convert_column(values, field):
+    """Cast a text column to field.type; raises ArrowInvalid if any value doesn't fit."""
+    if pa.types.is_string(field.type):
+        return values
+    if not pa.types.is_timestamp(field.type):
+        return values.cast(field.type)
+    parsed = _parse_timestamps(values, field.type.unit)
+    if parsed.null_count > values.null_count:
+        raise pa.ArrowInvalid(f"{field.name}: values that match none of the timestamp formats")
+    return parsed.cast(field.type)
+
+
+def _convert_batch(batch, schema):
+    """Cast a batch of text columns to schema, widening each column whose values don't fit.
+
+    Returns (batch, schema); the schema differs from the one passed in if a
+    column had to be widened for this batch.
+    """
+    columns = []
+    for i, field in enumerate(schema):
+        while True:
+            try:
+                columns.append(_convert_column(batch.column(i), field))
+                break
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                widened = _widen(field)
+                if widened.type == field.type:
+                    raise
+                field = widened
+        schema = schema.set(i, field)
+    return pa.RecordBatch.from_arrays(columns, schema=schema), schema
+
+
+def _with_partitions(batch, date_column):
+    """Add the year/month partition columns; rows without a usable date get NO_DATE (0)."""
+    if date_column is None:
+        return batch
+    dates = batch.column(date_column)
+    if pa.types.is_string(dates.type):
+        # The date column was widened to text; partition by the values that still parse
+        dates = _parse_timestamps(dates, "s")
+    year = pc.fill_null(pc.year(dates), NO_DATE).cast(pa.int16())
+    month = pc.fill_null(pc.month(dates), NO_DATE).cast(pa.int8())
+    return pa.RecordBatch.from_arrays(batch.columns + [year, month], names=batch.schema.names + ["year", "month"])
+
+
+def _write_table(source, schema, output_path, null_values=NULL_VALUES):
+    """Stream one source into output_path.
+
+    The CSV is read as text and every batch is cast to schema here rather
+    than by the CSV reader. A column that doesn't fit is widened (int ->
+    float -> string) in that batch, and the stream continues with a new
+    segment of files under the wider schema. Files written before a
+    widening are rewritten from their Parquet to the final schema at the
+    end, so the CSV is read exactly once.
+
+    Returns (schema, rows, skipped_rows): the final schema, the rows written
+    and the number of malformed rows skipped.
+    """
+    skipped = []
+
+    def skip_row(row):
+        skipped.append(row.number)
+        return "skip"
+
+    date_column = find_date_column(schema)
+    partitioning = None
+    if date_column is not None:
+        partitioning = ds.partitioning(pa.schema(PARTITION_COLUMNS), flavor="hive")
+    state = {"schema": schema, "pending": None, "rows": 0}
+
+    def segment_batches(reader, segment_schema):
+        pending = state["pending"]
+        state["pending"] = None
+        batches = [pending] if pending is not None else []
+        for batch in itertools.chain(batches, reader):
+            converted, widened = _convert_batch(batch, segment_schema)
+            if widened != segment_schema:
+                # Finish this segment; the next one starts with this batch under the wider schema
+                state["pending"], state["schema"] = batch, widened
+                return
+            state["rows"] += converted.num_rows
+            yield _with_partitions(converted, date_column)
+
+    segments = 0
+    with source.open() as stream:
+        reader = pv.open_csv(
+            stream,
+            read_options=pv.ReadOptions(block_size=BLOCK_BYTES),
+            parse_options=pv.ParseOptions(invalid_row_handler=skip_row),
+            convert_options=pv.ConvertOptions(column_types={f.name: pa.string() for f in schema},
+                                              null_values=null_values,
+                                              strings_can_be_null=True),
+        )
+        while segments == 0 or state["pending"] is not None:
+            segment_schema = state["schema"]
+            out_schema = segment_schema
+            if date_column is not None:
+                out_schema = pa.schema(list(segment_schema) + [pa.field(n, t) for n, t in PARTITION_COLUMNS])
+            ds.write_dataset(
+                segment_batches(reader, segment_schema),
+                output_path,
+                schema=out_schema,
+                format="parquet",
+                partitioning=partitioning,
+                basename_template=f"part-{segments}-{{i}}.parquet",
+                file_options=ds.ParquetFileFormat().make_write_options(compression=COMPRESSION),
+                existing_data_behavior="overwrite_or_ignore",
+                max_open_files=512,
+                max_rows_per_group=1024 * 1024,
+            )
+            segments += 1
+
+    final = state["schema"]
+    for segment in range(segments - 1):
+        for file in output_path.rglob(f"part-{segment}-*.parquet"):
+            pq.write_table(pq.ParquetFile(file).read().cast(final), file, compression=COMPRESSION)
+
+    return final, state["rows"], len(skipped)
+
+
+def check_readback(output_path, rows, partitioned=True):
+    """Read the table back as the docs do (pd.read_parquet on the table folder) and check the row count.
+
+    Only the partition columns are loaded (or none), so this is cheap; it
+    catches layouts pandas can't read, such as null partition keys.
+    """
+    table = pq.read_table(output_path, columns=[name for name, _ in PARTITION_COLUMNS] if partitioned else [])
+    table.to_pandas()
+    if table.num_rows != rows:
+        raise ValueError(f"{output_path}: read back {table.num_rows:,} rows, wrote {rows:,}")
+
+
+def convert_source(source, output_path, force=False, null_values=NULL_VALUES):
+    """Convert one CSV source to a Parquet dataset at output_path.
+
+    Types come from a sample; if a later block doesn't fit (an int column
+    that turns out to hold "12A"), that column is widened (int -> float ->
+    string) instead of dropping values. Rows with the wrong number of
+    fields are skipped and counted. The result is read back before the
+    source is marked as converted.
+
+    Returns (status, skipped_rows); status is "converted", or "current" when
+    the source hasn't changed since the last conversion.
+    """
+    marker = output_path / SOURCE_FILE
+    fingerprint = source.fingerprint()
+    if not force and marker.exists():
+        recorded = json.loads(marker.read_text())
+        recorded.pop("skipped_rows", None)
+        if recorded == fingerprint:
+            return "current", 0
+
+    schema = infer_schema(source, null_values)
+    partitioned = find_date_column(schema) is not None
+    if output_path.exists():
+        shutil.rmtree(output_path)
+    _, rows, skipped_rows = _write_table(source, schema, output_path, null_values)
+    check_readback(output_path, rows, partitioned)
+
+    marker.write_text(json.dumps({**fingerprint, "skipped_rows": skipped_rows}, indent=2))
+    return "converted", skipped_rows
+
+
+def convert_dataset(dataset_path, output_path, force=False, log=print, null_values=NULL_VALUES):
+    """Convert every CSV in a downloaded dataset directory to Parquet.
+
+    Each source becomes output_path/<table>/. null_values replaces
+    NULL_VALUES for datasets with their own missing-value markers.
+    Returns {table: status}.
+    """
+    results = {}
+    for source in find_csv_sources(dataset_path):
+        table = source.table_name
+        status, skipped_rows = convert_source(source, output_path / table, force=force, null_values=null_values)
+        note = f" ({skipped_rows} malformed rows skipped)" if skipped_rows else ""
+        log(f"   {'✓' if status == 'converted' else '·'} {table}: {status}{note} -> {output_path / table}")
+        results[table] = status
+    return results
+
+
+def main():
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+
+    source_path, output_path = Path(sys.argv[1]), Path(sys.argv[2])
+    if source_path.is_dir():
+        convert_dataset(source_path, output_path)
+    else:
+        source = _Source(source_path)
+        status, skipped_rows = convert_source(source, output_path / source.table_name, force=True)
+        print(f"{status} ({skipped_rows} malformed rows skipped)")
+
+
+if __name__ == "__main__":
+    main()
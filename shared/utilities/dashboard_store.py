@@ -0,0 +1,141 @@
+"""
+Dashboard Store
+Where the pipelines leave their results for the Streamlit dashboards.
+
+Streamlit reruns app.py top to bottom on every widget interaction, so
+anything the dashboard reads has to be cheap to read again. Pipelines
+publish to data/processed/dashboard/:
+
+    metrics.json        st.metric arguments keyed by label (tiny, read with json)
+    <table>.arrow       Arrow IPC (Feather v2) files, uncompressed, so they
+                        can be memory-mapped instead of parsed
+
+Loading from the dashboard:
+
+- Each file is memoized in this process under its fingerprint (size +
+  mtime). A rerun with unchanged files costs one os.stat per file, and a
+  re-publish is picked up on the next rerun.
+- Tables are memory-mapped: the OS pages in only the columns a chart uses,
+  and nothing touches data/raw/.
+- pyarrow and pandas are imported only when a table is first needed, so a
+  dashboard that only shows metrics starts without them.
+
+Usage:
+    # pipeline
+    store = DashboardStore("data/processed/dashboard")
+    store.publish(tables={"final_dataset": final},
+                  metrics=[{"label": "Correlation", "value": "r = -0.42", "help": "Crime vs price"}])
+
+    # app.py
+    store = DashboardStore("data/processed/dashboard")
+    col.metric(**store.metric("Correlation", "r = ?", help="Placeholder until the pipeline runs"))
+    chart_data = store.frame("final_dataset")
+"""
+
+import json
+import os
+from pathlib import Path
+
+METRICS_FILE = "metrics.json"
+TABLE_SUFFIX = ".arrow"
+
+# (path, kind) -> (fingerprint, loaded object); lives as long as the Streamlit server process
+_MEMO = {}
+
+
+def fingerprint(path):
+    """(size, mtime_ns) of a file, or None if it doesn't exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _memoized(path, kind, load):
+    key = fingerprint(path)
+    if key is None:
+        return None
+    memo_key = (str(path), kind)
+    cached = _MEMO.get(memo_key)
+    if cached is None or cached[0] != key:
+        cached = (key, load(path))
+        _MEMO[memo_key] = cached
+    return cached[1]
+
+
+def _replace(path, write):
+    """Write to a temporary sibling, then rename over path (readers never see half a file)."""
+    staging = path.with_name(f".{path.name}.tmp")
+    write(staging)
+    os.replace(staging, path)
+
+
+class DashboardStore:
+    """Metrics and tables one lab's pipelines publish for its dashboard."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    # --- Publishing (pipelines) ----------------------------------------------
+
+    def publish(self, tables=None, metrics=None):
+        """Write tables ({name: DataFrame or pyarrow Table}) and merge metrics into metrics.json.
+
+        metrics is a list of st.metric keyword dicts (label, value, and
+        optionally delta, help, delta_color). A published label replaces the
+        earlier entry with that label; other labels are kept.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for name, table in (tables or {}).items():
+            import pyarrow as pa
+            import pyarrow.feather as feather
+
+            if not isinstance(table, pa.Table):
+                table = pa.Table.from_pandas(table, preserve_index=False)
+            _replace(self.table_path(name), lambda path, t=table: feather.write_feather(t, path,
+                                                                                          compression="uncompressed"))
+        if metrics:
+            merged = {**self.metrics(), **{str(m["label"]): {k: str(v) for k, v in m.items()} for m in metrics}}
+            _replace(self.directory / METRICS_FILE,
+                     lambda path: path.write_text(json.dumps(merged, indent=2, ensure_ascii=False)))
+
+    # --- Loading (dashboards) ------------------------------------------------
+
+    def table_path(self, name):
+        return self.directory / f"{name}{TABLE_SUFFIX}"
+
+    def metrics(self):
+        """{label: st.metric kwargs} as published, or {} before the first publish."""
+        def load(path):
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+
+        return _memoized(self.directory / METRICS_FILE, "metrics", load) or {}
+
+    def metric(self, label, value, **kwargs):
+        """st.metric kwargs for label: the published entry, else the given placeholder."""
+        return self.metrics().get(label) or {"label": label, "value": value, **kwargs}
+
+    def published(self):
+        """True once any pipeline has published metrics."""
+        return bool(self.metrics())
+
+    def table(self, name):
+        """Memory-mapped pyarrow Table, or None if the table hasn't been published."""
+        def load(path):
+            import pyarrow as pa
+
+            return pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+
+        return _memoized(self.table_path(name), "table", load)
+
+    def frame(self, name):
+        """The table as a pandas DataFrame (converted once per published version), or None."""
+        table = self.table(name)
+        if table is None:
+            return None
+        return _memoized(self.table_path(name), "frame", lambda path: table.to_pandas())
+
+    def tables(self):
+        return sorted(p.name.removesuffix(TABLE_SUFFIX) for p in self.directory.glob(f"*{TABLE_SUFFIX}"))
@@ -7,6 +7,11 @@ Usage:
     python download_datasets.py              # Download all labs
     python download_datasets.py --lab 1      # Download Lab 1 only
     python download_datasets.py --lab 2 3    # Download Labs 2 and 3
+    python download_datasets.py --jobs 4 -y  # 4 parallel downloads, no prompts
+    python download_datasets.py --no-cache   # Per-lab copies, no shared cache
+    python download_datasets.py --verify     # Check files against the manifest
+    python download_datasets.py --prune      # Delete cache objects nothing uses
+    python download_datasets.py --parquet    # Also convert CSVs to Parquet
 
 Prerequisites:
     - Kaggle API installed: pip install kaggle
@@ -14,17 +19,73 @@ Prerequisites:
     - See docs/dataset-download-guide.md for setup instructions
 """
 
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import mmap
 import os
+import shutil
 import subprocess
 import sys
-import argparse
-import json
-from pathlib import Path
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from pathlib import Path
 
 # Base directory - assumes script is in shared/utilities/
 BASE_DIR = Path(__file__).parent.parent.parent.absolute()
 
+# Shared dataset cache: every Kaggle ref is downloaded once into this store
+# and each lab's target_dir is populated with links to the cached files.
+# Override with SRX_DATASET_CACHE to put it on a bigger disk.
+CACHE_DIR = Path(os.environ.get("SRX_DATASET_CACHE", BASE_DIR / ".dataset_cache"))
+
+# Read size for streaming file hashes
+HASH_CHUNK_BYTES = 1024 * 1024
+
+# Cache objects are shared by every lab that links them, so nobody may write to them
+READ_ONLY = 0o444
+WRITABLE = 0o644
+
+# Memory-mapped files are hashed and line-counted in blocks of this size
+SCAN_BLOCK_BYTES = 16 * 1024 * 1024
+
+# Everything except '"' and '\n', deleted before quote-aware line counting
+_NOT_QUOTE_OR_NEWLINE = bytes(b for b in range(256) if b not in b'"\n')
+
+# Files scanned concurrently while building a manifest
+MANIFEST_WORKERS = min(8, os.cpu_count() or 1)
+
+# Rows read from each CSV to infer column types and in-memory size
+PROFILE_SAMPLE_ROWS = 1000
+
+# pandas stores text as Python str objects: ~49 bytes of header per value
+# plus an 8-byte pointer in the column array, on top of the characters
+PY_STR_OVERHEAD_BYTES = 49 + 8
+
+# Date formats found in the lab datasets (311 and NYPD use US-style dates)
+DATETIME_FORMATS = ["%m/%d/%Y %I:%M:%S %p", "%m/%d/%Y %H:%M:%S", "%m/%d/%Y"]
+
+# Beyond this many broken files, one full re-download beats per-file API calls
+MAX_FILE_REPAIRS = 20
+
+# Serializes console output when several downloads run at once
+_print_lock = threading.Lock()
+
+# Serializes read-modify-write of the per-lab dataset_manifest.json files
+_manifest_lock = threading.Lock()
+
+# One lock per Kaggle ref, so labs sharing a dataset never fetch it twice
+_ref_locks = {}
+_ref_locks_guard = threading.Lock()
+
+# Refs downloaded afresh in this run; a refresh asked for by a second lab reuses them
+_refreshed_refs = set()
+
 # Dataset configuration
 DATASETS = {
     1: {
@@ -171,116 +232,882 @@ def check_kaggle_setup():
     return True
 
 
-def download_dataset(kaggle_ref, target_path, description):
-    """Download a single Kaggle dataset."""
-    target_path.mkdir(parents=True, exist_ok=True)
+def _log(message):
+    """Print a line without interleaving with other download workers."""
+    with _print_lock:
+        print(message, flush=True)
 
-    print(f"\n{'='*70}")
-    print(f"Dataset: {description}")
-    print(f"Kaggle: {kaggle_ref}")
-    print(f"Target: {target_path}")
-    print(f"{'='*70}")
 
-    # Check if already downloaded
-    if any(target_path.iterdir()):
-        print(f"⚠️  Directory not empty. Files already exist.")
-        response = input("   Download anyway? This will add/overwrite files. [y/N]: ")
-        if response.lower() != 'y':
-            print("   Skipped.")
-            return False
+def _ref_lock(kaggle_ref):
+    """Return the lock guarding cache writes for one Kaggle ref."""
+    with _ref_locks_guard:
+        return _ref_locks.setdefault(kaggle_ref, threading.Lock())
 
-    cmd = [
-        "kaggle", "datasets", "download",
-        "-d", kaggle_ref,
-        "-p", str(target_path),
-        "--unzip"
-    ]
 
-    print(f"\nDownloading...")
+def _write_json_atomic(path, data):
+    """Write JSON via a temp file so an interrupted run never leaves half a file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def file_sha256(path):
+    """Hash a file in fixed-size blocks so large CSVs never sit in memory."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _kaggle_fetch_file(kaggle_ref, name, dest, quiet=False):
+    """Download a single file of a dataset (``kaggle -f``) and move it to dest.
+
+    Kaggle serves large single files as ``<name>.zip``; those are unpacked
+    before the move. The work happens in a hidden sibling directory so a
+    failed fetch never replaces a file with a partial one.
+    """
+    tmp_dir = dest.parent / f".{dest.name}.download"
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+
     try:
-        result = subprocess.run(cmd, check=True, capture_output=False, text=True)
-        print(f"✓ Downloaded successfully")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Download failed: {e}")
-        print(f"\nTroubleshooting:")
-        print(f"1. Visit https://www.kaggle.com/datasets/{kaggle_ref}")
-        print(f"2. Accept the dataset's terms (if required)")
-        print(f"3. Verify your Kaggle credentials")
-        print(f"4. Try manual download if issues persist")
-        return False
+        cmd = [
+            "kaggle", "datasets", "download",
+            "-d", kaggle_ref,
+            "-f", name,
+            "-p", str(tmp_dir),
+            "--force"
+        ]
+        subprocess.run(cmd, check=True, capture_output=quiet, text=True)
 
+        fetched = tmp_dir / Path(name).name
+        archive = tmp_dir / f"{fetched.name}.zip"
+        if not fetched.exists() and archive.exists():
+            with zipfile.ZipFile(archive) as zf:
+                zf.extractall(tmp_dir)
+        if not fetched.exists():
+            raise FileNotFoundError(f"Kaggle did not return {name}")
 
-def create_dataset_manifest(lab_path, lab_name):
-    """Create a manifest file documenting downloaded datasets."""
-    manifest_path = lab_path / "data" / "raw" / "dataset_manifest.json"
+        os.replace(fetched, dest)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _cache_index_path(cache_dir, kaggle_ref):
+    owner, name = kaggle_ref.split("/", 1)
+    return cache_dir / "refs" / owner / f"{name}.json"
+
+
+def _object_path(cache_dir, sha256):
+    return cache_dir / "objects" / sha256[:2] / sha256
+
+
+def _read_cache_index(cache_dir, kaggle_ref):
+    index_path = _cache_index_path(cache_dir, kaggle_ref)
+    if not index_path.exists():
+        return None
+    with open(index_path) as f:
+        return json.load(f)
+
+
+def load_cache_index(cache_dir, kaggle_ref):
+    """Return the cached file index for a ref, or None if it is missing or damaged."""
+    index = _read_cache_index(cache_dir, kaggle_ref)
+    if index is None:
+        return None
+
+    for entry in index["files"].values():
+        obj = _object_path(cache_dir, entry["sha256"])
+        if not obj.exists() or obj.stat().st_size != entry["size"]:
+            return None
+
+    return index
+
+
+def _store_object(cache_dir, file):
+    """Move a file into the object store, read-only, and return its index entry.
+
+    The new file always replaces an existing object: a corrupt object keeps
+    its (expected) hash name, so skipping the move would keep the damage.
+    """
+    sha256 = file_sha256(file)
+    obj = _object_path(cache_dir, sha256)
+    obj.parent.mkdir(parents=True, exist_ok=True)
+    os.chmod(file, READ_ONLY)
+    os.replace(file, obj)
+    return {"sha256": sha256, "size": obj.stat().st_size}
+
+
+def _ingest_into_cache(cache_dir, kaggle_ref, staging_dir):
+    """Move a fresh download into the object store and write its index."""
+    files = {}
+    for file in sorted(staging_dir.rglob("*")):
+        if file.is_file():
+            files[file.relative_to(staging_dir).as_posix()] = _store_object(cache_dir, file)
 
-    manifest = {
-        "lab_name": lab_name,
+    index = {
+        "kaggle_ref": kaggle_ref,
         "download_date": datetime.now().isoformat(),
-        "datasets": []
+        "files": files
     }
+    _write_json_atomic(_cache_index_path(cache_dir, kaggle_ref), index)
 
-    raw_path = lab_path / "data" / "raw"
-    for item in raw_path.iterdir():
-        if item.is_dir() and item.name not in ['samples']:
-            dataset_info = {
-                "directory": item.name,
-                "files": []
-            }
+    return index
+
+
+def _link_file(source, dest):
+    """Populate dest from a cache object: hardlink, else symlink, else copy.
+
+    Links share the object, so it is kept read-only: an edit in place fails
+    instead of changing every lab's copy. A lab that wants to change a file
+    writes a new one (or replaces it) and the object stays intact. Only a
+    plain copy is writable.
+    """
+    if source.stat().st_mode & 0o222:           # stored before objects were read-only
+        os.chmod(source, READ_ONLY)
+    if dest.exists() and os.path.samefile(source, dest):
+        return
+    if dest.is_symlink() or dest.exists():
+        dest.unlink()
+    dest.parent.mkdir(parents=True, exist_ok=True)
+
+    try:
+        os.link(source, dest)
+    except OSError:
+        try:
+            os.symlink(source, dest)
+        except OSError:
+            shutil.copy2(source, dest)
+            os.chmod(dest, WRITABLE)
+
+
+def link_from_cache(cache_dir, index, target_path):
+    """Fill a lab's target directory with links to the cached files."""
+    for rel_path, entry in index["files"].items():
+        _link_file(_object_path(cache_dir, entry["sha256"]), target_path / rel_path)
+
+
+def fetch_into_cache(kaggle_ref, cache_dir, quiet=False, refresh=False):
+    """Make sure a Kaggle ref is in the cache, downloading it at most once.
+
+    ``refresh`` ignores an existing cache entry and downloads again, once
+    per run: labs sharing the ref get the copy the first one fetched.
+    Returns (index, downloaded) where ``downloaded`` is False on a cache hit.
+    Raises subprocess.CalledProcessError / FileNotFoundError if Kaggle fails.
+    """
+    with _ref_lock(kaggle_ref):
+        refresh = refresh and kaggle_ref not in _refreshed_refs
+        index = None if refresh else load_cache_index(cache_dir, kaggle_ref)
+        if index is not None:
+            return index, False
+
+        owner, name = kaggle_ref.split("/", 1)
+        staging_dir = cache_dir / "staging" / owner / name
+        if staging_dir.exists():
+            shutil.rmtree(staging_dir)
+        staging_dir.mkdir(parents=True)
+
+        cmd = [
+            "kaggle", "datasets", "download",
+            "-d", kaggle_ref,
+            "-p", str(staging_dir),
+            "--unzip"
+        ]
+        try:
+            subprocess.run(cmd, check=True, capture_output=quiet, text=True)
+            index = _ingest_into_cache(cache_dir, kaggle_ref, staging_dir)
+            _refreshed_refs.add(kaggle_ref)
+            return index, True
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+def repair_from_cache(kaggle_ref, cache_dir, names, target_path, quiet=False):
+    """Re-link stale lab files, fetching from Kaggle only objects that are bad.
+
+    Returns the number of files fetched, or None when more than
+    MAX_FILE_REPAIRS objects are broken and a full re-download is cheaper.
+    """
+    with _ref_lock(kaggle_ref):
+        index = _read_cache_index(cache_dir, kaggle_ref)
+        if index is None:
+            return None
+
+        broken = []
+        for name in names:
+            entry = index["files"].get(name)
+            obj = entry and _object_path(cache_dir, entry["sha256"])
+            if entry is None or not obj.exists() or file_sha256(obj) != entry["sha256"]:
+                broken.append(name)
+        if len(broken) > MAX_FILE_REPAIRS:
+            return None
+
+        owner, dataset_name = kaggle_ref.split("/", 1)
+        staging_dir = cache_dir / "staging" / owner / dataset_name
+        for name in broken:
+            staged = staging_dir / name
+            staged.parent.mkdir(parents=True, exist_ok=True)
+            _kaggle_fetch_file(kaggle_ref, name, staged, quiet=quiet)
+            index["files"][name] = _store_object(cache_dir, staged)
+        if broken:
+            index["download_date"] = datetime.now().isoformat()
+            _write_json_atomic(_cache_index_path(cache_dir, kaggle_ref), index)
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    for name in names:
+        _link_file(_object_path(cache_dir, index["files"][name]["sha256"]), target_path / name)
+
+    return len(broken)
+
+
+def prune_cache(cache_dir):
+    """Delete cache objects that no ref index and no lab manifest points to.
+
+    A refreshed ref leaves its old objects behind. Objects still named in a
+    lab's dataset_manifest.json are kept, since that lab may hold symlinks to
+    them. Leftover staging directories go too.
+    Returns (objects removed, bytes freed).
+    """
+    keep = set()
+    for index_path in (cache_dir / "refs").glob("*/*.json"):
+        with open(index_path) as f:
+            keep.update(entry["sha256"] for entry in json.load(f)["files"].values())
+    for lab_config in DATASETS.values():
+        manifest = load_dataset_manifest(BASE_DIR / lab_config["name"])
+        keep.update(file.get("sha256") for dataset in manifest["datasets"] for file in dataset["files"])
+
+    removed = freed = 0
+    for obj in (cache_dir / "objects").glob("*/*"):
+        if obj.is_file() and obj.name not in keep:
+            freed += obj.stat().st_size
+            obj.unlink()
+            removed += 1
+    for bucket in (cache_dir / "objects").glob("*"):
+        if bucket.is_dir() and not any(bucket.iterdir()):
+            bucket.rmdir()
+    shutil.rmtree(cache_dir / "staging", ignore_errors=True)
+    return removed, freed
+
+
+def scan_file(path, want_hash=True, want_rows=False):
+    """One pass over a memory-mapped file: streaming SHA-256 and/or CSV record count.
+
+    Records are counted with C-level bytes operations over each mapped
+    block, never a Python loop per line. Newlines inside quoted fields don't
+    end a record, so blocks containing '"' are first reduced to just their
+    quotes and newlines, adjacent quote pairs (which can't hide a newline)
+    are dropped, and only newlines outside quotes are counted in what's
+    left. The quote state carries across blocks.
+
+    Returns (sha256 or None, records or None); records include the header.
+    """
+    digest = hashlib.sha256() if want_hash else None
+    size = path.stat().st_size
+    records = 0 if want_rows else None
+    if size == 0:
+        return digest and digest.hexdigest(), records
+
+    in_quotes = False
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for start in range(0, size, SCAN_BLOCK_BYTES):
+            block = mm[start:start + SCAN_BLOCK_BYTES]
+            if digest is not None:
+                digest.update(block)
+            if not want_rows:
+                continue
+            if b'"' not in block:
+                if not in_quotes:
+                    records += block.count(b"\n")
+            else:
+                pieces = block.translate(None, _NOT_QUOTE_OR_NEWLINE).replace(b'""', b"").split(b'"')
+                outside = pieces[1::2] if in_quotes else pieces[0::2]
+                records += sum(piece.count(b"\n") for piece in outside)
+                in_quotes ^= (len(pieces) - 1) % 2 == 1
+        if want_rows and mm[size - 1:size] != b"\n":
+            records += 1
+
+    return digest and digest.hexdigest(), records
+
+
+def _parses(values, parse):
+    try:
+        for value in values:
+            parse(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _parse_datetime(value):
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    for fmt in DATETIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    raise ValueError(value)
+
+
+def _infer_dtype(values):
+    """Guess the pandas dtype read_csv would give a column (datetimes if parsed)."""
+    present = [v for v in values if v != ""]
+    if not present:
+        return "object"
+    if all(v.lower() in ("true", "false") for v in present):
+        return "bool"
+    if _parses(present, int):
+        # Missing values force pandas to float64
+        return "int64" if len(present) == len(values) else "float64"
+    if _parses(present, float):
+        return "float64"
+    if _parses(present, _parse_datetime):
+        return "datetime64[ns]"
+    return "object"
+
+
+def profile_csv(path, sample_rows=PROFILE_SAMPLE_ROWS):
+    """Infer column names, dtypes and in-memory bytes per row from a CSV sample.
+
+    Returns (columns, row_bytes) where columns is [{"name", "dtype"}] and
+    row_bytes approximates pandas' deep memory usage per row with default
+    dtypes (8 bytes per number/datetime, Python str objects for text).
+    """
+    csv.field_size_limit(2**31 - 1)
+    try:
+        with open(path, newline="", encoding="utf-8", errors="replace") as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            sample = list(itertools.islice(reader, sample_rows))
+    except csv.Error:
+        return [], 0
+
+    columns = []
+    row_bytes = 0
+    for i, name in enumerate(header):
+        values = [row[i] if i < len(row) else "" for row in sample]
+        dtype = _infer_dtype(values)
+        if dtype == "object":
+            row_bytes += PY_STR_OVERHEAD_BYTES + (sum(map(len, values)) / len(values) if values else 0)
+        else:
+            row_bytes += 1 if dtype == "bool" else 8
+        columns.append({"name": name, "dtype": dtype})
+
+    return columns, row_bytes
+
+
+def _describe_file(file, name, prev, known, full):
+    stat = file.stat()
+    unchanged = (not full and prev is not None and prev.get("sha256")
+                 and prev.get("size_bytes") == stat.st_size and prev.get("mtime") == stat.st_mtime)
+    is_csv = name.lower().endswith(".csv")
+
+    sha256 = prev["sha256"] if unchanged else None
+    if sha256 is None and not full and known is not None and known[1] == stat.st_size:
+        sha256 = known[0]
+    rows = prev.get("rows") if unchanged else None
+
+    if sha256 is None or (is_csv and rows is None):
+        scanned_hash, records = scan_file(file, want_hash=sha256 is None, want_rows=is_csv and rows is None)
+        sha256 = sha256 or scanned_hash
+        if records is not None:
+            rows = max(records - 1, 0)
+
+    entry = {
+        "name": name,
+        "size_mb": round(stat.st_size / (1024 * 1024), 2),
+        "size_bytes": stat.st_size,
+        "mtime": stat.st_mtime,
+        "sha256": sha256
+    }
+
+    if is_csv:
+        if unchanged and "columns" in prev:
+            columns, row_bytes = prev["columns"], prev["est_row_bytes"]
+        else:
+            columns, row_bytes = profile_csv(file)
+        entry.update({
+            "rows": rows,
+            "columns": columns,
+            "est_row_bytes": round(row_bytes),
+            "est_memory_mb": round(rows * row_bytes / (1024 * 1024), 1)
+        })
+
+    return entry
+
+
+def describe_files(dataset_path, previous_files=None, known_hashes=None, full=False):
+    """Return manifest entries for every file under dataset_path, scanned in parallel.
+
+    Each entry has size, mtime and sha256; CSVs also get an exact row count,
+    sampled column dtypes and an estimated pandas memory footprint.
+
+    Hashing 20GB takes minutes, so a file whose size and mtime match its
+    ``previous_files`` entry keeps the recorded hash and row count, and
+    ``known_hashes`` ({name: (sha256, size)}, e.g. from the shared cache)
+    is used when the size matches. ``full`` rescans everything.
+    """
+    previous = {entry["name"]: entry for entry in previous_files or []}
+    known_hashes = known_hashes or {}
+
+    files = []
+    for file in sorted(dataset_path.rglob("*")):
+        rel_parts = file.relative_to(dataset_path).parts
+        if file.is_file() and not any(part.startswith(".") for part in rel_parts):
+            files.append((file, "/".join(rel_parts)))
+
+    with ThreadPoolExecutor(max_workers=MANIFEST_WORKERS) as pool:
+        return list(pool.map(
+            lambda item: _describe_file(item[0], item[1], previous.get(item[1]),
+                                        known_hashes.get(item[1]), full),
+            files
+        ))
+
+
+def find_stale_files(dataset_path, expected_files, full=False):
+    """Return the names of recorded files that are missing or no longer match.
+
+    Without ``full`` only files whose size or mtime changed are rehashed,
+    which keeps a rerun over an intact 50GB tree down to a few seconds.
+    """
+    stale = []
+    for entry in expected_files:
+        file = dataset_path / entry["name"]
+        if not file.is_file():
+            stale.append(entry["name"])
+            continue
+
+        stat = file.stat()
+        # A size change is enough; otherwise hash only when asked to or the mtime moved
+        if stat.st_size != entry["size_bytes"] or (
+                (full or stat.st_mtime != entry["mtime"]) and file_sha256(file) != entry["sha256"]):
+            stale.append(entry["name"])
+
+    return stale
+
+
+def _report_failure(kaggle_ref, error):
+    lines = [f"❌ Download failed ({kaggle_ref}): {error}"]
+    stderr = getattr(error, "stderr", None)
+    if stderr:
+        lines.extend(f"   {line}" for line in stderr.strip().splitlines()[-5:])
+    lines.extend([
+        "\nTroubleshooting:",
+        f"1. Visit https://www.kaggle.com/datasets/{kaggle_ref}",
+        "2. Accept the dataset's terms (if required)",
+        "3. Verify your Kaggle credentials",
+        "4. Try manual download if issues persist",
+    ])
+    _log("\n".join(lines))
+    return "failed"
+
+
+def download_dataset(kaggle_ref, target_path, description, existing="ask", quiet=False,
+                     cache_dir=CACHE_DIR, expected_files=None, force=False):
+    """Download a single Kaggle dataset.
+
+    ``existing`` decides what happens when target_path already has files:
+    "ask" prompts, "skip" leaves them alone and "overwrite" downloads anyway.
+    With ``quiet`` the banner and Kaggle CLI progress are suppressed so that
+    concurrent downloads don't garble the console.
+
+    With a ``cache_dir`` the dataset is fetched into the shared cache (only
+    if no other lab has fetched it yet) and target_path is filled with links
+    to the cached files. Pass ``cache_dir=None`` to download straight into
+    target_path.
+
+    ``expected_files`` are the dataset's entries from dataset_manifest.json.
+    When given, an intact dataset is left alone and a damaged one only has
+    its missing or corrupt files fetched again. ``force`` re-downloads
+    everything, bypassing the manifest and the cache.
+
+    Returns "downloaded", "linked" (served from the cache), "current",
+    "repaired", "skipped" or "failed".
+    """
+    target_path.mkdir(parents=True, exist_ok=True)
+
+    if not quiet:
+        print(f"\n{'='*70}")
+        print(f"Dataset: {description}")
+        print(f"Kaggle: {kaggle_ref}")
+        print(f"Target: {target_path}")
+        print(f"{'='*70}")
+
+    recorded = bool(expected_files) and not force
+    if recorded:
+        stale = find_stale_files(target_path, expected_files)
+        if not stale:
+            if not quiet:
+                print(f"✓ Up to date ({len(expected_files)} files match the manifest)")
+            return "current"
 
-            for file in item.iterdir():
-                if file.is_file():
-                    dataset_info["files"].append({
-                        "name": file.name,
-                        "size_mb": round(file.stat().st_size / (1024 * 1024), 2)
-                    })
+        if not quiet:
+            print(f"⚠️  {len(stale)} of {len(expected_files)} files missing or changed. Repairing...")
+        try:
+            if cache_dir is not None:
+                fetched = repair_from_cache(kaggle_ref, cache_dir, stale, target_path, quiet=quiet)
+            elif len(stale) <= MAX_FILE_REPAIRS:
+                for name in stale:
+                    _kaggle_fetch_file(kaggle_ref, name, target_path / name, quiet=quiet)
+                fetched = len(stale)
+            else:
+                fetched = None
+        except (subprocess.CalledProcessError, FileNotFoundError) as e:
+            return _report_failure(kaggle_ref, e)
 
-            manifest["datasets"].append(dataset_info)
+        if fetched is not None:
+            if not quiet:
+                print(f"✓ Repaired {len(stale)} files ({fetched} fetched from Kaggle)")
+            return "repaired"
+        # Too much is broken for file-by-file repair: fall through to a full download
 
-    with open(manifest_path, 'w') as f:
-        json.dump(manifest, f, indent=2)
+    elif any(target_path.iterdir()) and not force:
+        if existing == "skip":
+            if not quiet:
+                print("⚠️  Directory not empty. Skipped.")
+            return "skipped"
+        if existing == "ask":
+            print("⚠️  Directory not empty. Files already exist.")
+            response = input("   Download anyway? This will add/overwrite files. [y/N]: ")
+            if response.lower() != 'y':
+                print("   Skipped.")
+                return "skipped"
+
+    if not quiet:
+        print("\nDownloading...")
+    try:
+        if cache_dir is None:
+            cmd = [
+                "kaggle", "datasets", "download",
+                "-d", kaggle_ref,
+                "-p", str(target_path),
+                "--unzip"
+            ]
+            subprocess.run(cmd, check=True, capture_output=quiet, text=True)
+            status = "downloaded"
+        else:
+            index, downloaded = fetch_into_cache(kaggle_ref, cache_dir, quiet=quiet,
+                                                 refresh=recorded or force)
+            link_from_cache(cache_dir, index, target_path)
+            status = "downloaded" if downloaded else "linked"
+        if not quiet:
+            if status == "linked":
+                print(f"✓ Linked {len(index['files'])} files from cache ({cache_dir})")
+            else:
+                print("✓ Downloaded successfully")
+        return status
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        return _report_failure(kaggle_ref, e)
+
+
+def _manifest_path(lab_path):
+    return lab_path / "data" / "raw" / "dataset_manifest.json"
+
+
+def load_dataset_manifest(lab_path):
+    """Return a lab's dataset manifest, or an empty one if none was written yet."""
+    manifest_path = _manifest_path(lab_path)
+    if not manifest_path.exists():
+        return {"datasets": []}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def recorded_files(manifest, target_dir):
+    """Return the manifest's file entries for a dataset, if they carry checksums."""
+    directory = Path(target_dir).name
+    for dataset_info in manifest["datasets"]:
+        if dataset_info["directory"] == directory:
+            files = dataset_info["files"]
+            if files and all("sha256" in entry for entry in files):
+                return files
+    return None
+
+
+def _lab_refs(lab_name):
+    """Map each data/raw directory of a lab to its Kaggle ref."""
+    for lab_config in DATASETS.values():
+        if lab_config["name"] == lab_name:
+            return {Path(d["target_dir"]).name: d["kaggle_ref"] for d in lab_config["datasets"]}
+    return {}
+
+
+def _describe_directory(item, kaggle_ref, previous, cache_dir):
+    known_hashes = {}
+    index = kaggle_ref and cache_dir is not None and _read_cache_index(cache_dir, kaggle_ref)
+    if index:
+        known_hashes = {name: (e["sha256"], e["size"]) for name, e in index["files"].items()}
+
+    files = describe_files(item, previous.get("files") if previous else None, known_hashes)
+    return {
+        "directory": item.name,
+        "kaggle_ref": kaggle_ref,
+        "total_size_mb": round(sum(f["size_bytes"] for f in files) / (1024 * 1024), 2),
+        "total_rows": sum(f.get("rows") or 0 for f in files),
+        "files": files
+    }
+
+
+def record_dataset(lab_path, lab_name, target_dir, cache_dir=CACHE_DIR):
+    """Update one dataset's entry in the lab manifest right after it downloads.
+
+    Writing per dataset (not per lab) is what makes an interrupted run
+    resumable: everything recorded so far is verified and skipped next time.
+    """
+    item = lab_path / target_dir
+    with _manifest_lock:
+        manifest = load_dataset_manifest(lab_path)
+        manifest.setdefault("lab_name", lab_name)
+        manifest["download_date"] = datetime.now().isoformat()
+
+        datasets = [d for d in manifest["datasets"] if d["directory"] != item.name]
+        previous = next((d for d in manifest["datasets"] if d["directory"] == item.name), None)
+        datasets.append(_describe_directory(item, _lab_refs(lab_name).get(item.name), previous, cache_dir))
+        manifest["datasets"] = sorted(datasets, key=lambda d: d["directory"])
+
+        _write_json_atomic(_manifest_path(lab_path), manifest)
+
+
+def create_dataset_manifest(lab_path, lab_name, cache_dir=CACHE_DIR):
+    """Create a manifest file documenting downloaded datasets."""
+    manifest_path = _manifest_path(lab_path)
+    refs = _lab_refs(lab_name)
+
+    with _manifest_lock:
+        previous = {d["directory"]: d for d in load_dataset_manifest(lab_path)["datasets"]}
+
+        manifest = {
+            "lab_name": lab_name,
+            "download_date": datetime.now().isoformat(),
+            "datasets": []
+        }
+
+        raw_path = lab_path / "data" / "raw"
+        for item in sorted(raw_path.iterdir()):
+            if item.is_dir() and item.name not in ['samples']:
+                manifest["datasets"].append(
+                    _describe_directory(item, refs.get(item.name), previous.get(item.name), cache_dir)
+                )
+
+        _write_json_atomic(manifest_path, manifest)
 
     print(f"\n✓ Created manifest: {manifest_path}")
 
 
-def download_lab(lab_number):
-    """Download all datasets for a specific lab."""
+def _resolve_lab(lab_number):
+    """Return (lab_name, lab_path) for a lab number, or None if it is unusable."""
     if lab_number not in DATASETS:
         print(f"❌ Lab {lab_number} not found. Valid labs: 1-5")
-        return False
+        return None
 
-    lab_config = DATASETS[lab_number]
-    lab_name = lab_config["name"]
+    lab_name = DATASETS[lab_number]["name"]
     lab_path = BASE_DIR / lab_name
 
     if not lab_path.exists():
         print(f"❌ Lab directory not found: {lab_path}")
+        return None
+
+    return lab_name, lab_path
+
+
+def _print_lab_summary(lab_number, statuses):
+    """Print the per-lab download tally and return True if nothing failed."""
+    counts = ", ".join(
+        f"{statuses.count(status)} {status}"
+        for status in ("downloaded", "linked", "repaired", "current", "skipped", "failed")
+        if status in statuses
+    )
+    failed = statuses.count("failed")
+
+    print(f"\n{'='*70}")
+    print(f"Lab {lab_number} Summary: {len(statuses) - failed}/{len(statuses)} datasets ready ({counts})")
+    print(f"{'='*70}")
+
+    return failed == 0
+
+
+def convert_to_parquet(lab_path, target_dir, force=False, quiet=False):
+    """Stream a downloaded dataset's CSVs into data/parquet/<dataset>/ (needs pyarrow).
+
+    quiet reports only failures.
+    """
+    # Imported here so the downloader itself keeps working without pyarrow
+    try:
+        from shared.utilities.csv_to_parquet import convert_dataset
+    except ImportError:
+        from csv_to_parquet import convert_dataset
+
+    source = lab_path / target_dir
+    output = lab_path / "data" / "parquet" / Path(target_dir).name
+    lines = []
+    failed = False
+    try:
+        convert_dataset(source, output, force=force, log=lines.append)
+    except Exception as e:
+        lines.append(f"   ❌ Parquet conversion failed: {e}")
+        failed = True
+    if failed or not quiet:
+        _log(f"Parquet ({source.name}):\n" + "\n".join(lines) if lines else
+             f"Parquet ({source.name}): no CSV files found")
+
+
+def _download_and_record(lab_path, lab_name, dataset, manifest, existing, quiet, cache_dir, force,
+                         parquet=False):
+    status = download_dataset(
+        dataset["kaggle_ref"],
+        lab_path / dataset["target_dir"],
+        dataset["description"],
+        existing=existing,
+        quiet=quiet,
+        cache_dir=cache_dir,
+        expected_files=recorded_files(manifest, dataset["target_dir"]),
+        force=force
+    )
+    if status in ("downloaded", "linked", "repaired"):
+        record_dataset(lab_path, lab_name, dataset["target_dir"], cache_dir)
+    if parquet and status not in ("skipped", "failed"):
+        convert_to_parquet(lab_path, dataset["target_dir"], force=force, quiet=quiet)
+    return status
+
+
+def download_lab(lab_number, existing="ask", cache_dir=CACHE_DIR, force=False, parquet=False):
+    """Download all datasets for a specific lab."""
+    resolved = _resolve_lab(lab_number)
+    if resolved is None:
         return False
+    lab_name, lab_path = resolved
+    lab_config = DATASETS[lab_number]
+    manifest = load_dataset_manifest(lab_path)
 
     print(f"\n{'#'*70}")
     print(f"# LAB {lab_number}: {lab_name}")
     print(f"{'#'*70}")
 
-    success_count = 0
+    statuses = []
     for dataset in lab_config["datasets"]:
-        target = lab_path / dataset["target_dir"]
-        if download_dataset(
-            dataset["kaggle_ref"],
-            target,
-            dataset["description"]
-        ):
-            success_count += 1
+        statuses.append(_download_and_record(
+            lab_path, lab_name, dataset, manifest, existing, False, cache_dir, force, parquet
+        ))
 
     # Create manifest
-    create_dataset_manifest(lab_path, lab_name)
+    create_dataset_manifest(lab_path, lab_name, cache_dir)
+
+    return _print_lab_summary(lab_number, statuses)
+
+
+def _timed_download(lab_path, lab_name, dataset, manifest, existing, cache_dir, force, parquet):
+    """Worker body for the parallel mode: download quietly and time it."""
+    _log(f"→ Started: {dataset['description']} ({dataset['kaggle_ref']})")
+    start = time.monotonic()
+    status = _download_and_record(lab_path, lab_name, dataset, manifest, existing, True, cache_dir, force,
+                                  parquet)
+    return status, time.monotonic() - start
+
+
+def download_labs_parallel(lab_numbers, jobs, existing="skip", cache_dir=CACHE_DIR, force=False,
+                           parquet=False):
+    """Download the datasets of several labs with a bounded worker pool.
+
+    Every (lab, dataset) pair becomes one task, so a slow 20GB download in
+    one lab doesn't hold up the small datasets of the others. Prompts are
+    impossible here, so ``existing`` must be "skip" or "overwrite".
+    """
+    tasks = []
+    all_success = True
+    for lab_number in lab_numbers:
+        resolved = _resolve_lab(lab_number)
+        if resolved is None:
+            all_success = False
+            continue
+        lab_name, lab_path = resolved
+        manifest = load_dataset_manifest(lab_path)
+        for dataset in DATASETS[lab_number]["datasets"]:
+            tasks.append((lab_number, lab_name, lab_path, dataset, manifest))
+
+    total = len(tasks)
+    print(f"\nDownloading {total} datasets with {jobs} parallel workers...")
+
+    statuses = {lab_number: [] for lab_number in lab_numbers}
+    results = []
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(_timed_download, lab_path, lab_name, dataset, manifest,
+                        existing, cache_dir, force, parquet): (index, lab_number, dataset)
+            for index, (lab_number, lab_name, lab_path, dataset, manifest) in enumerate(tasks)
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            index, lab_number, dataset = futures[future]
+            status, seconds = future.result()
+            statuses[lab_number].append(status)
+            results.append((index, lab_number, dataset["description"], status, seconds))
+            icon = "❌" if status == "failed" else "⚠️ " if status == "skipped" else "✓"
+            _log(f"[{done}/{total}] {icon} Lab {lab_number}: {dataset['description']} "
+                 f"- {status} in {seconds:.0f}s (elapsed {time.monotonic() - start:.0f}s)")
 
-    total = len(lab_config["datasets"])
     print(f"\n{'='*70}")
-    print(f"Lab {lab_number} Summary: {success_count}/{total} datasets downloaded successfully")
-    print(f"{'='*70}")
+    print("Per-dataset results:")
+    for _, lab_number, description, status, seconds in sorted(results):
+        print(f"  Lab {lab_number}  {status:<10} {seconds:>7.0f}s  {description}")
+
+    for lab_number in lab_numbers:
+        if lab_number not in DATASETS or not statuses[lab_number]:
+            continue
+        lab_name, lab_path = _resolve_lab(lab_number)
+        create_dataset_manifest(lab_path, lab_name, cache_dir)
+        if not _print_lab_summary(lab_number, statuses[lab_number]):
+            all_success = False
 
-    return success_count == total
+    return all_success
+
+
+def verify_lab(lab_number, jobs=1):
+    """Rehash a lab's datasets against its manifest without fetching anything."""
+    resolved = _resolve_lab(lab_number)
+    if resolved is None:
+        return False
+    lab_name, lab_path = resolved
+    manifest = load_dataset_manifest(lab_path)
+
+    print(f"\n{'#'*70}")
+    print(f"# VERIFY LAB {lab_number}: {lab_name}")
+    print(f"{'#'*70}")
+
+    def check(dataset):
+        expected = recorded_files(manifest, dataset["target_dir"])
+        if expected is None:
+            return expected, None
+        return expected, find_stale_files(lab_path / dataset["target_dir"], expected, full=True)
+
+    all_ok = True
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        for dataset, (expected, stale) in zip(DATASETS[lab_number]["datasets"],
+                                              pool.map(check, DATASETS[lab_number]["datasets"]), strict=True):
+            if expected is None:
+                print(f"⚠️  {dataset['description']}: not in manifest (never downloaded?)")
+                all_ok = False
+            elif stale:
+                print(f"❌ {dataset['description']}: {len(stale)} of {len(expected)} files missing or corrupt")
+                for name in stale[:10]:
+                    print(f"     {name}")
+                if len(stale) > 10:
+                    print(f"     ... and {len(stale) - 10} more")
+                all_ok = False
+            else:
+                print(f"✓ {dataset['description']}: {len(expected)} files verified")
+
+    return all_ok
+
+
+def _prune(cache_dir):
+    removed, freed = prune_cache(cache_dir)
+    print(f"\n✓ Pruned {removed} unused cache objects ({freed / (1024 * 1024):,.1f} MB) from {cache_dir}")
 
 
 def main():
@@ -293,6 +1120,15 @@ Examples:
   python download_datasets.py --lab 1      # Download Lab 1 only
   python download_datasets.py --lab 2 3    # Download Labs 2 and 3
   python download_datasets.py --skip-check # Skip Kaggle setup check
+  python download_datasets.py --jobs 4 -y  # 4 parallel downloads, no prompts
+  python download_datasets.py --no-cache   # Per-lab copies, no shared cache
+  python download_datasets.py --verify     # Check files against the manifest
+  python download_datasets.py --force      # Re-download even if up to date
+  python download_datasets.py --prune      # Delete cache objects nothing uses
+  python download_datasets.py --parquet    # Also convert CSVs to Parquet
+
+Datasets recorded in data/raw/dataset_manifest.json are checked on every
+run: intact ones are skipped and damaged ones only re-fetch broken files.
 
 For setup instructions, see: docs/dataset-download-guide.md
         """
@@ -312,38 +1148,150 @@ For setup instructions, see: docs/dataset-download-guide.md
         help="Skip Kaggle API setup verification"
     )
 
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Number of datasets to download concurrently (default: 1)"
+    )
+
+    parser.add_argument(
+        "--yes", "-y",
+        action="store_true",
+        help="Answer yes to all prompts (re-downloads unrecorded datasets that already have files)"
+    )
+
+    parser.add_argument(
+        "--skip-existing",
+        action="store_true",
+        help="Skip unrecorded datasets whose target directory already has files"
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Download straight into each lab instead of linking from the shared cache"
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=CACHE_DIR,
+        help=f"Shared dataset cache location (default: {CACHE_DIR})"
+    )
+
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Rehash downloaded files against the manifest without fetching anything"
+    )
+
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-download datasets even if the manifest says they are up to date"
+    )
+
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="Delete cache objects no dataset uses any more (after downloading, if --lab is given)"
+    )
+
+    parser.add_argument(
+        "--parquet",
+        action="store_true",
+        help="After download, stream CSVs into year/month-partitioned Parquet under data/parquet/ (needs pyarrow)"
+    )
+
     args = parser.parse_args()
 
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
     print("="*70)
     print(" SRX Data Science Labs - Dataset Download Utility")
     print("="*70)
 
-    # Check Kaggle setup
-    if not args.skip_check:
-        if not check_kaggle_setup():
-            print("\n❌ Kaggle API not properly configured. Exiting.")
-            print("   See docs/dataset-download-guide.md for setup instructions")
+    if args.parquet:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("❌ --parquet needs pyarrow. Run from a lab environment (make setup) or pip install pyarrow")
             sys.exit(1)
 
+    if args.verify:
+        labs_to_verify = args.lab or list(DATASETS)
+        all_ok = True
+        for lab_num in labs_to_verify:
+            if not verify_lab(lab_num, args.jobs):
+                all_ok = False
+        print("\n" + "="*70)
+        if all_ok:
+            print("✓ All datasets verified!")
+        else:
+            print("❌ Verification failed. Rerun without --verify to repair.")
+        print("="*70)
+        sys.exit(0 if all_ok else 1)
+
+    if args.prune and not args.lab:
+        _prune(args.cache_dir.absolute())
+        sys.exit(0)
+
+    # Decide up front what to do with already-downloaded datasets; worker
+    # threads and unattended runs have no terminal to prompt on
+    if args.skip_existing:
+        existing = "skip"
+    elif args.yes:
+        existing = "overwrite"
+    else:
+        existing = "ask"
+    if existing == "ask" and (args.jobs > 1 or not sys.stdin.isatty()):
+        print("⚠️  Non-interactive run: existing datasets will be skipped "
+              "(use --yes to re-download them)")
+        existing = "skip"
+
+    # Check Kaggle setup
+    if not args.skip_check and not check_kaggle_setup():
+        print("\n❌ Kaggle API not properly configured. Exiting.")
+        print("   See docs/dataset-download-guide.md for setup instructions")
+        sys.exit(1)
+
     # Determine which labs to download
     if args.lab:
         labs_to_download = args.lab
         print(f"\nDownloading datasets for Lab(s): {', '.join(map(str, labs_to_download))}")
     else:
         labs_to_download = [1, 2, 3, 4, 5]
-        print(f"\nDownloading datasets for all labs (1-5)")
+        print("\nDownloading datasets for all labs (1-5)")
         print("⚠️  Warning: Total download size may exceed 50GB")
         print("   Consider downloading one lab at a time with --lab <number>")
-        response = input("\nContinue? [y/N]: ")
-        if response.lower() != 'y':
-            print("Cancelled.")
-            sys.exit(0)
+        if not args.yes:
+            if not sys.stdin.isatty():
+                print("\n❌ Refusing to download all labs unattended without --yes.")
+                sys.exit(1)
+            response = input("\nContinue? [y/N]: ")
+            if response.lower() != 'y':
+                print("Cancelled.")
+                sys.exit(0)
+
+    cache_dir = None if args.no_cache else args.cache_dir.absolute()
+    if cache_dir is not None:
+        print(f"Using shared dataset cache: {cache_dir}")
 
     # Download labs
-    all_success = True
-    for lab_num in labs_to_download:
-        if not download_lab(lab_num):
-            all_success = False
+    if args.jobs > 1:
+        all_success = download_labs_parallel(labs_to_download, args.jobs, existing, cache_dir,
+                                             args.force, args.parquet)
+    else:
+        all_success = True
+        for lab_num in labs_to_download:
+            if not download_lab(lab_num, existing, cache_dir, args.force, args.parquet):
+                all_success = False
+
+    if args.prune and cache_dir is not None:
+        _prune(cache_dir)
 
     # Final summary
     print("\n" + "="*70)
@@ -358,6 +1306,9 @@ For setup instructions, see: docs/dataset-download-guide.md
     print("2. For large datasets, see data/raw/README.md for filtering instructions")
     print("3. Start with Lab 1: lab-01-nyc-neighborhood-signals/README.md")
 
+    if not all_success:
+        sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
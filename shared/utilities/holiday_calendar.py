@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Holiday Calendar
+Holiday flags, distance to the nearest holiday and holidays-per-stay as
+array lookups, for the public-holidays dataset (fridrichmrtn/public-holidays).
+
+Joining holidays to bookings row by row means scanning the holiday list for
+every booking (or a bookings x holidays cross join). HolidayCalendar does
+that work once per country and day instead:
+
+1. For each country it lays out one slot per day from the first to the last
+   holiday: is-holiday flag, holiday name, days to the next and since the
+   previous holiday, and a running count of holidays (prefix sum).
+2. All countries' tables are concatenated, so a booking's slot is
+   offset[country] + (day - first_day[country]) and a whole column is
+   answered with one fancy-indexing step.
+3. Holidays during a stay are prefix[departure] - prefix[arrival]: O(1) per
+   booking, whatever the stay length.
+
+Days outside a country's table still get exact distances: before the first
+holiday the nearest one is the first, after the last it is the last.
+
+Usage:
+    from shared.utilities.holiday_calendar import HolidayCalendar
+
+    calendar = HolidayCalendar.from_csv("data/raw/holidays/holidays.csv", countries=["PT"])
+    features = calendar.annotate(arrival_dates, "PT", nights=bookings["stays_in_week_nights"]
+                                 + bookings["stays_in_weekend_nights"])              # Lab 3
+    features = calendar.annotate(accidents["Start_Time"], "US")                      # Lab 2
+
+    python holiday_calendar.py data/raw/holidays --country PT --start 2015-01-01 --end 2017-12-31 \\
+        --output data/processed/portugal_holidays.csv
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SECONDS_PER_DAY = 86_400
+_MISSING_DAY = -(1 << 62)
+
+# Column name in the Kaggle file -> our name (first match wins)
+COLUMN_ALIASES = {
+    "country": ["countryRegionCode", "country_code", "countryOrRegion", "country"],
+    "country_name": ["countryOrRegion", "country_name", "country"],
+    "date": ["date", "Date"],
+    "name": ["normalizeHolidayName", "holidayName", "holiday_name", "name", "Name"],
+}
+
+
+def _pick(raw, key):
+    for column in COLUMN_ALIASES[key]:
+        if column in raw.columns:
+            return raw[column]
+    raise KeyError(f"No {key} column among {list(raw.columns)} (expected one of {COLUMN_ALIASES[key]})")
+
+
+def read_holidays(path):
+    """Holiday CSV as country, country_name, date, name (one row per holiday, missing dates dropped)."""
+    raw = pd.read_csv(path, dtype=str)
+    country_name = _pick(raw, "country_name").str.strip()
+    holidays = pd.DataFrame({
+        "country": _pick(raw, "country").str.strip().fillna(country_name),
+        "country_name": country_name,
+        "date": pd.to_datetime(_pick(raw, "date"), format="mixed", errors="coerce").dt.normalize(),
+        "name": _pick(raw, "name").str.strip(),
+    })
+    return holidays.dropna(subset=["country", "date"]).reset_index(drop=True)
+
+
+def find_holidays(raw_dir):
+    matches = sorted(p for p in Path(raw_dir).rglob("*.csv") if "holiday" in p.name.lower())
+    if not matches:
+        raise FileNotFoundError(f"No holiday CSV under {raw_dir}")
+    return matches[0]
+
+
+def to_days(values):
+    """Days since 1970-01-01 as int64 (missing -> -1 << 62).
+
+    Accepts anything pd.to_datetime does, or the int64 epoch seconds from
+    temporal_features.epoch_seconds() (so Lab 2 timestamps are parsed once).
+    """
+    array = np.asarray(values)
+    if array.dtype == np.int64:
+        missing = array == np.iinfo(np.int64).min
+        return np.where(missing, _MISSING_DAY, array // SECONDS_PER_DAY)
+    dates = pd.to_datetime(pd.Series(values), format="mixed", errors="coerce")
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    days = dates.to_numpy(dtype="datetime64[D]").astype(np.int64)
+    return np.where(dates.isna().to_numpy(), _MISSING_DAY, days)
+
+
+class HolidayCalendar:
+    """Per-country, per-day holiday tables with O(1) lookups.
+
+    Countries can be looked up by code ("PT") or name ("Portugal").
+    """
+
+    def __init__(self, holidays, countries=None, start=None, end=None):
+        if countries is not None:
+            wanted = {countries} if isinstance(countries, str) else set(countries)
+            holidays = holidays[holidays["country"].isin(wanted) | holidays["country_name"].isin(wanted)]
+        if start is not None:
+            holidays = holidays[holidays["date"] >= pd.Timestamp(start)]
+        if end is not None:
+            holidays = holidays[holidays["date"] <= pd.Timestamp(end)]
+        if holidays.empty:
+            raise ValueError("No holidays left after filtering")
+
+        # Several holidays on one date share a slot: "Christmas Day / Boxing Day"
+        names = (holidays.drop_duplicates(["country", "date", "name"])
+                 .groupby(["country", "date"], sort=True)["name"]
+                 .agg(lambda n: " / ".join(n.dropna())))
+        self.names = pd.Index(sorted(set(names)))
+        name_codes = self.names.get_indexer(names.to_numpy())
+
+        self.countries = list(names.index.get_level_values("country").unique())
+        self._lookup = {}
+        for code, name in holidays[["country", "country_name"]].drop_duplicates().itertuples(index=False):
+            self._lookup[code] = self.countries.index(code)
+            if isinstance(name, str):
+                self._lookup.setdefault(name, self.countries.index(code))
+
+        holiday_days = names.index.get_level_values("date").to_numpy(dtype="datetime64[D]").astype(np.int64)
+        country_of = pd.Index(self.countries).get_indexer(names.index.get_level_values("country"))
+        bounds = np.searchsorted(country_of, np.arange(len(self.countries) + 1))
+
+        self.first_day = np.empty(len(self.countries), dtype=np.int64)
+        self.last_day = np.empty(len(self.countries), dtype=np.int64)
+        self.offset = np.empty(len(self.countries), dtype=np.int64)
+        # Prefix sums get one extra slot per country (count before the first day)
+        self.prefix_offset = np.empty(len(self.countries), dtype=np.int64)
+        flags, name_code, to_next, since_prev, prefix = [], [], [], [], []
+        size = 0
+        for i in range(len(self.countries)):
+            days = holiday_days[bounds[i]:bounds[i + 1]]
+            first, last = days[0], days[-1]
+            span = np.arange(first, last + 1)
+            position = days - first
+            self.first_day[i], self.last_day[i], self.offset[i] = first, last, size
+            self.prefix_offset[i] = size + i
+
+            flag = np.zeros(len(span), dtype=bool)
+            flag[position] = True
+            codes = np.full(len(span), -1, dtype=np.int32)
+            codes[position] = name_codes[bounds[i]:bounds[i + 1]]
+            following = np.searchsorted(days, span, side="left")           # always < len(days)
+            preceding = np.searchsorted(days, span, side="right") - 1      # always >= 0
+            flags.append(flag)
+            name_code.append(codes)
+            to_next.append(days[following] - span)
+            since_prev.append(span - days[preceding])
+            prefix.append(np.concatenate([[0], np.cumsum(flag)]))
+            size += len(span)
+
+        self.is_holiday = np.concatenate(flags)
+        self.name_code = np.concatenate(name_code)
+        self.days_to_next = np.concatenate(to_next).astype(np.int32)
+        self.days_since_prev = np.concatenate(since_prev).astype(np.int32)
+        self.prefix = np.concatenate(prefix).astype(np.int32)
+
+    @classmethod
+    def from_csv(cls, path, countries=None, start=None, end=None):
+        return cls(read_holidays(path), countries=countries, start=start, end=end)
+
+    def _country_index(self, country, n):
+        if np.ndim(country) == 0:
+            if country not in self._lookup:
+                raise KeyError(f"No holidays for {country!r}; known: {sorted(self._lookup)}")
+            return np.full(n, self._lookup[country], dtype=np.int64)
+        keys = pd.Series(np.asarray(country, dtype=object))
+        index = keys.map(self._lookup)
+        return index.fillna(-1).to_numpy(dtype=np.int64)
+
+    def _slots(self, days, country):
+        """Table slot for each day (clipped into the country's span) and how far it was clipped."""
+        known = country >= 0
+        safe = np.where(known, country, 0)
+        first, last = self.first_day[safe], self.last_day[safe]
+        clipped = np.clip(days, first, last)
+        return safe, self.offset[safe] + (clipped - first), clipped - days, known
+
+    def annotate(self, dates, country, nights=None, index=None):
+        """Holiday features for each date.
+
+        Args:
+            dates: Dates or timestamps (or int64 epoch seconds).
+            country: One country code/name for all rows, or one per row.
+            nights: Optional stay length per row; adds holidays_in_stay, the
+                number of holidays from arrival up to (not including) the
+                departure day.
+            index: Index for the result (default: dates' index if it has one).
+
+        Returns:
+            DataFrame with is_holiday, holiday_name (category),
+            days_to_holiday (signed distance to the nearest holiday: positive
+            = upcoming, negative = just passed, 0 = on it; ties go to the
+            upcoming one), days_to_next, days_since_prev, and holidays_in_stay
+            when nights is given. Missing dates or unknown countries give
+            False / NaN / <NA>.
+        """
+        if index is None and isinstance(dates, pd.Series):
+            index = dates.index
+        days = to_days(dates)
+        country = self._country_index(country, len(days))
+        country, slot, shift, known = self._slots(days, country)
+        valid = known & (days != _MISSING_DAY)
+        inside = valid & (shift == 0)
+
+        # Outside the span the nearest holiday is the first (before) or last (after) one
+        to_next = self.days_to_next[slot] + shift
+        since_prev = self.days_since_prev[slot] - shift
+        has_next = valid & (shift >= 0)
+        has_prev = valid & (shift <= 0)
+        nearest = np.where(has_next & (~has_prev | (to_next <= since_prev)), to_next, -since_prev)
+
+        codes = np.where(inside, self.name_code[slot], -1)
+        out = {
+            "is_holiday": inside & self.is_holiday[slot],
+            "holiday_name": pd.Categorical.from_codes(codes, categories=self.names),
+            "days_to_holiday": pd.array(np.where(valid, nearest, 0), dtype="Int32"),
+            "days_to_next": pd.array(np.where(has_next, to_next, 0), dtype="Int32"),
+            "days_since_prev": pd.array(np.where(has_prev, since_prev, 0), dtype="Int32"),
+        }
+        out["days_to_holiday"][~valid] = pd.NA
+        out["days_to_next"][~has_next] = pd.NA
+        out["days_since_prev"][~has_prev] = pd.NA
+        if nights is not None:
+            nights = pd.to_numeric(pd.Series(np.asarray(nights)), errors="coerce").to_numpy(dtype="float64")
+            stay_ok = valid & ~np.isnan(nights)
+            departure = days + np.where(stay_ok, nights, 0).astype(np.int64)
+            out["holidays_in_stay"] = pd.array(np.where(stay_ok, self.count_between(days, departure, country), 0),
+                                               dtype="Int16")
+            out["holidays_in_stay"][~stay_ok] = pd.NA
+        return pd.DataFrame(out, index=index)
+
+    def count_between(self, start_days, end_days, country):
+        """Holidays on days start <= day < end, per row (country = indices from _country_index)."""
+        first, last = self.first_day[country], self.last_day[country]
+        base = self.prefix_offset[country]
+        start = np.clip(start_days, first, last + 1) - first
+        end = np.clip(np.maximum(end_days, start_days), first, last + 1) - first
+        return self.prefix[base + end] - self.prefix[base + start]
+
+    def daily(self, country, start=None, end=None):
+        """One row per day for one country: the holiday lookup table as a DataFrame."""
+        i = self._country_index(country, 1)[0]
+        start = pd.Timestamp(start) if start else pd.Timestamp(self.first_day[i], unit="D")
+        end = pd.Timestamp(end) if end else pd.Timestamp(self.last_day[i], unit="D")
+        dates = pd.Series(pd.date_range(start, end, freq="D"), name="date")
+        return pd.concat([dates, self.annotate(dates, country).reset_index(drop=True)], axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a per-day holiday calendar for one country")
+    parser.add_argument("holidays", help="Holiday CSV, or a directory holding one")
+    parser.add_argument("--country", required=True, help="Country code or name (PT, Portugal, US, ...)")
+    parser.add_argument("--start", help="First date (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Last date (YYYY-MM-DD)")
+    parser.add_argument("--output", required=True, help="CSV or Parquet file to write")
+    args = parser.parse_args()
+    try:
+        from shared.utilities.stage_metrics import log_beside
+    except ImportError:
+        from stage_metrics import log_beside
+
+    path = Path(args.holidays)
+    path = find_holidays(path) if path.is_dir() else path
+    with log_beside(args.output).stage(f"holiday_calendar {args.country}") as record:
+        calendar = HolidayCalendar.from_csv(path, countries=[args.country])
+        table = calendar.daily(args.country, args.start, args.end)
+        record.set(rows_out=len(table))
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    if output.suffix == ".parquet":
+        table.to_parquet(output, index=False)
+    else:
+        table.to_csv(output, index=False)
+    print(f"✅ {table['is_holiday'].sum():,} holidays over {len(table):,} days -> {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+NOAA GSOD Reader
+Reads only the stations and dates a lab needs from the ~20 GB Global
+Surface Summary of the Day download (noaa/noaa-global-surface-summary-of-the-day).
+
+GSOD is stored as one small file per station and year: legacy
+USAF-WBAN-YYYY.op.gz files (loose or inside gsod_YYYY.tar archives), or
+the newer per-station CSVs in one directory per year. The reader:
+
+1. Indexes the files by station and year from their names alone. Tar
+   archives are scanned once and the byte offset of every member is
+   cached in <weather_dir>/.gsod_index.parquet. Each archive is rescanned
+   only when its size or mtime changes.
+2. Picks stations from isd-history.csv by country, bounding box or an
+   explicit id list, and picks years from the date range. Then it opens
+   only those files. Members are read by seeking to their offset, so the
+   rest of the tar is never read.
+3. Parses each file, keeps rows inside the date range and converts units:
+   temperatures in tenths of °C, precipitation in tenths of mm, snow depth
+   in mm, wind in tenths of m/s, visibility in tenths of km. All values
+   are nullable Int16 (read_gsod() also makes station categorical).
+
+isd-history.csv uses FIPS country codes: "US", but Portugal is "PO".
+
+Usage:
+    python noaa_gsod.py data/raw/weather --country US --start 2016-01-01 --end 2023-12-31 \\
+        --output data/processed/noaa_us.parquet
+    python noaa_gsod.py data/raw/weather --country PO --bbox 36.9 -9.6 42.2 -6.2 --start 2015-07-01 \\
+        --end 2017-08-31 --output data/processed/noaa_portugal.parquet
+
+    from shared.utilities.noaa_gsod import read_gsod
+    weather = read_gsod("data/raw/weather", country="PO", start="2015-07-01", end="2017-08-31")
+"""
+
+import argparse
+import gzip
+import io
+import re
+import tarfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+INDEX_FILE = ".gsod_index.parquet"
+STATION_HISTORY = "isd-history.csv"
+
+# Legacy file names: 010010-99999-2016.op(.gz); new CSVs: <year>/01001099999.csv
+_OP_NAME = re.compile(r"(\d{6})-(\d{5})-(\d{4})\.op(?:\.gz)?$")
+_CSV_NAME = re.compile(r"(\d{6})(\d{5})\.csv$")
+_YEAR = re.compile(r"(?:^|\D)((?:18|19|20)\d{2})(?:\D|$)")
+
+# Missing-value sentinels in both formats
+MISSING = {"TEMP": 9999.9, "DEWP": 9999.9, "MAX": 9999.9, "MIN": 9999.9, "PRCP": 99.99,
+           "SNDP": 999.9, "WDSP": 999.9, "VISIB": 999.9}
+
+# Output column -> (GSOD field, conversion to the stored integer unit)
+CONVERSIONS = {
+    "temp_mean": ("TEMP", lambda f: (f - 32) * 50 / 9),       # °F -> tenths of °C
+    "temp_max": ("MAX", lambda f: (f - 32) * 50 / 9),
+    "temp_min": ("MIN", lambda f: (f - 32) * 50 / 9),
+    "dewpoint": ("DEWP", lambda f: (f - 32) * 50 / 9),
+    "precipitation": ("PRCP", lambda inches: inches * 254),   # inches -> tenths of mm
+    "snow_depth": ("SNDP", lambda inches: inches * 25.4),     # inches -> mm
+    "wind_speed": ("WDSP", lambda knots: knots * 5.14444),    # knots -> tenths of m/s
+    "visibility": ("VISIB", lambda miles: miles * 16.09344),  # miles -> tenths of km
+}
+
+# FRSHTT: one digit per event, in this order
+EVENTS = ["fog", "rain", "snow", "hail", "thunder", "tornado"]
+
+# Whitespace-separated fields of a legacy .op line
+_OP_FIELDS = ["STN", "WBAN", "YEARMODA", "TEMP", "TEMP_N", "DEWP", "DEWP_N", "SLP", "SLP_N", "STP", "STP_N",
+              "VISIB", "VISIB_N", "WDSP", "WDSP_N", "MXSPD", "GUST", "MAX", "MIN", "PRCP", "SNDP", "FRSHTT"]
+
+
+def read_station_history(path):
+    """isd-history.csv as station (USAF-WBAN), name, country, state, lat, lon, elevation_m, begin, end."""
+    raw = pd.read_csv(path, dtype=str)
+    return pd.DataFrame({
+        "station": raw["USAF"] + "-" + raw["WBAN"],
+        "name": raw["STATION NAME"],
+        "country": raw["CTRY"],
+        "state": raw["STATE"],
+        "lat": pd.to_numeric(raw["LAT"], errors="coerce"),
+        "lon": pd.to_numeric(raw["LON"], errors="coerce"),
+        "elevation_m": pd.to_numeric(raw["ELEV(M)"], errors="coerce"),
+        "begin": pd.to_datetime(raw["BEGIN"], format="%Y%m%d", errors="coerce"),
+        "end": pd.to_datetime(raw["END"], format="%Y%m%d", errors="coerce"),
+    })
+
+
+def find_station_history(weather_dir):
+    matches = sorted(Path(weather_dir).rglob(STATION_HISTORY))
+    if not matches:
+        raise FileNotFoundError(f"No {STATION_HISTORY} under {weather_dir} (needed for country/bbox filters)")
+    return matches[0]
+
+
+def select_stations(history, country=None, bbox=None, stations=None, start=None, end=None):
+    """Station ids matching every filter given.
+
+    bbox is (min_lat, min_lon, max_lat, max_lon). start/end drop stations
+    whose BEGIN-END period doesn't overlap the date range.
+    """
+    keep = pd.Series(True, index=history.index)
+    if country is not None:
+        countries = [country] if isinstance(country, str) else list(country)
+        keep &= history["country"].isin(countries)
+    if bbox is not None:
+        min_lat, min_lon, max_lat, max_lon = bbox
+        keep &= history["lat"].between(min_lat, max_lat) & history["lon"].between(min_lon, max_lon)
+    if stations is not None:
+        keep &= history["station"].isin(list(stations))
+    if start is not None:
+        keep &= ~(history["end"] < pd.Timestamp(start))
+    if end is not None:
+        keep &= ~(history["begin"] > pd.Timestamp(end))
+    return set(history.loc[keep, "station"])
+
+
+def _name_key(name):
+    """(station, year) from a GSOD file name, or None."""
+    match = _OP_NAME.search(name)
+    if match:
+        return f"{match[1]}-{match[2]}", int(match[3])
+    match = _CSV_NAME.search(name)
+    if match:
+        years = _YEAR.findall(name)
+        if years:
+            return f"{match[1]}-{match[2]}", int(years[-1])
+    return None
+
+
+def _scan_tar(path):
+    rows = []
+    with tarfile.open(path) as archive:
+        for member in archive:
+            key = member.isfile() and _name_key(member.name)
+            if key:
+                rows.append((*key, str(path), member.name, member.offset_data, member.size))
+    return rows
+
+
+INDEX_COLUMNS = ["station", "year", "source", "member", "offset", "size"]
+
+
+def build_file_index(weather_dir, refresh=False):
+    """One row per station-year file: station, year, source path, tar member, offset, size.
+
+    Loose files are listed on every call (names only). Tar archives are
+    scanned once and cached in INDEX_FILE, keyed on their size and mtime.
+    """
+    weather_dir = Path(weather_dir)
+    index_path = weather_dir / INDEX_FILE
+    cached = {}
+    if index_path.exists() and not refresh:
+        previous = pd.read_parquet(index_path)
+        for (source, signature), rows in previous.groupby(["source", "signature"]):
+            cached[source] = (signature, rows[INDEX_COLUMNS])
+
+    loose, archived, signatures = [], [], {}
+    for path in sorted(weather_dir.rglob("*")):
+        if not path.is_file() or path.name.startswith("."):
+            continue
+        if path.suffix == ".tar":
+            stat = path.stat()
+            signature = f"{stat.st_size}:{stat.st_mtime_ns}"
+            signatures[str(path)] = signature
+            if str(path) in cached and cached[str(path)][0] == signature:
+                archived.append(cached[str(path)][1])
+            else:
+                archived.append(pd.DataFrame(_scan_tar(path), columns=INDEX_COLUMNS))
+        else:
+            key = _name_key(path.relative_to(weather_dir).as_posix())
+            if key:
+                loose.append((*key, str(path), None, 0, path.stat().st_size))
+
+    if archived:
+        tar_index = pd.concat(archived, ignore_index=True)
+        tar_index.assign(signature=tar_index["source"].map(signatures)).to_parquet(index_path, index=False)
+    frames = [frame for frame in [pd.DataFrame(loose, columns=INDEX_COLUMNS), *archived] if len(frame)]
+    if not frames:
+        return pd.DataFrame(columns=INDEX_COLUMNS)
+    return pd.concat(frames, ignore_index=True).sort_values(["station", "year"], ignore_index=True)
+
+
+def _read_bytes(entry):
+    if entry.member is None:
+        data = Path(entry.source).read_bytes()
+    else:
+        with open(entry.source, "rb") as f:
+            f.seek(entry.offset)
+            data = f.read(entry.size)
+    if data[:2] == b"\x1f\x8b":
+        data = gzip.decompress(data)
+    return data
+
+
+def _parse_op(data):
+    raw = pd.read_csv(io.BytesIO(data), sep=r"\s+", skiprows=1, header=None, names=_OP_FIELDS,
+                      dtype=str, usecols=["STN", "WBAN", "YEARMODA", *MISSING, "FRSHTT"])
+    raw["station"] = raw["STN"] + "-" + raw["WBAN"]
+    raw["DATE"] = pd.to_datetime(raw["YEARMODA"], format="%Y%m%d", errors="coerce")
+    return raw
+
+
+def _parse_csv(data):
+    raw = pd.read_csv(io.BytesIO(data), dtype=str, usecols=lambda c: c in {"STATION", "DATE", *MISSING, "FRSHTT"})
+    station = raw["STATION"].str.zfill(11)
+    raw["station"] = station.str[:6] + "-" + station.str[6:]
+    raw["DATE"] = pd.to_datetime(raw["DATE"], format="%Y-%m-%d", errors="coerce")
+    return raw
+
+
+def _convert(raw):
+    """Compact typed frame from parsed GSOD text columns."""
+    raw = raw.reset_index(drop=True)
+    frame = pd.DataFrame({"station": raw["station"].to_numpy(), "date": raw["DATE"].to_numpy()})
+    for column, (field, convert) in CONVERSIONS.items():
+        # Flags trail the number: "75.2*" (MAX/MIN from hourly data), "0.12G" (PRCP report type)
+        values = pd.to_numeric(raw[field].str.rstrip("*ABCDEFGHI"), errors="coerce")
+        values = values.where(values != MISSING[field])
+        frame[column] = np.round(convert(values)).astype("Int16")
+    events = raw["FRSHTT"].fillna("").str.zfill(len(EVENTS))
+    for i, event in enumerate(EVENTS):
+        frame[event] = events.str[i] == "1"
+    return frame
+
+
+def read_file(entry, start=None, end=None):
+    """One station-year file as a compact frame, limited to [start, end]."""
+    data = _read_bytes(entry)
+    raw = _parse_csv(data) if data.lstrip()[:1] == b'"' or data[:7] == b"STATION" else _parse_op(data)
+    if start is not None:
+        raw = raw[raw["DATE"] >= pd.Timestamp(start)]
+    if end is not None:
+        raw = raw[raw["DATE"] <= pd.Timestamp(end)]
+    return _convert(raw)
+
+
+def select_files(weather_dir, country=None, bbox=None, stations=None, start=None, end=None, refresh_index=False):
+    """The file index rows that can hold data for the given station and date filters."""
+    index = build_file_index(weather_dir, refresh=refresh_index)
+    if country is not None or bbox is not None:
+        history = read_station_history(find_station_history(weather_dir))
+        wanted = select_stations(history, country, bbox, stations, start, end)
+        index = index[index["station"].isin(wanted)]
+    elif stations is not None:
+        index = index[index["station"].isin(list(stations))]
+    if start is not None:
+        index = index[index["year"] >= pd.Timestamp(start).year]
+    if end is not None:
+        index = index[index["year"] <= pd.Timestamp(end).year]
+    return index.reset_index(drop=True)
+
+
+def iter_gsod(weather_dir, country=None, bbox=None, stations=None, start=None, end=None, batch_files=500):
+    """Yield compact frames covering batch_files station-year files each."""
+    files = select_files(weather_dir, country, bbox, stations, start, end)
+    for first in range(0, len(files), batch_files):
+        parts = [read_file(entry, start, end) for entry in files.iloc[first:first + batch_files].itertuples()]
+        parts = [part for part in parts if len(part)]
+        if parts:
+            yield pd.concat(parts, ignore_index=True)
+
+
+def _finish(frame):
+    frame["station"] = frame["station"].astype("category")
+    return frame.sort_values(["station", "date"], ignore_index=True)
+
+
+def read_gsod(weather_dir, country=None, bbox=None, stations=None, start=None, end=None):
+    """Daily observations for the matching stations and dates (see module docstring for units)."""
+    batches = list(iter_gsod(weather_dir, country, bbox, stations, start, end))
+    if not batches:
+        return _finish(_convert(pd.DataFrame(columns=["station", "DATE", *MISSING, "FRSHTT"], dtype=str)))
+    return _finish(pd.concat(batches, ignore_index=True))
+
+
+def write_extract(weather_dir, output, country=None, bbox=None, stations=None, start=None, end=None):
+    """Stream the matching observations into one Parquet file; returns the row count."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    staging = output.with_name(f".{output.name}.tmp")
+    writer = None
+    rows = 0
+    try:
+        for batch in iter_gsod(weather_dir, country, bbox, stations, start, end):
+            table = pa.Table.from_pandas(batch, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(staging, table.schema, compression="zstd")
+            writer.write_table(table.cast(writer.schema))
+            rows += len(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        read_gsod(weather_dir, stations=[]).to_parquet(staging, index=False)
+    staging.replace(output)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract NOAA GSOD stations and dates to Parquet")
+    parser.add_argument("weather_dir", help="Directory holding the GSOD download (and isd-history.csv)")
+    parser.add_argument("--country", nargs="+", help="FIPS country codes from isd-history.csv (US, PO, ...)")
+    parser.add_argument("--bbox", nargs=4, type=float, metavar=("MIN_LAT", "MIN_LON", "MAX_LAT", "MAX_LON"))
+    parser.add_argument("--stations", nargs="+", help="Station ids (USAF-WBAN)")
+    parser.add_argument("--start", help="First date (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Last date (YYYY-MM-DD)")
+    parser.add_argument("--output", required=True, help="Parquet file to write")
+    args = parser.parse_args()
+    try:
+        from shared.utilities.stage_metrics import log_beside
+    except ImportError:
+        from stage_metrics import log_beside
+
+    files = select_files(args.weather_dir, args.country, args.bbox, args.stations, args.start, args.end)
+    print(f"📂 {len(files):,} station-year files match ({files['size'].sum() / 1e6:,.1f} MB to read)")
+    with log_beside(args.output).stage("noaa_extract", files=len(files)) as record:
+        rows = write_extract(args.weather_dir, args.output, args.country, args.bbox, args.stations, args.start,
+                             args.end)
+        record.set(rows_out=rows)
+    print(f"✅ Wrote {rows:,} daily observations to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
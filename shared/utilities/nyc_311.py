@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+NYC 311 Scanner
+One pass over the ~10 GB, 23M-row 311 download (Labs 1 and 5) that keeps
+only the complaints a taxonomy cares about and returns counts per
+borough x month (or day) x category.
+
+Reading everything with pd.read_csv and filtering afterwards parses all 41
+columns of every row. This scanner:
+
+1. Reads four columns (Created Date, Borough, Complaint Type, Descriptor)
+   with pyarrow. A Parquet conversion from csv_to_parquet.py is used when
+   present. The type and borough columns are dictionary-encoded, so each
+   batch carries ~200 distinct labels plus small integer codes.
+2. Compiles the taxonomy into lookup arrays over those labels. Each label
+   is normalized and matched once per batch, and every row then takes its
+   category with one array lookup. Descriptor rules ("Noise - Vehicle" /
+   "Engine Idling") are resolved per distinct (type, descriptor) pair.
+3. Drops rows outside the taxonomy before any date parsing or pandas
+   conversion. Parquet input filters inside the dataset scan (complaint
+   type, plus the year partition), so pruned files are never decoded.
+4. Counts the kept rows straight into borough x period x category cells.
+
+Given a StageCache (a lab's src.stage_cache.open_cache()), the result is
+cached and keyed on the 311 files, the taxonomy and the year. Reruns then
+take under a second.
+
+Usage:
+    python nyc_311.py data/raw/311_requests --year 2019 --output data/processed/nuisance_borough_month.csv
+    python nyc_311.py data/raw/311_requests --year 2019 --freq day --output data/processed/nuisance_borough_daily.csv
+    python nyc_311.py data/raw/311_requests --write-taxonomy data/processed/nuisance_taxonomy.csv
+
+    from shared.utilities.nyc_311 import scan_311
+    counts = scan_311("data/raw/311_requests", year=2019, cache=open_cache())
+"""
+
+import argparse
+import inspect
+import time
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import pyarrow.dataset as ds
+
+BOROUGHS = ["Manhattan", "Brooklyn", "Queens", "Bronx", "Staten Island"]
+
+DATE_COLUMN = "Created Date"
+BOROUGH_COLUMN = "Borough"
+TYPE_COLUMN = "Complaint Type"
+DESCRIPTOR_COLUMN = "Descriptor"
+COLUMNS = [DATE_COLUMN, BOROUGH_COLUMN, TYPE_COLUMN, DESCRIPTOR_COLUMN]
+
+# Any descriptor of the complaint type
+ANY = "*"
+
+# Lab 5 Exercise 4, Task 4.4: (category, complaint type, descriptor)
+NUISANCE_TAXONOMY = [
+    ("Traffic Noise", "Noise - Street/Sidewalk", "Car/Truck Horn"),
+    ("Traffic Noise", "Noise - Street/Sidewalk", "Car/Truck Music"),
+    ("Traffic Noise", "Noise - Street/Sidewalk", "Engine Idling"),
+    ("Traffic Noise", "Noise - Vehicle", "Car/Truck Horn"),
+    ("Traffic Noise", "Noise - Vehicle", "Car/Truck Music"),
+    ("Traffic Noise", "Noise - Vehicle", "Engine Idling"),
+    ("Illegal Parking", "Illegal Parking", ANY),
+    ("Blocked Access", "Blocked Driveway", ANY),
+    ("Traffic Issues", "Traffic Signal Condition", ANY),
+    ("Traffic Issues", "Traffic", ANY),
+    ("Traffic Issues", "Street Condition", ANY),
+]
+
+# CSV bytes per pyarrow block (one batch); peak memory is a few blocks
+BLOCK_BYTES = 64 * 1024 * 1024
+
+
+def taxonomy_table(rules=NUISANCE_TAXONOMY):
+    """The taxonomy as a category, complaint_type, descriptor table (Task 4.4's nuisance_taxonomy.csv)."""
+    return pd.DataFrame(rules, columns=["category", "complaint_type", "descriptor"])
+
+
+def read_taxonomy(path):
+    table = pd.read_csv(path, dtype=str).fillna({"descriptor": ANY})
+    return list(table[["category", "complaint_type", "descriptor"]].itertuples(index=False, name=None))
+
+
+def _normalize(label):
+    return " ".join(str(label).split()).lower()
+
+
+class Taxonomy:
+    """Complaint type / descriptor rules compiled for lookups over dictionary labels.
+
+    categories[code] is the category name for code 0, 1, ...; other, when
+    given, is an extra category that takes every unmatched row (so nothing
+    is dropped).
+    """
+
+    def __init__(self, rules=NUISANCE_TAXONOMY, other=None):
+        self.rules = [tuple(rule) for rule in rules]
+        self.categories = list(dict.fromkeys(category for category, _, _ in self.rules))
+        if other is not None:
+            self.categories.append(other)
+        self.other = -1 if other is None else len(self.categories) - 1
+        self.by_type = {}         # type -> code for ANY-descriptor rules
+        self.by_pair = {}         # (type, descriptor) -> code
+        for category, complaint_type, descriptor in self.rules:
+            code = self.categories.index(category)
+            if descriptor == ANY:
+                self.by_type[_normalize(complaint_type)] = code
+            else:
+                self.by_pair[_normalize(complaint_type), _normalize(descriptor)] = code
+        self.pair_types = {complaint_type for complaint_type, _ in self.by_pair}
+        self.types = sorted({complaint_type for _, complaint_type, _ in self.rules})
+
+    def type_codes(self, labels):
+        """Per label: category code from ANY rules (or other / -1), and whether descriptors decide."""
+        normalized = [_normalize(label) for label in labels]
+        codes = np.array([self.by_type.get(label, self.other) for label in normalized] + [self.other],
+                         dtype=np.int16)
+        by_descriptor = np.array([label in self.pair_types for label in normalized] + [False])
+        return codes, by_descriptor
+
+    def pair_codes(self, type_labels, descriptor_labels, fallback):
+        """Category code for each (type, descriptor) label pair; fallback where no pair rule matches."""
+        return np.array([self.by_pair.get((_normalize(t), _normalize(d)), f)
+                         for t, d, f in zip(type_labels, descriptor_labels, fallback, strict=True)], dtype=np.int16)
+
+    def fingerprint(self):
+        return {"rules": sorted(self.rules), "other": self.categories[self.other] if self.other >= 0 else None}
+
+
+# --- Column decoding -------------------------------------------------------------
+
+def _dictionary(column):
+    """(labels, int64 codes with nulls -> len(labels)) for a dictionary or plain string column."""
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks()
+    if not pa.types.is_dictionary(column.type):
+        column = column.dictionary_encode()
+    labels = column.dictionary.to_pylist()
+    codes = column.indices.to_numpy(zero_copy_only=False)
+    codes = np.where(column.indices.is_null().to_numpy(zero_copy_only=False), len(labels), codes)
+    return labels, codes.astype(np.int64)
+
+
+def _borough_lookup(labels):
+    names = pd.Index([str(label).strip().title() for label in labels])
+    return np.append(pd.Index(BOROUGHS).get_indexer(names), -1)
+
+
+def _digits(chars, start, width):
+    value = np.zeros(len(chars), dtype=np.int64)
+    for i in range(start, start + width):
+        value = value * 10 + chars[:, i]
+    return value
+
+
+def _dates(column):
+    """(year, month, day) int arrays; "MM/DD/YYYY ..." and "YYYY-MM-DD..." text or timestamps. Bad -> 0."""
+    if pa.types.is_timestamp(column.type) or pa.types.is_date(column.type):
+        return tuple(getattr(pc, part)(column).to_numpy(zero_copy_only=False).astype(np.float64)
+                     for part in ("year", "month", "day"))
+    values = pd.Series(column.to_numpy(zero_copy_only=False), dtype=object)
+    text = values.to_numpy(dtype=object, na_value="").astype("U10")
+    chars = text.view(np.uint32).reshape(len(text), 10).astype(np.int64) - ord("0")
+    digits = (chars >= 0) & (chars <= 9)
+    mdy = digits[:, [0, 1, 3, 4, 6, 7, 8, 9]].all(axis=1) & (chars[:, 2] == ord("/") - ord("0")) \
+        & (chars[:, 5] == ord("/") - ord("0"))
+    ymd = digits[:, [0, 1, 2, 3, 5, 6, 8, 9]].all(axis=1) & (chars[:, 4] == ord("-") - ord("0")) \
+        & (chars[:, 7] == ord("-") - ord("0"))
+    year = np.where(mdy, _digits(chars, 6, 4), np.where(ymd, _digits(chars, 0, 4), 0)).astype(np.float64)
+    month = np.where(mdy, _digits(chars, 0, 2), np.where(ymd, _digits(chars, 5, 2), 0)).astype(np.float64)
+    day = np.where(mdy, _digits(chars, 3, 2), np.where(ymd, _digits(chars, 8, 2), 0)).astype(np.float64)
+    fallback = ~(mdy | ymd) & values.notna().to_numpy()
+    if fallback.any():
+        parsed = pd.to_datetime(values[fallback], format="mixed", errors="coerce")
+        for array, part in ((year, "year"), (month, "month"), (day, "day")):
+            array[fallback] = getattr(parsed.dt, part).to_numpy(dtype="float64", na_value=0)
+    return year, month, day
+
+
+# --- Reading -----------------------------------------------------------------------
+
+def find_311_source(raw_dir, parquet_dir=None):
+    """("parquet", table dir) for a csv_to_parquet conversion if there is one, else ("csv", largest CSV)."""
+    if parquet_dir is not None and Path(parquet_dir).is_dir():
+        tables = [p.parent for p in Path(parquet_dir).glob("*/_source.json")]
+        if tables:
+            return "parquet", max(tables, key=lambda t: sum(f.stat().st_size for f in t.rglob("*.parquet")))
+    path = Path(raw_dir)
+    if path.is_file():
+        return "csv", path
+    csvs = list(path.rglob("*.csv"))
+    if not csvs:
+        raise FileNotFoundError(f"No 311 CSV under {raw_dir}. Run: python ../shared/utilities/download_datasets.py")
+    return "csv", max(csvs, key=lambda p: p.stat().st_size)
+
+
+def _csv_batches(path, block_bytes):
+    header = pv.open_csv(path, read_options=pv.ReadOptions(block_size=1 << 20)).schema.names
+    missing = [c for c in COLUMNS if c not in header]
+    if missing:
+        raise KeyError(f"{path} has no {', '.join(missing)} column")
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    reader = pv.open_csv(
+        path,
+        read_options=pv.ReadOptions(block_size=block_bytes),
+        convert_options=pv.ConvertOptions(
+            include_columns=COLUMNS,
+            column_types={DATE_COLUMN: pa.string(), BOROUGH_COLUMN: dictionary, TYPE_COLUMN: dictionary,
+                          DESCRIPTOR_COLUMN: dictionary},
+            strings_can_be_null=True,
+        ),
+    )
+    yield from reader
+
+
+def _parquet_batches(path, taxonomy, year):
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    condition = None
+    if taxonomy.other < 0:
+        # Normalized in the scan too, so "NOISE - VEHICLE " still matches
+        labels = sorted({_normalize(t) for t in taxonomy.types})
+        condition = pc.is_in(pc.utf8_lower(pc.utf8_trim_whitespace(pc.field(TYPE_COLUMN))), pa.array(labels))
+    if year is not None and "year" in dataset.schema.names:
+        by_year = pc.field("year") == year
+        condition = by_year if condition is None else condition & by_year
+    yield from dataset.to_batches(columns=COLUMNS, filter=condition)
+
+
+def iter_categorized(source, taxonomy=None, year=None, block_bytes=BLOCK_BYTES):
+    """Yield (year, month, day, borough index, category code) arrays for each batch's kept rows.
+
+    Rows with no category (unless taxonomy.other is set), no NYC borough, or
+    outside year are dropped.
+    """
+    taxonomy = taxonomy or Taxonomy()
+    kind, path = source
+    batches = _parquet_batches(path, taxonomy, year) if kind == "parquet" else _csv_batches(path, block_bytes)
+    # Batches usually share their dictionaries, so each lookup is built once
+    type_lookups, borough_lookups = {}, {}
+    for batch in batches:
+        type_labels, type_index = _dictionary(batch.column(TYPE_COLUMN))
+        lookup_key = tuple(type_labels)
+        if lookup_key not in type_lookups:
+            type_lookups[lookup_key] = taxonomy.type_codes(type_labels)
+        codes, by_descriptor = type_lookups[lookup_key]
+        category = codes[type_index]  # a copy, so the cached codes are untouched
+
+        decide = by_descriptor[type_index]
+        if decide.any():
+            descriptor_labels, descriptor_index = _dictionary(batch.column(DESCRIPTOR_COLUMN))
+            pair = type_index[decide] * (len(descriptor_labels) + 1) + descriptor_index[decide]
+            pairs, inverse = np.unique(pair, return_inverse=True)
+            type_of, descriptor_of = np.divmod(pairs, len(descriptor_labels) + 1)
+            descriptor_labels = descriptor_labels + [None]
+            resolved = taxonomy.pair_codes([type_labels[t] for t in type_of],
+                                           [descriptor_labels[d] for d in descriptor_of], codes[type_of])
+            category[decide] = resolved[inverse]
+
+        borough_labels, borough_index = _dictionary(batch.column(BOROUGH_COLUMN))
+        lookup_key = tuple(borough_labels)
+        if lookup_key not in borough_lookups:
+            borough_lookups[lookup_key] = _borough_lookup(borough_labels)
+        borough = borough_lookups[lookup_key][borough_index]
+        keep = (category >= 0) & (borough >= 0)
+        if not keep.any():
+            continue
+        years, months, days = _dates(batch.column(DATE_COLUMN).filter(pa.array(keep)))
+        in_range = (months >= 1) & (years == year if year is not None else years > 0)
+        yield (years[in_range].astype(np.int64), months[in_range].astype(np.int64), days[in_range].astype(np.int64),
+               borough[keep][in_range], category[keep][in_range].astype(np.int64))
+
+
+# --- Aggregation ---------------------------------------------------------------------
+
+def count_311(source, taxonomy=None, year=None, freq="month", block_bytes=BLOCK_BYTES):
+    """Complaint counts per borough x period x category, zero cells omitted.
+
+    freq="month" gives a year_month column ("2019-01"); freq="day" a date column.
+    """
+    taxonomy = taxonomy or Taxonomy()
+    n_cells = len(BOROUGHS) * len(taxonomy.categories)
+    partials = []
+    for years, months, days, borough, category in iter_categorized(source, taxonomy, year, block_bytes):
+        if freq == "day":
+            first_of_month = ((years - 1970) * 12 + months - 1).astype("datetime64[M]").astype("datetime64[D]")
+            period = first_of_month.astype(np.int64) + days - 1
+        else:
+            period = years * 12 + months - 1
+        key = period * n_cells + borough * len(taxonomy.categories) + category
+        partials.append(np.unique(key, return_counts=True))
+
+    keys = np.concatenate([keys for keys, _ in partials] or [np.empty(0, dtype=np.int64)])
+    counts = np.concatenate([counts for _, counts in partials] or [np.empty(0, dtype=np.int64)])
+    keys, position = np.unique(keys, return_inverse=True)
+    counts = np.bincount(position, weights=counts, minlength=len(keys)).astype(np.int64)
+
+    period, cell = np.divmod(keys, n_cells)
+    borough, category = np.divmod(cell, len(taxonomy.categories))
+    frame = pd.DataFrame({
+        "borough": pd.Categorical.from_codes(borough, categories=BOROUGHS),
+        "category": pd.Categorical.from_codes(category, categories=taxonomy.categories),
+        "complaints": counts,
+    })
+    if freq == "day":
+        frame.insert(1, "date", period.astype("datetime64[D]").astype("datetime64[s]"))
+    else:
+        frame.insert(1, "year_month", [f"{p // 12}-{p % 12 + 1:02d}" for p in period])
+    return frame.sort_values(list(frame.columns[:3])).reset_index(drop=True)
+
+
+def scan_311(raw_dir, taxonomy=None, year=None, freq="month", parquet_dir=None, cache=None):
+    """count_311 over the 311 data under raw_dir, cached in cache (a StageCache) when given."""
+    taxonomy = taxonomy or Taxonomy()
+    source = find_311_source(raw_dir, parquet_dir)
+    if cache is None:
+        return count_311(source, taxonomy, year, freq)
+
+    stage = "nyc_311_counts"
+    key = cache.fingerprint(stage, count_311, datasets=[source[1]], params={
+        "taxonomy": taxonomy.fingerprint(), "year": year, "freq": freq,
+        "code": [inspect.getsource(func) for func in (iter_categorized, _dates, Taxonomy)],
+    })
+    outputs = cache.load(stage, key)
+    if outputs is None:
+        outputs = {"counts": count_311(source, taxonomy, year, freq)}
+        cache.store(stage, key, outputs, params={"year": year, "freq": freq})
+    return outputs["counts"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count taxonomy complaints in NYC 311 per borough and month/day")
+    parser.add_argument("raw_dir", help="311 CSV, or a directory holding it (data/raw/311_requests)")
+    parser.add_argument("--parquet-dir", help="csv_to_parquet output for 311 (used instead of the CSV if present)")
+    parser.add_argument("--year", type=int, help="Keep only complaints created in this year")
+    parser.add_argument("--freq", choices=["month", "day"], default="month")
+    parser.add_argument("--taxonomy", help="category,complaint_type,descriptor CSV (default: Lab 5 nuisance taxonomy)")
+    parser.add_argument("--other", help="Count unmatched complaints under this category instead of dropping them")
+    parser.add_argument("--write-taxonomy", help="Write the taxonomy CSV here and exit")
+    parser.add_argument("--output", help="CSV file for the counts")
+    args = parser.parse_args()
+
+    rules = read_taxonomy(args.taxonomy) if args.taxonomy else NUISANCE_TAXONOMY
+    if args.write_taxonomy:
+        taxonomy_table(rules).to_csv(args.write_taxonomy, index=False)
+        print(f"✅ {len(rules)} rules -> {args.write_taxonomy}")
+        return
+
+    scan = partial(scan_311, args.raw_dir, Taxonomy(rules, other=args.other), year=args.year, freq=args.freq,
+                   parquet_dir=args.parquet_dir)
+    start = time.perf_counter()
+    if args.output:
+        try:
+            from shared.utilities.stage_metrics import log_beside
+        except ImportError:
+            from stage_metrics import log_beside
+
+        with log_beside(args.output).stage("311_taxonomy") as record:
+            counts = scan()
+            record.set(rows_out=len(counts))
+    else:
+        counts = scan()
+    print(f"⏱️  {counts['complaints'].sum():,} complaints in {len(counts):,} cells ({time.perf_counter() - start:.1f}s)")
+    print(counts.groupby("category", observed=True)["complaints"].sum().to_string())
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        counts.to_csv(args.output, index=False)
+        print(f"✅ Saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
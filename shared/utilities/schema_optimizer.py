@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Schema Optimizer
+Compact dtypes for the large lab tables. The dtypes are chosen once from a
+sample and then applied to every chunk of a stream.
+
+pd.read_csv stores every text column as Python strings and every number in
+8 bytes. The 311, NYPD and accidents tables are mostly low-cardinality text
+(Borough, Complaint Type, Weather_Condition, State), flags, timestamps and
+numbers that don't need float64, so a default frame is typically 3-5x larger
+than it has to be. CompactSchema profiles a sample and picks per column:
+
+    category   text with at most MAX_CATEGORIES distinct values (and no more
+               than CATEGORY_SHARE of the rows): a CategoricalDtype holding
+               the sample's category list
+    boolean    text that is only true/false, yes/no, y/n or t/f
+    datetime   text that parses with one of DATE_FORMATS
+    Int8-64    integers, as nullable Int in the smallest width that holds the
+               sample's range
+    float32    floats that survive float32 at the sample's decimal precision
+    keep       everything else: IDs, free text, high-precision floats
+
+Every chunk is converted to exactly these dtypes. Chunks therefore
+concatenate without falling back to object, and downstream code sees one
+schema for the whole stream:
+
+    schema = CompactSchema.from_csv(path, columns=["Borough", "Complaint Type", "Created Date"])
+    requests = pd.concat(schema.read_csv(path), ignore_index=True)
+
+A value the sample didn't cover never changes a dtype halfway through a
+stream, and never stops it:
+- Category values outside the list map to the `other` category ("Other" by
+  default; other=None makes them missing instead).
+- Unknown flags become NA and unparseable dates NaT.
+- Integers outside the chosen range, fractions in an integer column and text
+  in a number column become missing. Integer columns are always nullable, so
+  a gap the sample didn't have fits too.
+- Every such value is counted per column in schema.unseen. If the counts
+  matter, profile a larger sample or pin the column with dtypes=.
+
+Usage:
+    python schema_optimizer.py data/raw/311_requests/311_Service_Requests.csv
+    python schema_optimizer.py US_Accidents.csv --columns State Weather_Condition Start_Time --stream
+"""
+
+import argparse
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# Rows read by from_csv to choose the dtypes
+SAMPLE_ROWS = 200_000
+
+# Rows per chunk for read_csv
+CHUNK_ROWS = 500_000
+
+# Text becomes categorical with at most this many values, covering at most this share of the rows
+MAX_CATEGORIES = 1_000
+CATEGORY_SHARE = 0.5
+
+FLAG_VALUES = {"true": True, "false": False, "t": True, "f": False,
+               "yes": True, "no": False, "y": True, "n": False}
+
+# Date layouts in the lab datasets (311 and NYPD use US-style dates), tried in order
+DATE_FORMATS = ["%m/%d/%Y %I:%M:%S %p", "%m/%d/%Y %H:%M:%S", "%m/%d/%Y", "ISO8601"]
+
+INT_TYPES = [np.int8, np.int16, np.int32, np.int64]
+
+# Floats with more decimals than this keep float64
+MAX_DECIMALS = 6
+
+# Category that values outside a profiled category list map to
+OTHER = "Other"
+
+# Kinds read as text by read_csv and converted by apply()
+TEXT_KINDS = {"category", "flag", "datetime"}
+
+MB = 1024 * 1024
+
+
+# --- Profiling -------------------------------------------------------------
+
+def _date_format(text):
+    """The first DATE_FORMATS entry that parses every value, or None."""
+    first = text.iloc[0]
+    if len(first) < 8 or not first[:1].isdigit() or not any(sep in first for sep in "/-"):
+        return None
+    for fmt in DATE_FORMATS:
+        if pd.to_datetime(text, format=fmt, errors="coerce").notna().all():
+            return fmt
+    return None
+
+
+def _int_rule(present):
+    # Always nullable: a later chunk may have gaps (or unseen values) the sample didn't
+    if present.empty:
+        return {"kind": "keep", "dtype": np.dtype("float64")}
+    low, high = int(present.min()), int(present.max())
+    width = next(t for t in INT_TYPES if np.iinfo(t).min <= low and high <= np.iinfo(t).max)
+    return {"kind": "int", "dtype": pd.api.types.pandas_dtype(np.dtype(width).name.capitalize())}
+
+
+def _float_rule(present):
+    values = present.to_numpy(dtype=np.float64)
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return {"kind": "float", "dtype": np.dtype("float32")}
+    for decimals in range(MAX_DECIMALS + 1):
+        if np.allclose(np.round(values, decimals), values, rtol=1e-12, atol=0):
+            narrowed = values.astype(np.float32).astype(np.float64)
+            if np.allclose(np.round(narrowed, decimals), values, rtol=1e-12, atol=0):
+                return {"kind": "float", "dtype": np.dtype("float32")}
+            break
+    return {"kind": "keep", "dtype": np.dtype("float64")}
+
+
+def _text_rule(values, present, max_categories):
+    text = present.astype(str)
+    uniques = text.unique()
+    if len(uniques) == 0:
+        return {"kind": "keep", "dtype": values.dtype}
+    if len(uniques) <= len(FLAG_VALUES) and all(u.strip().lower() in FLAG_VALUES for u in uniques):
+        return {"kind": "flag", "dtype": pd.BooleanDtype()}
+    fmt = _date_format(text)
+    if fmt is not None:
+        dtype = pd.to_datetime(text.iloc[:1], format=fmt).dtype
+        return {"kind": "datetime", "dtype": dtype, "format": fmt}
+    if len(uniques) <= max_categories and len(uniques) <= CATEGORY_SHARE * len(text):
+        return {"kind": "category", "dtype": pd.CategoricalDtype(sorted(uniques))}
+    return {"kind": "keep", "dtype": values.dtype}
+
+
+def infer_rule(values, max_categories=MAX_CATEGORIES):
+    """The compact dtype rule for one sample column ({"kind", "dtype"[, "format"]})."""
+    present = values.dropna()
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return {"kind": "category", "dtype": pd.CategoricalDtype(values.cat.categories)}
+    if pd.api.types.is_bool_dtype(values):
+        return {"kind": "flag", "dtype": pd.BooleanDtype()}
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return {"kind": "datetime", "dtype": values.dtype, "format": None}
+    if pd.api.types.is_integer_dtype(values):
+        return _int_rule(present)
+    if pd.api.types.is_float_dtype(values):
+        return _float_rule(present)
+    if pd.api.types.is_string_dtype(values) or values.dtype == object:
+        return _text_rule(values, present, max_categories)
+    return {"kind": "keep", "dtype": values.dtype}
+
+
+def pin_rule(dtype):
+    """Rule for a dtype given by the caller instead of inferred."""
+    dtype = pd.api.types.pandas_dtype(dtype)
+    if isinstance(dtype, pd.CategoricalDtype):
+        return {"kind": "category", "dtype": dtype}
+    if pd.api.types.is_bool_dtype(dtype):
+        return {"kind": "flag", "dtype": dtype}
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return {"kind": "datetime", "dtype": dtype, "format": None}
+    if pd.api.types.is_integer_dtype(dtype):
+        if isinstance(dtype, np.dtype):
+            dtype = pd.api.types.pandas_dtype(dtype.name.capitalize())
+        return {"kind": "int", "dtype": dtype}
+    return {"kind": "float" if pd.api.types.is_float_dtype(dtype) else "keep", "dtype": dtype}
+
+
+def memory_report(before, after):
+    """Deep memory per column before and after compaction (MB), with a TOTAL row."""
+    old = before.memory_usage(deep=True, index=False)
+    new = after.memory_usage(deep=True, index=False).reindex(old.index)
+    report = pd.DataFrame({
+        "dtype_before": before.dtypes.astype(str),
+        "dtype_after": after.dtypes.reindex(old.index).astype(str),
+        "mb_before": old / MB,
+        "mb_after": new / MB,
+    })
+    report.loc["TOTAL"] = ["", "", report["mb_before"].sum(), report["mb_after"].sum()]
+    report["saved_mb"] = report["mb_before"] - report["mb_after"]
+    report["ratio"] = report["mb_before"] / report["mb_after"]
+    return report.rename_axis("column").round(2)
+
+
+# --- Schema ----------------------------------------------------------------
+
+class CompactSchema:
+    """Per-column compact dtypes, fixed once and applied to every chunk.
+
+    rules maps column -> {"kind", "dtype"} (plus "format" for parsed dates).
+    Columns not in rules pass through apply() unchanged. unseen counts, per
+    column, the values that fell outside the schema and became `other` or
+    missing.
+    """
+
+    def __init__(self, rules, other=OTHER):
+        self.rules = rules
+        self.other = other
+        self.unseen = Counter()
+
+    @classmethod
+    def profile(cls, sample, max_categories=MAX_CATEGORIES, other=OTHER, dtypes=None):
+        """Choose the dtypes from a sample DataFrame.
+
+        Args:
+            sample: Rows as read (pd.read_csv defaults, or a Parquet batch).
+            max_categories: Most distinct values a text column can have to become categorical.
+            other: Category that unseen category values map to; None makes them missing.
+            dtypes: {column: dtype} pinned instead of inferred (numpy ints become nullable).
+        """
+        dtypes = dtypes or {}
+        rules = {}
+        for name, values in sample.items():
+            rule = pin_rule(dtypes[name]) if name in dtypes else infer_rule(values, max_categories)
+            if rule["kind"] == "category" and other is not None and other not in rule["dtype"].categories:
+                rule["dtype"] = pd.CategoricalDtype([*rule["dtype"].categories, other])
+            rules[name] = rule
+        return cls(rules, other=other)
+
+    @classmethod
+    def from_csv(cls, path, columns=None, sample_rows=SAMPLE_ROWS, **kwargs):
+        """Profile the first sample_rows rows of a CSV (kwargs go to profile())."""
+        return cls.profile(pd.read_csv(path, usecols=columns, nrows=sample_rows), **kwargs)
+
+    @property
+    def dtypes(self):
+        return pd.Series({name: rule["dtype"] for name, rule in self.rules.items()}, dtype=object)
+
+    def read_dtypes(self):
+        """dtype= for pd.read_csv: text the schema converts is read as str, so every chunk starts alike."""
+        return {name: "str" for name, rule in self.rules.items()
+                if rule["kind"] in TEXT_KINDS or (rule["kind"] == "keep" and not pd.api.types.is_numeric_dtype(
+                    rule["dtype"]))}
+
+    def read_csv(self, path, chunk_rows=CHUNK_ROWS, **kwargs):
+        """Yield compacted chunks of the schema's columns (kwargs go to pd.read_csv)."""
+        for chunk in pd.read_csv(path, usecols=list(self.rules), dtype=self.read_dtypes(), chunksize=chunk_rows,
+                                 **kwargs):
+            yield self.apply(chunk)
+
+    def apply(self, chunk):
+        """chunk with every column in the schema converted to its dtype."""
+        return pd.DataFrame({name: values if name not in self.rules else self._convert(name, values)
+                             for name, values in chunk.items()}, index=chunk.index)
+
+    def report(self, frame):
+        """memory_report for frame as read vs compacted."""
+        return memory_report(frame, self.apply(frame))
+
+    # --- Conversion ------------------------------------------------------------
+
+    def _count_lost(self, name, values, converted):
+        lost = int((converted.isna() & values.notna()).sum())
+        if lost:
+            self.unseen[name] += lost
+
+    def _convert(self, name, values):
+        rule = self.rules[name]
+        kind, dtype = rule["kind"], rule["dtype"]
+        if values.dtype == dtype:
+            return values
+
+        if kind == "category":
+            lost = values.notna() & ~values.isin(dtype.categories)
+            if lost.any():
+                self.unseen[name] += int(lost.sum())
+                values = values.where(~lost, self.other if self.other in dtype.categories else None)
+            return values.astype(dtype)
+
+        if kind == "flag":
+            if pd.api.types.is_bool_dtype(values):
+                return values.astype(dtype)
+            lookup = {value: FLAG_VALUES.get(str(value).strip().lower()) for value in values.dropna().unique()}
+            converted = values.map(lookup).astype(dtype)
+            self._count_lost(name, values, converted)
+            return converted
+
+        if kind == "datetime":
+            if pd.api.types.is_datetime64_any_dtype(values):
+                return values.astype(dtype)
+            converted = pd.to_datetime(values, format=rule["format"], errors="coerce").astype(dtype)
+            self._count_lost(name, values, converted)
+            return converted
+
+        if kind == "keep" and not pd.api.types.is_numeric_dtype(dtype):
+            return values.astype(dtype)
+        numbers = values
+        if not pd.api.types.is_numeric_dtype(values):
+            numbers = pd.to_numeric(values, errors="coerce")
+        if kind == "int":
+            fits = self._fits_int(numbers, dtype)
+            if not fits.all():
+                numbers = numbers.where(fits)
+        converted = numbers.astype(dtype)
+        self._count_lost(name, values, converted)
+        return converted
+
+    @staticmethod
+    def _fits_int(numbers, dtype):
+        """Mask of numbers that are whole and within the int dtype's range (missing counts as fitting)."""
+        info = np.iinfo(dtype.numpy_dtype)
+        as_float = numbers.astype("float64")
+        return as_float.isna() | ((as_float % 1 == 0) & (as_float >= info.min) & (as_float <= info.max))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile a CSV and report the memory its compact dtypes save")
+    parser.add_argument("path", help="CSV file")
+    parser.add_argument("--columns", nargs="+", help="Columns to load (default: all)")
+    parser.add_argument("--sample-rows", type=int, default=SAMPLE_ROWS)
+    parser.add_argument("--max-categories", type=int, default=MAX_CATEGORIES)
+    parser.add_argument("--stream", action="store_true", help="Also read the whole file with the schema")
+    args = parser.parse_args()
+
+    sample = pd.read_csv(args.path, usecols=args.columns, nrows=args.sample_rows)
+    schema = CompactSchema.profile(sample, max_categories=args.max_categories)
+    report = schema.report(sample)
+    print(f"📂 Profiled {len(sample):,} rows of {args.path}")
+    print(report.to_string())
+    total = report.loc["TOTAL"]
+    print(f"✅ {total['mb_before']:,.1f} MB -> {total['mb_after']:,.1f} MB ({total['ratio']:.1f}x smaller)")
+
+    if args.stream:
+        start = time.perf_counter()
+        rows = mb = 0
+        for chunk in schema.read_csv(args.path):
+            rows += len(chunk)
+            mb += chunk.memory_usage(deep=True, index=False).sum() / MB
+        print(f"⏱️  Streamed {rows:,} rows into {mb:,.1f} MB ({time.perf_counter() - start:.1f}s)")
+        for name, count in schema.unseen.items():
+            print(f"⚠️  {name}: {count:,} values outside the profiled schema became {schema.other!r} or missing")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Stage Cache
+Skips pipeline stages whose inputs haven't changed since they last ran.
+
+A stage's fingerprint covers:
+  - its input files: sha256 from data/raw/dataset_manifest.json (written by
+    download_datasets.py), or size + mtime for files the manifest doesn't
+    know about
+  - its code: the source of the stage function itself and of the modules
+    of any helpers passed in, plus an explicit version to bump when
+    something else it depends on changes
+  - its parameters (year, keyword lists, ...)
+  - the fingerprints of its upstream stages, so a change reruns everything
+    downstream of it and nothing upstream
+
+Outputs are stored as Parquet under <cache_dir>/<stage>/<fingerprint>/.
+Once the cache grows past its size limit, the least recently used entries
+are deleted.
+
+Usage (from a lab's src/ package):
+    from src.stage_cache import open_cache
+
+    cache = open_cache()
+    key = cache.fingerprint("aggregate", aggregate_taxi, params={"year": 2019},
+                            datasets=["taxi"], helpers=[ZoneLookup])
+    outputs = cache.load("aggregate", key)
+    if outputs is None:
+        outputs = {"taxi_borough_month": aggregate_taxi(...)}
+        cache.store("aggregate", key, outputs)
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Default size limit for one lab's cache
+MAX_CACHE_MB = int(os.environ.get("STAGE_CACHE_MAX_MB", 2048))
+
+META_FILE = "_meta.json"
+
+
+def _digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _source(obj):
+    """Source of obj (its qualified name if the source isn't available)."""
+    try:
+        return inspect.getsource(obj)
+    except (OSError, TypeError):
+        return getattr(obj, "__qualname__", repr(obj))
+
+
+def _module_source(obj):
+    """Source of the module defining obj (obj's own source if that isn't available)."""
+    module = inspect.getmodule(obj)
+    return _source(module) if module is not None else _source(obj)
+
+
+def code_fingerprint(func, version=1, helpers=()):
+    """Fingerprint of func's own source, the modules of helpers, and an explicit version.
+
+    Edits elsewhere in func's module don't change it. helpers are functions
+    or classes the stage calls whose edits should rebuild its output; their
+    whole modules are hashed, so anything they call there is covered too.
+    """
+    helper_sources = sorted({_module_source(obj) for obj in helpers})
+    return _digest({"source": _source(func), "helpers": helper_sources, "version": version})
+
+
+class StageCache:
+    """Parquet-backed cache of stage outputs keyed by input fingerprints."""
+
+    def __init__(self, cache_dir, raw_dir, manifest_path=None, max_mb=MAX_CACHE_MB):
+        self.cache_dir = Path(cache_dir)
+        self.raw_dir = Path(raw_dir)
+        self.manifest_path = Path(manifest_path) if manifest_path else self.raw_dir / "dataset_manifest.json"
+        self.max_bytes = max_mb * 1024 * 1024
+        self._manifest = None
+        self._used = set()
+
+    def _manifest_files(self, dataset):
+        if self._manifest is None:
+            self._manifest = {}
+            if self.manifest_path.exists():
+                with open(self.manifest_path) as f:
+                    for entry in json.load(f).get("datasets", []):
+                        self._manifest[entry["directory"]] = {file["name"]: file for file in entry["files"]}
+        return self._manifest.get(dataset, {})
+
+    def dataset_fingerprint(self, dataset):
+        """Fingerprint of every file in data/raw/<dataset> (or at a path outside it).
+
+        Uses the manifest's sha256 where the file's size and mtime still match
+        the manifest entry, so nothing is rehashed here; other files are
+        fingerprinted by size and mtime.
+        """
+        root = self.raw_dir / dataset
+        in_manifest = root.parent.resolve() == self.raw_dir.resolve()
+        known = self._manifest_files(root.name) if in_manifest else {}
+        if root.is_file():
+            paths, root = [root], root.parent
+        else:
+            paths = sorted(root.rglob("*")) if root.exists() else []
+
+        files = {}
+        for file in paths:
+            if not file.is_file() or any(p.startswith(".") for p in file.relative_to(root).parts):
+                continue
+            name = file.relative_to(root).as_posix()
+            stat = file.stat()
+            entry = known.get(name)
+            if entry and entry.get("sha256") and entry["size_bytes"] == stat.st_size \
+                    and entry["mtime"] == stat.st_mtime:
+                files[name] = entry["sha256"]
+            else:
+                files[name] = [stat.st_size, stat.st_mtime_ns]
+        return _digest(files)
+
+    def fingerprint(self, stage, func, params=None, datasets=(), upstream=(), version=1, helpers=()):
+        """Fingerprint for one run of a stage.
+
+        datasets are directory names under raw_dir (or paths to files or
+        directories elsewhere); upstream is the fingerprints of the stages
+        it reads from; helpers are passed to code_fingerprint.
+        """
+        return _digest({
+            "stage": stage,
+            "code": code_fingerprint(func, version, helpers),
+            "params": params or {},
+            "datasets": {str(d): self.dataset_fingerprint(d) for d in datasets},
+            "upstream": sorted(upstream),
+        })[:20]
+
+    def _entry_dir(self, stage, key):
+        return self.cache_dir / stage / key
+
+    def load(self, stage, key):
+        """Return {output name: DataFrame} for a cached stage run, or None."""
+        entry = self._entry_dir(stage, key)
+        meta_path = entry / META_FILE
+        if not meta_path.exists():
+            return None
+        meta = json.loads(meta_path.read_text())
+        try:
+            outputs = {name: pd.read_parquet(entry / f"{name}.parquet") for name in meta["outputs"]}
+        except (OSError, ValueError):
+            return None
+
+        meta["last_used"] = time.time()
+        meta_path.write_text(json.dumps(meta, indent=2))
+        self._used.add(entry)
+        return outputs
+
+    def store(self, stage, key, outputs, params=None):
+        """Save a stage's outputs, then evict old entries if over the size limit."""
+        entry = self._entry_dir(stage, key)
+        staging = entry.with_name(f".{key}.tmp")
+        if staging.exists():
+            shutil.rmtree(staging)
+        staging.mkdir(parents=True)
+
+        for name, frame in outputs.items():
+            frame.to_parquet(staging / f"{name}.parquet")
+        meta = {
+            "stage": stage,
+            "outputs": list(outputs),
+            "params": params or {},
+            "created": time.time(),
+            "last_used": time.time(),
+            "size_bytes": sum(f.stat().st_size for f in staging.iterdir()),
+        }
+        (staging / META_FILE).write_text(json.dumps(meta, indent=2, default=str))
+
+        if entry.exists():
+            shutil.rmtree(entry)
+        os.replace(staging, entry)
+        self._used.add(entry)
+        self.evict()
+
+    def entries(self):
+        """All cache entries as (directory, meta), least recently used first."""
+        found = []
+        for meta_path in self.cache_dir.glob(f"*/*/{META_FILE}"):
+            try:
+                found.append((meta_path.parent, json.loads(meta_path.read_text())))
+            except (OSError, ValueError):
+                continue
+        return sorted(found, key=lambda item: item[1].get("last_used", 0))
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes.
+
+        Entries loaded or stored by this cache object (the current run) are kept.
+        Returns the number of entries removed.
+        """
+        entries = self.entries()
+        total = sum(meta.get("size_bytes", 0) for _, meta in entries)
+        removed = 0
+        for entry, meta in entries:
+            if total <= self.max_bytes:
+                break
+            if entry in self._used:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= meta.get("size_bytes", 0)
+            removed += 1
+        return removed
+
+    def clear(self):
+        if self.cache_dir.exists():
+            shutil.rmtree(self.cache_dir)
+
+
+def stages_to_rerun(stages, from_stage=None, force=False):
+    """Names of the stages that must run regardless of the cache.
+
+    stages maps name -> list of upstream stage names. force reruns them all;
+    from_stage reruns that stage and everything downstream of it.
+    """
+    if force:
+        return set(stages)
+    if from_stage is None:
+        return set()
+    if from_stage not in stages:
+        raise ValueError(f"Unknown stage {from_stage!r}. Stages: {', '.join(stages)}")
+
+    rerun = {from_stage}
+    changed = True
+    while changed:
+        changed = False
+        for name, deps in stages.items():
+            if name not in rerun and rerun.intersection(deps):
+                rerun.add(name)
+                changed = True
+    return rerun
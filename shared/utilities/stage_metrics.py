@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Stage Metrics
+Per-stage wall time, CPU time, peak memory, rows and bytes for the lab
+pipelines, logged as JSON lines.
+
+Wrap each stage in log.stage(). Counts the code knows go on the record,
+and everything else is measured:
+
+    log = StageLog("data/processed/stage_metrics.jsonl")
+    with log.stage("aggregate_311", rows_in=len(chunk)) as record:
+        counts = aggregate(chunk)
+        record.set(rows_out=len(counts))
+
+    @log.timed("join")                  # rows_out = len(result)
+    def join(left, right): ...
+
+Each stage appends two lines to the log. A "start" line is written on
+entry, so a stage killed by the OOM killer still leaves a trace. An "end"
+line is written on exit, on error as well:
+
+    wall_s, cpu_s          perf_counter and process CPU time (+ waited-for child processes)
+    rss_start_mb           RSS when the stage started
+    peak_rss_mb            highest RSS during the stage (Linux VmHWM reset on
+                           entry; psutil sampled from a thread elsewhere)
+    bytes_read             bytes this process read (/proc/self/io rchar) unless set
+    rows_in, rows_out      as set by the stage (None when unknown)
+    status, error          "ok" or "error" and the exception text
+
+Stages started while another stage is running in the same process (threads,
+nested stages) share the process-wide peak, so only the outermost stage
+resets it. Every StageLog gets its own run_id (UTC start time and pid), and
+lines from all processes of one run share it: a StageLog passed to a worker
+process keeps its id, a subprocess can be given it with
+StageLog(path, run_id=...) or STAGE_RUN_ID in its environment.
+
+Profiling (off by default, set in the environment):
+
+    STAGE_PROFILE=cprofile            cProfile per stage -> profiles/<stage>-<run_id>.prof
+    STAGE_PROFILE=tracemalloc         traced peak + top allocation sites -> profiles/<stage>-<run_id>.allocations.txt
+    STAGE_PROFILE=cprofile,tracemalloc
+    STAGE_PROFILE_ONLY=join,crime     only these stages
+
+The profiles folder sits next to the log, and the end line records the
+paths. Open a .prof file with `python -m pstats` or snakeviz.
+
+Usage:
+    python stage_metrics.py lab-01-nyc-neighborhood-signals/data/processed/stage_metrics.jsonl
+"""
+
+import argparse
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+
+LOG_FILE = "stage_metrics.jsonl"
+PROFILE_DIR = "profiles"
+
+# Allocation sites written per stage by STAGE_PROFILE=tracemalloc
+TOP_ALLOCATIONS = 25
+
+MB = 1024 * 1024
+
+# Stages running in this process; only the first one resets the peak RSS
+_active = 0
+_active_lock = threading.Lock()
+
+
+def new_run_id():
+    """A fresh run id from the UTC time and pid, e.g. 20261018T145018.123456Z-1822."""
+    return f"{datetime.now(UTC):%Y%m%dT%H%M%S.%fZ}-{os.getpid()}"
+
+
+def log_beside(output, run_id=None):
+    """StageLog in output's folder: the shared CLIs log next to what they write (a lab's data/processed/)."""
+    return StageLog(Path(output).parent / LOG_FILE, run_id=run_id)
+
+
+def count_rows(value):
+    """Rows in a DataFrame/array/table, or summed over a dict or list of them; None if unknown."""
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, (list, tuple)):
+        counts = [count_rows(v) for v in value]
+        return None if not counts or None in counts else sum(counts)
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+# --- Process counters ------------------------------------------------------------
+
+def _mb(n_bytes):
+    return None if n_bytes is None else round(n_bytes / MB, 1)
+
+
+def _proc_field(name, field):
+    try:
+        with open(f"/proc/self/{name}") as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _bytes_read():
+    return _proc_field("io", "rchar:")
+
+
+def _cpu_seconds():
+    cpu = time.process_time()
+    try:
+        import resource
+    except ImportError:                 # Windows: no child usage
+        return cpu
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return cpu + children.ru_utime + children.ru_stime
+
+
+class PeakMemory:
+    """Peak resident memory of this process while the block runs.
+
+    On Linux the kernel's high-water mark (VmHWM) is reset on entry and read
+    on exit, which catches even short-lived spikes. Elsewhere a thread
+    samples psutil's RSS every interval seconds (both stay None without
+    psutil). With reset=False the high-water mark is left alone (another
+    block is already measuring), so the peak may predate this block.
+    """
+
+    def __init__(self, interval=0.001, reset=True):
+        self.interval = interval
+        self.reset = reset
+        self.start_bytes = self.peak_bytes = None
+        self._thread = None
+
+    def __enter__(self):
+        rss = _proc_field("status", "VmRSS:")
+        if rss is not None:
+            if self.reset:
+                try:
+                    with open("/proc/self/clear_refs", "w") as f:
+                        f.write("5")
+                except OSError:
+                    pass
+            self.start_bytes = self.peak_bytes = rss * 1024
+            return self
+
+        try:
+            import psutil
+        except ImportError:
+            return self
+
+        process = psutil.Process()
+        self.start_bytes = self.peak_bytes = process.memory_info().rss
+        self._stop = threading.Event()
+
+        def sample():
+            while not self._stop.wait(self.interval):
+                self.peak_bytes = max(self.peak_bytes, process.memory_info().rss)
+
+        self._thread = threading.Thread(target=sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+        elif self.start_bytes is not None:
+            self.peak_bytes = max(self.peak_bytes, (_proc_field("status", "VmHWM:") or 0) * 1024)
+        return False
+
+    @property
+    def peak_mb(self):
+        """Highest RSS above the starting RSS, in MB (None if RSS can't be read)."""
+        return None if self.start_bytes is None else (self.peak_bytes - self.start_bytes) / MB
+
+
+# --- Profiling -------------------------------------------------------------------
+
+def _profilers(stage):
+    wanted = {p.strip().lower() for p in os.environ.get("STAGE_PROFILE", "").split(",") if p.strip()}
+    only = {s.strip() for s in os.environ.get("STAGE_PROFILE_ONLY", "").split(",") if s.strip()}
+    if only and stage not in only:
+        return set()
+    if wanted & {"1", "all"}:
+        return {"cprofile", "tracemalloc"}
+    return wanted & {"cprofile", "tracemalloc"}
+
+
+class _Profile:
+    """cProfile and/or tracemalloc around one stage, saved under directory."""
+
+    def __init__(self, stage, directory, kinds, run_id):
+        self.stage = stage
+        self.run_id = run_id
+        self.directory = Path(directory)
+        self.kinds = kinds
+        self.profiler = None
+        self.started_tracing = False
+        self.entered = False
+
+    def __enter__(self):
+        self.entered = True
+        if "tracemalloc" in self.kinds:
+            import tracemalloc
+
+            self.started_tracing = not tracemalloc.is_tracing()
+            if self.started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self.baseline = tracemalloc.take_snapshot()
+        if "cprofile" in self.kinds:
+            import cProfile
+
+            self.profiler = cProfile.Profile()
+            try:
+                self.profiler.enable()
+            except ValueError:          # another profiler is active in this process
+                self.profiler = None
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def finish(self):
+        """Stop profiling and save; returns the fields for the end line."""
+        fields = {}
+        if not self.entered:
+            return fields
+        stem = self.directory / f"{self.stage}-{self.run_id}"
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.profiler.dump_stats(f"{stem}.prof")
+            fields["profile"] = f"{stem}.prof"
+        if "tracemalloc" in self.kinds:
+            import tracemalloc
+
+            peak = tracemalloc.get_traced_memory()[1]
+            # Leave out the profilers' own bookkeeping
+            ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "*cProfile.py"),
+                      tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")]
+            growth = tracemalloc.take_snapshot().filter_traces(ignore).compare_to(
+                self.baseline.filter_traces(ignore), "lineno")[:TOP_ALLOCATIONS]
+            if self.started_tracing:
+                tracemalloc.stop()
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = Path(f"{stem}.allocations.txt")
+            path.write_text(f"Traced peak: {peak / MB:.1f} MB\nStill allocated at the end, by line (growth since the start):\n"
+                            + "\n".join(str(stat) for stat in growth) + "\n")
+            fields.update({"traced_peak_mb": round(peak / MB, 2), "allocations": str(path)})
+        return fields
+
+
+# --- Log -------------------------------------------------------------------------
+
+class StageRecord:
+    """What a running stage knows about itself; set() adds rows and any other fields to the end line."""
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def set(self, **fields):
+        self.fields.update(fields)
+        return self
+
+
+class StageLog:
+    """JSON-lines log of pipeline stages (one file per lab, safe to delete at any time).
+
+    run_id defaults to STAGE_RUN_ID when a parent process set it, else a new
+    id. Pickling keeps it, so stages in worker processes log under the
+    parent's run.
+    """
+
+    def __init__(self, path, run_id=None):
+        self.path = Path(path)
+        self.run_id = run_id or os.environ.get("STAGE_RUN_ID") or new_run_id()
+
+    def write(self, stage, event="end", **fields):
+        """Append one line. Single small appends, so concurrent processes don't interleave."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        line = {"run_id": self.run_id, "stage": stage, "event": event, "pid": os.getpid(),
+                "time": datetime.now(UTC).isoformat(timespec="milliseconds"), **fields}
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(line, default=str) + "\n")
+
+    @contextmanager
+    def stage(self, name, rows_in=None, **fields):
+        """Measure the block as stage name; yields a StageRecord for rows_out and other fields."""
+        global _active
+        record = StageRecord({"rows_in": rows_in, "rows_out": None, **fields})
+        self.write(name, "start", rows_in=rows_in)
+        with _active_lock:
+            outermost = _active == 0
+            _active += 1
+
+        memory = PeakMemory(reset=outermost)
+        profile = _Profile(name, self.path.parent / PROFILE_DIR, _profilers(name) if outermost else set(),
+                           self.run_id)
+        read_before = _bytes_read()
+        cpu_before = _cpu_seconds()
+        started = time.perf_counter()
+        status, error = "ok", None
+        try:
+            with memory, profile:
+                yield record
+        except BaseException as e:
+            status, error = "error", f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            wall = time.perf_counter() - started
+            cpu = _cpu_seconds() - cpu_before
+            with _active_lock:
+                _active -= 1
+            read_after = _bytes_read()
+            measured = {
+                "wall_s": round(wall, 4),
+                "cpu_s": round(cpu, 4),
+                "rss_start_mb": _mb(memory.start_bytes),
+                "peak_rss_mb": _mb(memory.peak_bytes),
+                "bytes_read": read_after - read_before if read_before is not None else None,
+                **profile.finish(),
+            }
+            self.write(name, "end", status=status, error=error, **{**measured, **record.fields})
+
+    def timed(self, name=None):
+        """Decorator: run the function as a stage (default name: the function's), rows_out from its result."""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name or func.__name__) as record:
+                    result = func(*args, **kwargs)
+                    record.set(rows_out=count_rows(result))
+                return result
+            return wrapper
+        return decorate
+
+    # --- Reading ---------------------------------------------------------------
+
+    def records(self):
+        """Every line in the log, oldest first ([] before the first stage runs)."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def latest(self):
+        """The most recent run of each stage, in start order, as a DataFrame (None if nothing was logged).
+
+        A stage with a start line but no end line is reported with status
+        "no end" (still running, or killed, e.g. by the OOM killer).
+        """
+        runs = {}
+        for line in self.records():
+            key = (line["run_id"], line["stage"], line["pid"])
+            if line["event"] == "start":
+                runs[key] = {"stage": line["stage"], "run_id": line["run_id"], "started": line["time"],
+                             "status": "no end", "rows_in": line.get("rows_in")}
+            else:
+                runs.setdefault(key, {"stage": line["stage"], "run_id": line["run_id"], "started": line["time"]})
+                runs[key].update({k: v for k, v in line.items() if k not in ("event", "time", "pid")})
+                runs[key].setdefault("status", "ok")
+        if not runs:
+            return None
+
+        import pandas as pd
+
+        frame = pd.DataFrame(list(runs.values()))
+        frame = frame.sort_values("started", kind="stable").drop_duplicates("stage", keep="last")
+        columns = ["stage", "status", "wall_s", "cpu_s", "peak_rss_mb", "rss_start_mb", "rows_in", "rows_out",
+                   "bytes_read", "started", "run_id"]
+        frame = frame.reindex(columns=[*columns, *(c for c in frame.columns if c not in columns)])
+        return frame.reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the latest run of each pipeline stage")
+    parser.add_argument("log", nargs="?", default=f"data/processed/{LOG_FILE}", help="stage_metrics.jsonl")
+    args = parser.parse_args()
+
+    latest = StageLog(args.log).latest()
+    if latest is None:
+        print(f"⚠️  No stages logged in {args.log} yet")
+        return
+    print(latest.drop(columns=["run_id"]).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Streaming Correlation
+One-pass, mergeable covariance / Pearson accumulators and an approximate
+Spearman estimator, so correlations can be computed chunk by chunk (or in
+parallel workers) without ever holding the joined data in memory.
+
+Pearson and covariance are exact. Each accumulator keeps only the row
+count, the column means and the matrix of co-moments (sums of products of
+deviations from the mean). Chunks are folded in with the pairwise update
+of Chan, Golub & LeVeque, the batch form of Welford's algorithm. It is
+numerically stable, unlike summing x, x^2 and xy, and two accumulators
+merge to exactly what one would have seen. Values are taken relative to
+the first row seen, so columns with a large mean and a small spread
+(timestamps, coordinates) keep their precision.
+
+Spearman needs global ranks, which aren't known until the end. The
+SpearmanSketch keeps a bottom-k priority sample of rows: every row gets a
+random priority and the k lowest are kept. The sample is uniform and two
+sketches merge into the same sample their union would have produced.
+Ranks are computed on the sample, so the estimate is exact while fewer
+than k rows have been seen. Beyond that, the standard error is about
+(1 - rho^2) / sqrt(k).
+
+Usage:
+    from shared.utilities.streaming_correlation import CorrelationAccumulator
+
+    acc = CorrelationAccumulator(["trip_count", "nuisance_complaints"])
+    for chunk in pd.read_csv("big.csv", chunksize=1_000_000):
+        acc.update(chunk)
+    acc.pearson()            # DataFrame, same layout as chunk.corr()
+
+    # in parallel: each worker builds its own, then
+    total = CorrelationAccumulator.combine(worker_results)
+"""
+
+import numpy as np
+import pandas as pd
+
+# Rows kept by SpearmanSketch; error ~ 1/sqrt(k), memory k x columns x 8 bytes
+SKETCH_ROWS = 100_000
+
+
+def _as_matrix(data, columns):
+    """Float64 matrix of `columns` with incomplete rows dropped."""
+    if isinstance(data, pd.DataFrame):
+        data = data[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+    data = np.asarray(data, dtype=np.float64)
+    if data.ndim == 1:
+        data = data.reshape(-1, 1)
+    if data.shape[1] != len(columns):
+        raise ValueError(f"Expected {len(columns)} columns, got {data.shape[1]}")
+    return data[~np.isnan(data).any(axis=1)]
+
+
+class CovarianceAccumulator:
+    """Mergeable running count, means and co-moment matrix.
+
+    Rows with a missing value in any tracked column are skipped (listwise
+    deletion); pandas' .corr() drops them pairwise instead, so results only
+    match when the data has no gaps.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.n = 0
+        self.shift = np.zeros(k)     # the first row seen; means are kept relative to it
+        self.offset = np.zeros(k)    # mean - shift
+        self.comoment = np.zeros((k, k))
+
+    @property
+    def mean(self):
+        return self.shift + self.offset
+
+    def update(self, data):
+        """Fold in a chunk (DataFrame with the tracked columns, or an n x k array)."""
+        x = _as_matrix(data, self.columns)
+        if len(x) == 0:
+            return self
+        if self.n == 0:
+            self.shift = x[0].copy()
+        x = x - self.shift
+        chunk_mean = x.mean(axis=0)
+        centered = x - chunk_mean
+        self._merge_moments(len(x), chunk_mean, centered.T @ centered)
+        return self
+
+    def merge(self, other):
+        """Fold another accumulator (same columns) into this one."""
+        if other.columns != self.columns:
+            raise ValueError("Accumulators track different columns")
+        if other.n:
+            if self.n == 0:
+                self.shift = other.shift.copy()
+            self._merge_moments(other.n, other.offset + (other.shift - self.shift), other.comoment)
+        return self
+
+    @classmethod
+    def combine(cls, accumulators):
+        """Merge accumulators from several partitions into a new one (ValueError if there are none)."""
+        accumulators = list(accumulators)
+        if not accumulators:
+            raise ValueError("combine() needs at least one accumulator to know the columns")
+        total = cls(accumulators[0].columns)
+        for acc in accumulators:
+            total.merge(acc)
+        return total
+
+    def _merge_moments(self, n_b, mean_b, comoment_b):
+        n_a = self.n
+        n = n_a + n_b
+        delta = mean_b - self.offset
+        self.offset = self.offset + delta * (n_b / n)
+        self.comoment = self.comoment + comoment_b + np.outer(delta, delta) * (n_a * n_b / n)
+        self.n = n
+
+    def covariance(self, ddof=1):
+        """Covariance matrix as a DataFrame (NaN with fewer than ddof + 1 rows)."""
+        values = np.full_like(self.comoment, np.nan) if self.n <= ddof else self.comoment / (self.n - ddof)
+        return pd.DataFrame(values, index=self.columns, columns=self.columns)
+
+
+class CorrelationAccumulator(CovarianceAccumulator):
+    """CovarianceAccumulator that also reports Pearson correlations."""
+
+    def pearson(self):
+        """Pearson correlation matrix as a DataFrame (NaN for constant columns)."""
+        scale = np.sqrt(np.diag(self.comoment))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = self.comoment / np.outer(scale, scale)
+        values = np.clip(values, -1.0, 1.0)
+        np.fill_diagonal(values, np.where(scale > 0, 1.0, np.nan))
+        return pd.DataFrame(values, index=self.columns, columns=self.columns)
+
+    def p_values(self):
+        """Two-sided p-values for the Pearson matrix (t-test with n - 2 df; needs scipy)."""
+        return correlation_p_values(self.pearson(), self.n)
+
+
+class SpearmanSketch:
+    """Approximate, mergeable Spearman correlation from a bottom-k priority sample.
+
+    Sketches that will be merged need independent priorities: leave seed as
+    None, or give each partition its own seed.
+    """
+
+    def __init__(self, columns, k=SKETCH_ROWS, seed=None):
+        self.columns = list(columns)
+        self.k = k
+        self.n = 0
+        self.rows = np.empty((0, len(self.columns)))
+        self.priorities = np.empty(0)
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, data):
+        """Fold in a chunk (DataFrame with the tracked columns, or an n x k array)."""
+        x = _as_matrix(data, self.columns)
+        self.n += len(x)
+        priorities = self._rng.random(len(x))
+        if len(self.priorities) >= self.k:
+            # Only rows that beat the current k-th priority can enter the sample
+            keep = priorities < self.priorities.max()
+            x, priorities = x[keep], priorities[keep]
+        self._keep_lowest(np.vstack([self.rows, x]), np.concatenate([self.priorities, priorities]))
+        return self
+
+    def merge(self, other):
+        """Fold another sketch (same columns and k) into this one."""
+        if other.columns != self.columns or other.k != self.k:
+            raise ValueError("Sketches track different columns or sizes")
+        self.n += other.n
+        self._keep_lowest(np.vstack([self.rows, other.rows]), np.concatenate([self.priorities, other.priorities]))
+        return self
+
+    @classmethod
+    def combine(cls, sketches):
+        """Merge sketches from several partitions into a new one (ValueError if there are none)."""
+        sketches = list(sketches)
+        if not sketches:
+            raise ValueError("combine() needs at least one sketch to know the columns and k")
+        total = cls(sketches[0].columns, k=sketches[0].k)
+        for sketch in sketches:
+            total.merge(sketch)
+        return total
+
+    def _keep_lowest(self, rows, priorities):
+        if len(priorities) > self.k:
+            lowest = np.argpartition(priorities, self.k - 1)[:self.k]
+            rows, priorities = rows[lowest], priorities[lowest]
+        self.rows, self.priorities = rows, priorities
+
+    @property
+    def exact(self):
+        """True while every row seen is still in the sample."""
+        return self.n <= self.k
+
+    def spearman(self):
+        """Spearman correlation matrix (average ranks for ties) as a DataFrame."""
+        ranks = pd.DataFrame(self.rows, columns=self.columns).rank(method="average")
+        acc = CorrelationAccumulator(self.columns).update(ranks)
+        return acc.pearson()
+
+    def p_values(self):
+        """Two-sided p-values for the Spearman matrix, using the full row count."""
+        return correlation_p_values(self.spearman(), self.n)
+
+
+def correlation_p_values(correlations, n):
+    """Two-sided p-values for a correlation matrix from n rows (t-test, n - 2 df)."""
+    from scipy import stats
+
+    r = correlations.to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = r * np.sqrt((n - 2) / (1 - r ** 2))
+    p = 2 * stats.t.sf(np.abs(t), df=max(n - 2, 1))
+    return pd.DataFrame(p, index=correlations.index, columns=correlations.columns)
+
+
+def correlate_chunks(chunks, columns, spearman=True, k=SKETCH_ROWS, seed=0):
+    """Pearson (exact) and Spearman (approximate) matrices over an iterable of DataFrames.
+
+    Returns {"pearson": DataFrame, "spearman": DataFrame or None, "n": rows used}.
+    """
+    pearson = CorrelationAccumulator(columns)
+    sketch = SpearmanSketch(columns, k=k, seed=seed) if spearman else None
+    for chunk in chunks:
+        pearson.update(chunk)
+        if sketch is not None:
+            sketch.update(chunk)
+    return {
+        "pearson": pearson.pearson(),
+        "spearman": sketch.spearman() if sketch is not None else None,
+        "n": pearson.n,
+    }
@@ -0,0 +1,902 @@
+#!/usr/bin/env python3
+"""
+Synthetic Datasets
+Seeded stand-ins for the Kaggle downloads, with the same files, columns and
+value formats, at any scale from 10K to 100M+ rows.
+
+Use them to benchmark or test the heavy code paths on machines without
+network access or Kaggle credentials. Each dataset is written to the
+folder download_datasets.py would put it in (data/raw/<target_dir>/), so
+the lab code reads it unchanged:
+
+    311_requests    311_Service_Requests.csv           Labs 1, 5
+    nypd_crime      NYPD_Complaint_Data_Historic.csv   Lab 1
+    taxi            yellow_tripdata.csv + taxi_zone_lookup.csv (PULocationID 1-265)   Lab 5
+    accidents       US_Accidents.csv + geo_crosswalk/ZIP-COUNTY-FIPS_synthetic.csv    Lab 2
+    gsod            weather/<year>/<station>.csv + isd-history.csv   Labs 2, 3
+    hotel_bookings  hotel_bookings.csv                  Lab 3
+    streaming       netflix/, amazon_prime/, disney_plus/ *_titles.csv   Lab 4
+
+The distributions are plausible, not faithful: skewed categories, daily and
+seasonal cycles, a little missing and dirty data. Geography and weather are
+random. The streaming catalogs contain planted fuzzy duplicates (changed
+case, "&" for "and", a dropped "The", typos, off-by-one years). The planted
+pairs are listed in netflix/planted_matches.csv, so recall can be measured.
+
+Generation is vectorized (numpy draws, Arrow string kernels) and streamed:
+rows are built and written CHUNK_ROWS at a time, so memory stays flat
+whatever the row count. Chunk i is drawn from its own generator seeded with
+(seed, dataset, i), so a given seed and row count always produce
+byte-identical files.
+
+--rows counts station-days for gsod (whole station-years are written) and
+Netflix titles for streaming (Amazon and Disney+ are scaled from it). The
+streaming catalogs are built in memory; the real ones have ~10K rows.
+
+Usage:
+    python synthetic_data.py taxi --rows 100M --output lab-05-nyc-mobility-externalities/data/raw
+    python synthetic_data.py 311_requests nypd_crime --rows 5M --output lab-01-nyc-neighborhood-signals/data/raw
+    python synthetic_data.py all --rows 100K --output /tmp/raw --seed 7 --format parquet
+
+    from shared.utilities.synthetic_data import generate
+    generate("hotel_bookings", 1_000_000, "lab-03-hospitality-demand/data/raw")
+"""
+
+import argparse
+import time
+import zlib
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+
+# Rows generated and written at a time (also the unit of seeding)
+CHUNK_ROWS = 1_000_000
+
+SECONDS_PER_DAY = 86_400
+
+_ROW_SUFFIXES = {"K": 1_000, "M": 1_000_000, "B": 1_000_000_000}
+
+MONTH_NAMES = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October",
+               "November", "December"]
+
+# Share of trips/calls starting in each hour of the day (midnight first)
+HOUR_WEIGHTS = [3, 2, 1.5, 1, 1, 1.5, 3, 5, 6, 6, 5.5, 5.5, 6, 6, 6.5, 7, 7, 7.5, 8, 7.5, 6.5, 6, 5, 4]
+
+# 48 contiguous states + DC: (abbreviation, FIPS code, relative share of accidents)
+STATES = [
+    ("AL", 1, 1.2), ("AZ", 4, 1.8), ("AR", 5, 0.6), ("CA", 6, 22), ("CO", 8, 1.3), ("CT", 9, 1.0), ("DE", 10, 0.3),
+    ("DC", 11, 0.3), ("FL", 12, 11), ("GA", 13, 2.2), ("ID", 16, 0.3), ("IL", 17, 2.3), ("IN", 18, 1.0),
+    ("IA", 19, 0.5), ("KS", 20, 0.4), ("KY", 21, 0.6), ("LA", 22, 2.0), ("ME", 23, 0.1), ("MD", 24, 1.9),
+    ("MA", 25, 0.8), ("MI", 26, 2.0), ("MN", 27, 2.0), ("MS", 28, 0.3), ("MO", 29, 1.1), ("MT", 30, 0.3),
+    ("NE", 31, 0.3), ("NV", 32, 0.3), ("NH", 33, 0.2), ("NJ", 34, 1.8), ("NM", 35, 0.3), ("NY", 36, 4.3),
+    ("NC", 37, 4.5), ("ND", 38, 0.1), ("OH", 39, 1.1), ("OK", 40, 1.0), ("OR", 41, 2.3), ("PA", 42, 2.7),
+    ("RI", 44, 0.2), ("SC", 45, 5.0), ("SD", 46, 0.1), ("TN", 47, 2.0), ("TX", 48, 7.5), ("UT", 49, 1.3),
+    ("VT", 50, 0.1), ("VA", 51, 3.9), ("WA", 53, 1.4), ("WV", 54, 0.3), ("WI", 55, 0.5), ("WY", 56, 0.1),
+]
+
+# Continental US bounding box (min_lat, min_lon, max_lat, max_lon)
+US_BBOX = (25.0, -124.5, 49.0, -67.0)
+
+WORDS = [
+    "silent", "river", "midnight", "garden", "last", "crown", "broken", "promise", "hidden", "kingdom", "lost", "city",
+    "dark", "water", "golden", "hour", "wild", "heart", "little", "secret", "empty", "house", "cold", "winter",
+    "summer", "storm", "long", "road", "red", "moon", "blue", "sky", "iron", "girl", "night", "shift", "final",
+    "chapter", "black", "mirror", "great", "escape", "perfect", "stranger", "second", "chance", "deep", "forest",
+    "burning", "bridge", "falling", "star", "quiet", "place", "new", "world", "old", "friend", "happy", "ending",
+    "strange", "love", "lucky", "day", "bright", "future", "stone", "island", "glass", "castle", "sweet", "revenge",
+    "hollow", "ground", "shadow", "line", "brave", "soldier", "paper", "planet", "secret", "life", "open", "sea",
+    "lonely", "planet", "royal", "family", "fast", "lane", "small", "town", "lazy", "sunday", "hard", "truth", "crazy",
+    "rich", "young", "blood", "wolf", "pack", "dragon", "fire", "ghost", "story", "magic", "school", "space", "race",
+    "ocean", "deep", "mountain", "echo", "desert", "rose", "thunder", "valley", "crystal", "lake", "silver", "lining",
+    "velvet", "underground", "midnight", "express", "northern", "lights", "southern", "comfort", "eastern", "promise",
+    "western", "front", "tiger", "king",
+]
+
+NAMES = [
+    "Ana", "Ben", "Carla", "David", "Elena", "Farid", "Grace", "Hiro", "Ines", "Jonas", "Kemi", "Luis", "Maya", "Noah",
+    "Olga", "Pedro", "Quinn", "Rosa", "Sam", "Tara", "Umar", "Vera", "Will", "Xena", "Yuki", "Zoe", "Adams", "Baker",
+    "Chen", "Diaz", "Evans", "Fischer", "Garcia", "Hughes", "Ito", "Jensen", "Kumar", "Lopez", "Moreau", "Novak",
+    "Okafor", "Park", "Rossi", "Silva", "Tanaka", "Ueda", "Varga", "Weber", "Young", "Zhang",
+]
+
+
+# --- Helpers -----------------------------------------------------------------
+
+def parse_rows(text):
+    """'100K', '2.5M', '1B' or '12345' -> int."""
+    text = str(text).strip().upper().replace(",", "").replace("_", "")
+    if text[-1:] in _ROW_SUFFIXES:
+        return int(float(text[:-1]) * _ROW_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def _rng(seed, name, chunk):
+    return np.random.default_rng([seed, zlib.crc32(name.encode()), chunk])
+
+
+def _epoch(date):
+    return int(np.datetime64(date, "s").astype(np.int64))
+
+
+def _weights(values):
+    values = np.asarray(values, dtype=np.float64)
+    return values / values.sum()
+
+
+def _pick(rng, labels, weights, n):
+    """String array of n labels drawn with the given relative weights."""
+    return pa.array(labels).take(rng.choice(len(labels), n, p=_weights(weights)))
+
+
+def _with_nulls(rng, values, share):
+    """values (Arrow array) with about share of its entries set to null."""
+    return pc.if_else(pa.array(rng.random(len(values)) < share), pa.nulls(len(values), values.type), values)
+
+
+def _zipf(n_items, a=1.1):
+    """Relative popularity of items ranked 1..n_items."""
+    return 1.0 / np.arange(1, n_items + 1) ** a
+
+
+def _fixed_width(n, fields):
+    """Arrow strings built from fixed-width fields: bytes literals and (integers, width) pairs.
+
+    Digits are written into one (n, width) byte matrix, so 1M timestamps
+    format in ~0.1s instead of the ~2s of pc.strftime.
+    """
+    width = sum(len(f) if isinstance(f, bytes) else f[1] for f in fields)
+    out = np.empty((n, width), dtype=np.uint8)
+    col = 0
+    for field in fields:
+        if isinstance(field, bytes):
+            out[:, col:col + len(field)] = np.frombuffer(field, dtype=np.uint8)
+            col += len(field)
+            continue
+        values, digits = field
+        values = np.asarray(values, dtype=np.int64)
+        for i in range(digits):
+            out[:, col + digits - 1 - i] = 48 + values // 10 ** i % 10
+        col += digits
+    offsets = np.arange(0, (n + 1) * width, width, dtype=np.int32)
+    return pa.Array.from_buffers(pa.string(), n, [None, pa.py_buffer(offsets), pa.py_buffer(out)])
+
+
+def _civil(seconds):
+    """year, month, day, hour, minute, second arrays from epoch seconds."""
+    days = (seconds // SECONDS_PER_DAY).astype("datetime64[D]")
+    months = days.astype("datetime64[M]")
+    day_seconds = seconds % SECONDS_PER_DAY
+    return (months.astype(np.int64) // 12 + 1970, months.astype(np.int64) % 12 + 1,
+            (days - months).astype(np.int64) + 1, day_seconds // 3600, day_seconds // 60 % 60, day_seconds % 60)
+
+
+def us_datetime(seconds):
+    """'MM/DD/YYYY HH:MM:SS AM' strings (311 Created Date)."""
+    year, month, day, hour, minute, second = _civil(seconds)
+    text = _fixed_width(len(seconds), [(month, 2), b"/", (day, 2), b"/", (year, 4), b" ", ((hour + 11) % 12 + 1, 2),
+                                       b":", (minute, 2), b":", (second, 2), b" AM"])
+    return pc.if_else(pa.array(hour >= 12), pc.replace_substring(text, " AM", " PM"), text)
+
+
+def us_date(seconds):
+    """'MM/DD/YYYY' strings (NYPD CMPLNT_FR_DT)."""
+    year, month, day, *_ = _civil(seconds)
+    return _fixed_width(len(seconds), [(month, 2), b"/", (day, 2), b"/", (year, 4)])
+
+
+def iso_date(seconds):
+    """'YYYY-MM-DD' strings."""
+    year, month, day, *_ = _civil(seconds)
+    return _fixed_width(len(seconds), [(year, 4), b"-", (month, 2), b"-", (day, 2)])
+
+
+def clock_time(seconds):
+    """'HH:MM:SS' strings."""
+    _, _, _, hour, minute, second = _civil(seconds)
+    return _fixed_width(len(seconds), [(hour, 2), b":", (minute, 2), b":", (second, 2)])
+
+
+def _timestamps(rng, n, start, end, hourly=True):
+    """n epoch seconds in [start, end), following HOUR_WEIGHTS when hourly."""
+    if not hourly:
+        return rng.integers(start, end, n)
+    days = rng.integers(start // SECONDS_PER_DAY, (end - 1) // SECONDS_PER_DAY + 1, n)
+    hours = rng.choice(24, n, p=_weights(HOUR_WEIGHTS))
+    seconds = days * SECONDS_PER_DAY + hours * 3600 + rng.integers(0, 3600, n)
+    return np.clip(seconds, start, end - 1)
+
+
+def _timestamp_array(seconds):
+    return pa.array(seconds.astype("datetime64[s]"))
+
+
+def _round(values, decimals):
+    return pa.array(np.round(values, decimals))
+
+
+def _phrases(rng, n, words=WORDS, min_words=1, max_words=3):
+    """n space-joined phrases of min_words..max_words title-cased words."""
+    vocabulary = pc.utf8_capitalize(pa.array(words))
+    count = rng.integers(min_words, max_words + 1, n)
+    parts = [vocabulary.take(rng.integers(0, len(vocabulary), n)) for _ in range(max_words)]
+    parts = [pc.if_else(pa.array(count > i), part, pa.nulls(n, pa.string())) for i, part in enumerate(parts)]
+    return pc.binary_join_element_wise(*parts, " ", null_handling="skip")
+
+
+# --- Row tables ----------------------------------------------------------------
+
+BOROUGHS_311 = ["BROOKLYN", "QUEENS", "MANHATTAN", "BRONX", "STATEN ISLAND", "Unspecified"]
+BOROUGH_WEIGHTS_311 = [31, 23, 20, 20, 5, 1]
+
+# Rough borough centres for coordinates, same order as BOROUGHS_311 (Unspecified has none)
+BOROUGH_CENTRES = [(40.65, -73.95), (40.72, -73.80), (40.78, -73.97), (40.84, -73.88), (40.58, -74.15)]
+
+# Complaint type, agency, relative share, descriptors
+COMPLAINT_TYPES_311 = [
+    ("Noise - Residential", "NYPD", 12, ["Loud Music/Party", "Banging/Pounding", "Loud Talking"]),
+    ("HEAT/HOT WATER", "HPD", 10, ["ENTIRE BUILDING", "APARTMENT ONLY"]),
+    ("Illegal Parking", "NYPD", 8, ["Blocked Hydrant", "Double Parked Blocking Traffic",
+                                    "Posted Parking Sign Violation"]),
+    ("Blocked Driveway", "NYPD", 6, ["No Access", "Partial Access"]),
+    ("Street Condition", "DOT", 5, ["Pothole", "Cave-in", "Defective Hardware"]),
+    ("Noise - Street/Sidewalk", "NYPD", 5, ["Loud Music/Party", "Loud Talking", "Car/Truck Horn",
+                                            "Car/Truck Music", "Engine Idling"]),
+    ("Noise - Vehicle", "NYPD", 3, ["Car/Truck Music", "Car/Truck Horn", "Engine Idling"]),
+    ("Noise - Commercial", "NYPD", 3, ["Loud Music/Party", "Loud Talking"]),
+    ("PLUMBING", "HPD", 3, ["WATER SUPPLY", "BASIN/SINK", "TOILET"]),
+    ("UNSANITARY CONDITION", "HPD", 3, ["PESTS", "GARBAGE/RECYCLING STORAGE", "MOLD"]),
+    ("Water System", "DEP", 3, ["Hydrant Running (WC3)", "No Water (WNW)"]),
+    ("PAINT/PLASTER", "HPD", 2, ["WALL", "CEILING"]),
+    ("Sidewalk Condition", "DOT", 2, ["Broken Sidewalk", "Defacement"]),
+    ("Traffic Signal Condition", "DOT", 2, ["Controller", "Lamp Timing"]),
+    ("Derelict Vehicle", "NYPD", 2, ["With License Plate"]),
+    ("Request Large Bulky Item Collection", "DSNY", 2, ["Request Large Bulky Item Collection"]),
+    ("Rodent", "DOHMH", 2, ["Rat Sighting", "Mouse Sighting"]),
+    ("Traffic", "NYPD", 1, ["Congestion/Gridlock", "Truck Route Violation"]),
+]
+
+
+def _borough_coordinates(rng, boroughs, spread=0.04):
+    """Latitude/longitude near each borough's centre (null where there is no centre)."""
+    centres = np.array(BOROUGH_CENTRES + [(np.nan, np.nan)])[boroughs]
+    lat = np.round(centres[:, 0] + rng.normal(0, spread, len(boroughs)), 6)
+    lon = np.round(centres[:, 1] + rng.normal(0, spread, len(boroughs)), 6)
+    return pa.array(lat, from_pandas=True), pa.array(lon, from_pandas=True)
+
+
+def requests_311(rng, first, n, start, end):
+    """One chunk of NY 311 service requests."""
+    pairs = [(t, agency, weight / len(descriptors), d)
+             for t, agency, weight, descriptors in COMPLAINT_TYPES_311 for d in descriptors]
+    pair = rng.choice(len(pairs), n, p=_weights([p[2] for p in pairs]))
+    borough = rng.choice(len(BOROUGHS_311), n, p=_weights(BOROUGH_WEIGHTS_311))
+    created = _timestamps(rng, n, start, end)
+    closed = created + (rng.lognormal(2.5, 1.5, n) * 3600).astype(np.int64)
+    lat, lon = _borough_coordinates(rng, borough)
+    return pa.table({
+        "Unique Key": pa.array(np.arange(first, first + n) + 10_000_000),
+        "Created Date": us_datetime(created),
+        "Closed Date": _with_nulls(rng, us_datetime(closed), 0.03),
+        "Agency": pa.array([p[1] for p in pairs]).take(pair),
+        "Complaint Type": pa.array([p[0] for p in pairs]).take(pair),
+        "Descriptor": pa.array([p[3] for p in pairs]).take(pair),
+        "Incident Zip": _with_nulls(rng, pa.array(rng.integers(10001, 11698, n)), 0.04),
+        "Borough": pa.array(BOROUGHS_311).take(borough),
+        "Latitude": lat,
+        "Longitude": lon,
+    })
+
+
+# Key code, offense description, law category, relative share
+OFFENSES = [
+    (341, "PETIT LARCENY", "MISDEMEANOR", 17), (578, "HARRASSMENT 2", "VIOLATION", 13),
+    (344, "ASSAULT 3 & RELATED OFFENSES", "MISDEMEANOR", 11), (351, "CRIMINAL MISCHIEF & RELATED OF", "MISDEMEANOR", 10),
+    (109, "GRAND LARCENY", "FELONY", 9), (235, "DANGEROUS DRUGS", "MISDEMEANOR", 6),
+    (361, "OFF. AGNST PUB ORD SENSBLTY &", "MISDEMEANOR", 5), (106, "FELONY ASSAULT", "FELONY", 4),
+    (105, "ROBBERY", "FELONY", 4), (107, "BURGLARY", "FELONY", 4), (117, "DANGEROUS DRUGS", "FELONY", 2),
+    (110, "GRAND LARCENY OF MOTOR VEHICLE", "FELONY", 2), (359, "OFFENSES AGAINST PUBLIC ADMINI", "MISDEMEANOR", 2),
+    (126, "MISCELLANEOUS PENAL LAW", "FELONY", 2), (118, "DANGEROUS WEAPONS", "FELONY", 1),
+    (236, "DANGEROUS WEAPONS", "MISDEMEANOR", 1), (352, "CRIMINAL TRESPASS", "MISDEMEANOR", 1),
+    (355, "OFFENSES AGAINST THE PERSON", "VIOLATION", 1),
+]
+
+
+def nypd_complaints(rng, first, n, start, end):
+    """One chunk of NYPD complaint records."""
+    offense = rng.choice(len(OFFENSES), n, p=_weights([o[3] for o in OFFENSES]))
+    borough = rng.choice(5, n, p=_weights(BOROUGH_WEIGHTS_311[:5]))
+    occurred = _timestamps(rng, n, start, end)
+    reported = occurred + rng.geometric(0.6, n) * SECONDS_PER_DAY - SECONDS_PER_DAY
+    lat, lon = _borough_coordinates(rng, borough)
+    return pa.table({
+        "CMPLNT_NUM": pa.array(np.arange(first, first + n) + 100_000_000),
+        "CMPLNT_FR_DT": _with_nulls(rng, us_date(occurred), 0.0005),
+        "CMPLNT_FR_TM": clock_time(occurred),
+        "RPT_DT": us_date(reported),
+        "KY_CD": pa.array(np.array([o[0] for o in OFFENSES], dtype=np.int16)[offense]),
+        "OFNS_DESC": pa.array([o[1] for o in OFFENSES]).take(offense),
+        "LAW_CAT_CD": pa.array([o[2] for o in OFFENSES]).take(offense),
+        "BORO_NM": _with_nulls(rng, pa.array(BOROUGHS_311[:5]).take(borough), 0.001),
+        "Latitude": lat,
+        "Longitude": lon,
+    })
+
+
+# Zones per borough in the real taxi_zone_lookup.csv (ids 264-265 are "Unknown")
+ZONES_PER_BOROUGH = [("EWR", 1), ("Queens", 69), ("Bronx", 43), ("Manhattan", 69), ("Staten Island", 20),
+                     ("Brooklyn", 61)]
+
+# Relative pickup demand per zone, by borough (yellow cabs mostly pick up in Manhattan)
+PICKUP_DEMAND = {"Manhattan": 1.0, "Queens": 0.02, "Brooklyn": 0.02, "Bronx": 0.005, "Staten Island": 0.001,
+                 "EWR": 0.0005, "Unknown": 0.002}
+
+AIRPORT_ZONES = {"JFK Airport": 0.25, "LaGuardia Airport": 0.2}
+
+
+def taxi_zones(seed=0):
+    """The 265-row zone lookup (LocationID, Borough, Zone, service_zone), borough sizes as in the real file."""
+    rng = _rng(seed, "taxi_zones", 0)
+    boroughs = np.array(["EWR"] + list(rng.permutation(
+        [b for b, count in ZONES_PER_BOROUGH[1:] for _ in range(count)])) + ["Unknown", "Unknown"])
+    zones = np.array([f"{b} Zone {i}" for i, b in enumerate(boroughs, start=1)], dtype=object)
+    queens = np.flatnonzero(boroughs == "Queens")
+    zones[0], zones[-2], zones[-1] = "Newark Airport", "NV", None
+    zones[queens[:len(AIRPORT_ZONES)]] = list(AIRPORT_ZONES)
+    service = np.where(boroughs == "Manhattan", "Yellow Zone", "Boro Zone").astype(object)
+    service[np.isin(zones, list(AIRPORT_ZONES))] = "Airports"
+    service[0], service[-2], service[-1] = "EWR", "N/A", None
+    return pa.table({"LocationID": pa.array(np.arange(1, len(boroughs) + 1)), "Borough": pa.array(boroughs),
+                     "Zone": pa.array(zones), "service_zone": pa.array(service)})
+
+
+def _pickup_weights(zones):
+    boroughs = zones["Borough"].to_numpy(zero_copy_only=False)
+    demand = np.array([PICKUP_DEMAND[b] for b in boroughs])
+    order = np.argsort(-demand, kind="stable")
+    demand[order] *= _zipf(len(demand), 0.6)
+    for zone, share in AIRPORT_ZONES.items():
+        demand[zones["Zone"].to_numpy(zero_copy_only=False) == zone] = share * demand.max()
+    return _weights(demand)
+
+
+def taxi_trips(rng, first, n, start, end, pickup_weights):
+    """One chunk of yellow cab trips (2019 schema)."""
+    pickup = _timestamps(rng, n, start, end)
+    distance = np.round(rng.lognormal(0.4, 0.8, n), 2)
+    minutes = distance * rng.uniform(2.5, 6, n) + rng.exponential(3, n)
+    fare = np.round(2.5 + 2.5 * distance + 0.5 * minutes / 2, 1)
+    # A few of the negative fares and zero-length trips the real files contain
+    dirty = rng.random(n) < 0.001
+    fare[dirty] = -fare[dirty]
+    distance[rng.random(n) < 0.005] = 0
+    payment = rng.choice([1, 2, 3, 4], n, p=[0.71, 0.28, 0.006, 0.004]).astype(np.int8)
+    tip = np.where(payment == 1, np.round(np.abs(fare) * rng.uniform(0.1, 0.25, n), 2), 0)
+    tolls = np.where(rng.random(n) < 0.04, 6.12, 0)
+    extra = np.where((pickup % SECONDS_PER_DAY >= 16 * 3600) & (pickup % SECONDS_PER_DAY < 20 * 3600), 1.0, 0.5)
+    total = np.round(fare + extra + 0.5 + tip + tolls + 0.3 + 2.5, 2)
+    return pa.table({
+        "VendorID": pa.array(rng.choice([1, 2], n, p=[0.35, 0.65]).astype(np.int8)),
+        "tpep_pickup_datetime": _timestamp_array(pickup),
+        "tpep_dropoff_datetime": _timestamp_array(pickup + (minutes * 60).astype(np.int64)),
+        "passenger_count": _with_nulls(rng, pa.array(rng.choice(np.arange(7, dtype=np.int8), n,
+                                                                p=_weights([2, 70, 14, 4, 2, 5, 3]))), 0.005),
+        "trip_distance": pa.array(distance),
+        "RatecodeID": pa.array(rng.choice(np.array([1, 2, 5], dtype=np.int8), n, p=[0.97, 0.02, 0.01])),
+        "store_and_fwd_flag": _pick(rng, ["N", "Y"], [99, 1], n),
+        "PULocationID": pa.array(rng.choice(np.arange(1, len(pickup_weights) + 1, dtype=np.int16), n,
+                                            p=pickup_weights)),
+        "DOLocationID": pa.array(rng.choice(np.arange(1, len(pickup_weights) + 1, dtype=np.int16), n,
+                                            p=pickup_weights)),
+        "payment_type": pa.array(payment),
+        "fare_amount": pa.array(fare),
+        "extra": pa.array(extra),
+        "mta_tax": pa.array(np.full(n, 0.5)),
+        "tip_amount": pa.array(tip),
+        "tolls_amount": pa.array(tolls),
+        "improvement_surcharge": pa.array(np.full(n, 0.3)),
+        "total_amount": pa.array(total),
+        "congestion_surcharge": pa.array(np.full(n, 2.5)),
+    })
+
+
+WEATHER_CONDITIONS = [("Fair", 34), ("Clear", 12), ("Mostly Cloudy", 12), ("Cloudy", 10), ("Partly Cloudy", 8),
+                      ("Overcast", 6), ("Light Rain", 5), ("Scattered Clouds", 3), ("Light Snow", 2), ("Rain", 2),
+                      ("Fog", 1.5), ("Haze", 1.5), ("Heavy Rain", 1), ("Snow", 0.7), ("Thunderstorm", 0.5),
+                      ("T-Storm", 0.4), ("Fair / Windy", 0.4)]
+
+TIMEZONES = ["US/Eastern", "US/Central", "US/Mountain", "US/Pacific"]
+
+# Places accidents are drawn from; a few zipcodes straddle two counties
+N_PLACES = 20_000
+SPLIT_ZIP_SHARE = 0.1
+
+
+def us_places(seed=0, n_places=N_PLACES):
+    """Zipcode, state, county FIPS/name, city, lat, lon, timezone and accident share of the synthetic places."""
+    rng = _rng(seed, "us_places", 0)
+    state = rng.choice(len(STATES), n_places, p=_weights([s[2] for s in STATES]))
+    lon = rng.uniform(US_BBOX[1], US_BBOX[3], n_places)
+    county = np.array([s[1] for s in STATES])[state] * 1000 + rng.integers(0, 100, n_places) * 2 + 1
+    return {
+        "zip": np.sort(rng.choice(np.arange(1001, 99951), n_places, replace=False)),
+        "state": np.array([s[0] for s in STATES])[state],
+        "county_fips": county,
+        "county": np.array([f"{w.title()} County" for w in WORDS])[county % len(WORDS)],
+        "city": pc.utf8_capitalize(pa.array(np.array(WORDS)[rng.integers(0, len(WORDS), n_places)])).to_numpy(
+            zero_copy_only=False),
+        "lat": rng.uniform(US_BBOX[0], US_BBOX[2], n_places),
+        "lon": lon,
+        "timezone": np.array(TIMEZONES)[3 - np.digitize(lon, [-115, -102, -87])],
+        "weight": _weights(rng.permutation(_zipf(n_places, 0.8))),
+    }
+
+
+def us_accidents(rng, first, n, start, end, places):
+    """One chunk of US accident records."""
+    place = rng.choice(len(places["zip"]), n, p=places["weight"])
+    begin = _timestamps(rng, n, start, end)
+    zips = places["zip"][place]
+    zip5 = _fixed_width(n, [(zips, 5)])
+    zip9 = _fixed_width(n, [(zips, 5), b"-", (rng.integers(0, 10_000, n), 4)])
+    temperature = np.round(rng.normal(62, 18, n), 1)
+    hour = begin % SECONDS_PER_DAY // 3600
+    return pa.table({
+        "ID": pc.binary_join_element_wise("A-", pc.cast(pa.array(np.arange(first, first + n) + 1), pa.string()), ""),
+        "Severity": pa.array(rng.choice(np.array([1, 2, 3, 4], dtype=np.int8), n, p=[0.01, 0.8, 0.16, 0.03])),
+        "Start_Time": _timestamp_array(begin),
+        "End_Time": _timestamp_array(begin + (rng.lognormal(4, 1, n) * 60).astype(np.int64)),
+        "Start_Lat": _round(places["lat"][place] + rng.normal(0, 0.02, n), 6),
+        "Start_Lng": _round(places["lon"][place] + rng.normal(0, 0.02, n), 6),
+        "Distance(mi)": _round(rng.exponential(0.6, n), 3),
+        "City": pa.array(places["city"]).take(place),
+        "County": pa.array(places["county"]).take(place),
+        "State": pa.array(places["state"]).take(place),
+        "Zipcode": _with_nulls(rng, pc.if_else(pa.array(rng.random(n) < 0.4), zip9, zip5), 0.0005),
+        "Timezone": pa.array(places["timezone"]).take(place),
+        "Temperature(F)": _with_nulls(rng, pa.array(temperature), 0.02),
+        "Humidity(%)": _with_nulls(rng, pa.array(rng.integers(10, 101, n).astype(np.float64)), 0.02),
+        "Pressure(in)": _with_nulls(rng, _round(rng.normal(29.5, 0.8, n), 2), 0.02),
+        "Visibility(mi)": _with_nulls(rng, _round(np.minimum(rng.exponential(12, n), 10), 1), 0.02),
+        "Wind_Speed(mph)": _with_nulls(rng, _round(rng.gamma(2, 4, n), 1), 0.07),
+        "Precipitation(in)": _with_nulls(rng, _round(np.where(rng.random(n) < 0.1, rng.exponential(0.05, n), 0), 2),
+                                         0.3),
+        "Weather_Condition": _with_nulls(rng, _pick(rng, *zip(*WEATHER_CONDITIONS, strict=True), n), 0.02),
+        "Sunrise_Sunset": pa.array(np.where((hour >= 6) & (hour < 19), "Day", "Night")),
+    })
+
+
+def zip_county_crosswalk(places, seed=0):
+    """ZIP-COUNTY-FIPS crosswalk (danofer schema) for the places; split zipcodes get a second county."""
+    rng = _rng(seed, "zip_crosswalk", 0)
+    split = rng.random(len(places["zip"])) < SPLIT_ZIP_SHARE
+    rows = np.concatenate([np.arange(len(places["zip"])), np.flatnonzero(split)])
+    county = np.concatenate([places["county_fips"], places["county_fips"][split] + 2])
+    order = np.argsort(places["zip"][rows], kind="stable")
+    rows, county = rows[order], county[order]
+    return pa.table({
+        "ZIP": _fixed_width(len(rows), [(places["zip"][rows], 5)]),
+        "COUNTYNAME": pa.array(np.array([f"{w.title()} County" for w in WORDS])[county % len(WORDS)]),
+        "STATE": pa.array(places["state"][rows]),
+        "STCOUNTYFP": _fixed_width(len(rows), [(county, 5)]),
+        "CLASSFP": _pick(rng, ["H1", "H4", "H6", "C7"], [90, 5, 3, 2], len(rows)),
+    })
+
+
+COUNTRIES = [("PRT", 40), ("GBR", 10), ("FRA", 9), ("ESP", 7), ("DEU", 6), ("ITA", 3), ("IRL", 3), ("BEL", 2),
+             ("BRA", 2), ("NLD", 2), ("USA", 2), ("CHE", 1.5), ("CN", 1), ("AUT", 1), ("SWE", 1), ("CHN", 0.8),
+             ("POL", 0.8), ("ISR", 0.6), ("RUS", 0.5), ("NOR", 0.5), ("ROU", 0.4), ("FIN", 0.4), ("DNK", 0.4),
+             ("AUS", 0.3), ("AGO", 0.3), ("LUX", 0.2), ("MAR", 0.2), ("TUR", 0.2), ("JPN", 0.2), ("NULL", 0.4)]
+
+MARKET_SEGMENTS = [("Online TA", "TA/TO", 47), ("Offline TA/TO", "TA/TO", 20), ("Groups", "TA/TO", 17),
+                   ("Direct", "Direct", 10.5), ("Corporate", "Corporate", 4.4), ("Complementary", "Direct", 0.6),
+                   ("Aviation", "Corporate", 0.2)]
+
+ROOM_TYPES = [("A", 72), ("D", 16), ("E", 5), ("F", 2.4), ("G", 1.7), ("B", 1), ("C", 0.8), ("H", 0.5),
+              ("L", 0.05), ("P", 0.05)]
+
+# _WEEKEND_NIGHTS[w][r]: Friday/Saturday nights among r consecutive nights starting on weekday w (Monday = 0)
+_WEEKEND_NIGHTS = np.array([[sum((w + i) % 7 in (4, 5) for i in range(r)) for r in range(7)] for w in range(7)])
+
+
+def hotel_bookings(rng, first, n, start, end):
+    """One chunk of hotel booking records (jessemostipak/hotel-booking-demand schema)."""
+    resort = rng.random(n) < 0.34
+    days = np.arange(start // SECONDS_PER_DAY, (end - 1) // SECONDS_PER_DAY + 1)
+    season = 1 + 0.35 * np.sin(2 * np.pi * ((days.astype("datetime64[D]") - days.astype("datetime64[D]").astype(
+        "datetime64[Y]")).astype(np.int64) - 100) / 365.25)
+    arrival = rng.choice(days, n, p=_weights(season))
+    year, month, day, *_ = _civil(arrival * SECONDS_PER_DAY)
+    weekday = (arrival + 3) % 7
+    nights = np.where(resort, rng.geometric(0.22, n), rng.geometric(0.33, n))
+    weekend = nights // 7 * 2 + _WEEKEND_NIGHTS[weekday, nights % 7]
+
+    lead_time = np.minimum(rng.exponential(100, n), 737).astype(np.int16)
+    segment = rng.choice(len(MARKET_SEGMENTS), n, p=_weights([s[2] for s in MARKET_SEGMENTS]))
+    deposit = rng.choice(3, n, p=[0.876, 0.122, 0.002])
+    repeated = rng.random(n) < 0.03
+    previous_cancellations = np.where(rng.random(n) < 0.05, rng.geometric(0.6, n), 0)
+    special = np.minimum(rng.poisson(0.57, n), 5)
+    odds = -1.6 + 0.005 * lead_time + 3 * (deposit == 1) + 1.2 * (previous_cancellations > 0) - 1.5 * repeated \
+        - 0.8 * (special > 0)
+    canceled = rng.random(n) < 1 / (1 + np.exp(-odds))
+    no_show = canceled & (rng.random(n) < 0.03)
+
+    reserved = rng.choice(len(ROOM_TYPES), n, p=_weights([r[1] for r in ROOM_TYPES]))
+    assigned = np.where(rng.random(n) < 0.12, rng.choice(len(ROOM_TYPES), n, p=_weights([r[1] for r in ROOM_TYPES])),
+                        reserved)
+    adr = np.where(resort, 95, 105) * season[arrival - days[0]] * rng.lognormal(0, 0.3, n)
+    adr = np.round(np.where(rng.random(n) < 0.016, 0, adr), 2)
+    status_day = np.where(canceled & ~no_show, arrival - (rng.random(n) * (lead_time + 1)).astype(np.int64),
+                          np.where(no_show, arrival, arrival + nights))
+    rooms = pa.array([r[0] for r in ROOM_TYPES])
+    return pa.table({
+        "hotel": pa.array(np.where(resort, "Resort Hotel", "City Hotel")),
+        "is_canceled": pa.array(canceled.astype(np.int8)),
+        "lead_time": pa.array(lead_time),
+        "arrival_date_year": pa.array(year.astype(np.int16)),
+        "arrival_date_month": pa.array(MONTH_NAMES).take(month - 1),
+        "arrival_date_week_number": pa.array(_iso_week(arrival).astype(np.int8)),
+        "arrival_date_day_of_month": pa.array(day.astype(np.int8)),
+        "stays_in_weekend_nights": pa.array(weekend.astype(np.int16)),
+        "stays_in_week_nights": pa.array((nights - weekend).astype(np.int16)),
+        "adults": pa.array(rng.choice(np.arange(5, dtype=np.int8), n, p=[0.003, 0.2, 0.72, 0.06, 0.017])),
+        "children": _with_nulls(rng, pa.array(rng.choice(np.arange(4, dtype=np.int8), n, p=[0.93, 0.04, 0.029, 0.001])),
+                                0.00003),
+        "babies": pa.array((rng.random(n) < 0.008).astype(np.int8)),
+        "meal": _pick(rng, ["BB", "HB", "SC", "Undefined", "FB"], [77, 12, 9, 1, 1], n),
+        "country": _pick(rng, *zip(*COUNTRIES, strict=True), n),
+        "market_segment": pa.array([s[0] for s in MARKET_SEGMENTS]).take(segment),
+        "distribution_channel": pa.array([s[1] for s in MARKET_SEGMENTS]).take(segment),
+        "is_repeated_guest": pa.array(repeated.astype(np.int8)),
+        "previous_cancellations": pa.array(previous_cancellations.astype(np.int16)),
+        "previous_bookings_not_canceled": pa.array(np.where(repeated, rng.geometric(0.3, n), 0).astype(np.int16)),
+        "reserved_room_type": rooms.take(reserved),
+        "assigned_room_type": rooms.take(assigned),
+        "booking_changes": pa.array(rng.poisson(0.2, n).astype(np.int8)),
+        "deposit_type": pa.array(["No Deposit", "Non Refund", "Refundable"]).take(deposit),
+        "agent": pc.if_else(pa.array(rng.random(n) < 0.14), "NULL",
+                            pc.cast(pa.array(rng.choice(np.arange(1, 536), n, p=_weights(_zipf(535)))), pa.string())),
+        "company": pc.if_else(pa.array(rng.random(n) < 0.94), "NULL",
+                              pc.cast(pa.array(rng.integers(6, 544, n)), pa.string())),
+        "days_in_waiting_list": pa.array(np.where(rng.random(n) < 0.03, rng.exponential(30, n), 0).astype(np.int16)),
+        "customer_type": _pick(rng, ["Transient", "Transient-Party", "Contract", "Group"], [75, 21, 3.4, 0.5], n),
+        "adr": pa.array(adr),
+        "required_car_parking_spaces": pa.array((rng.random(n) < np.where(resort, 0.14, 0.02)).astype(np.int8)),
+        "total_of_special_requests": pa.array(special.astype(np.int8)),
+        "reservation_status": pa.array(np.where(no_show, "No-Show", np.where(canceled, "Canceled", "Check-Out"))),
+        "reservation_status_date": iso_date(status_day * SECONDS_PER_DAY),
+    })
+
+
+def _iso_week(days):
+    """ISO week number of epoch days."""
+    weekday = (days + 3) % 7
+    thursday = days - weekday + 3
+    jan1 = thursday.astype("datetime64[D]").astype("datetime64[Y]").astype("datetime64[D]").astype(np.int64)
+    return (thursday - jan1) // 7 + 1
+
+
+# --- Writers ---------------------------------------------------------------------
+
+def _write_table(path, tables, fmt="csv", quoting="needed"):
+    """Stream Arrow tables into one CSV or Parquet file; returns the row count."""
+    import pyarrow.parquet as pq
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    staging = path.with_name(f".{path.name}.tmp")
+    writer = schema = None
+    rows = 0
+    try:
+        for table in tables:
+            if writer is None:
+                schema = table.schema
+                if fmt == "parquet":
+                    writer = pq.ParquetWriter(staging, schema, compression="zstd")
+                else:
+                    writer = pv.CSVWriter(staging, schema, write_options=pv.WriteOptions(quoting_style=quoting))
+            writer.write_table(table.cast(schema))
+            rows += len(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    staging.replace(path)
+    return rows
+
+
+def _chunks(name, make_chunk, rows, seed, start, end):
+    for i, first in enumerate(range(0, rows, CHUNK_ROWS)):
+        yield make_chunk(_rng(seed, name, i), first, min(CHUNK_ROWS, rows - first), start, end)
+
+
+def _write_rows(name, file_name, make_chunk, directory, rows, seed, fmt, start, end):
+    path = directory / DATASETS[name]["target_dir"] / f"{file_name}.{fmt}"
+    _write_table(path, _chunks(name, make_chunk, rows, seed, start, end), fmt)
+    return [path]
+
+
+def write_taxi(directory, rows, seed, fmt, start, end):
+    """Trips plus taxi_zone_lookup.csv (always CSV, as in the download)."""
+    zones = taxi_zones(seed)
+    lookup = directory / DATASETS["taxi"]["target_dir"] / "taxi_zone_lookup.csv"
+    _write_table(lookup, [zones])
+    trips = partial(taxi_trips, pickup_weights=_pickup_weights(zones))
+    return [lookup, *_write_rows("taxi", "yellow_tripdata", trips, directory, rows, seed, fmt, start, end)]
+
+
+def write_accidents(directory, rows, seed, fmt, start, end):
+    """Accidents plus the zipcode-county crosswalk the geographic mapping needs."""
+    places = us_places(seed)
+    crosswalk = directory / "geo_crosswalk" / "ZIP-COUNTY-FIPS_synthetic.csv"
+    _write_table(crosswalk, [zip_county_crosswalk(places, seed)])
+    accidents = partial(us_accidents, places=places)
+    return [crosswalk, *_write_rows("accidents", "US_Accidents", accidents, directory, rows, seed, fmt, start, end)]
+
+
+# GSOD station countries (FIPS codes, as in isd-history.csv) and their boxes
+GSOD_COUNTRIES = [("US", 85, US_BBOX), ("PO", 10, (36.9, -9.6, 42.2, -6.2)), ("SP", 3, (36.0, -9.3, 43.8, 3.3)),
+                  ("UK", 2, (50.0, -6.0, 58.6, 1.8))]
+
+
+def gsod_stations(n_stations, seed=0):
+    """isd-history.csv rows for n_stations synthetic stations."""
+    rng = _rng(seed, "gsod_stations", 0)
+    country = rng.choice(len(GSOD_COUNTRIES), n_stations, p=_weights([c[1] for c in GSOD_COUNTRIES]))
+    boxes = np.array([c[2] for c in GSOD_COUNTRIES])[country]
+    usaf = np.sort(rng.choice(np.arange(10_000, 1_000_000), n_stations, replace=False))
+    wban = np.where(rng.random(n_stations) < 0.8, 99999, rng.integers(100, 99999, n_stations))
+    us = country == 0
+    return pa.table({
+        "USAF": _fixed_width(n_stations, [(usaf, 6)]),
+        "WBAN": _fixed_width(n_stations, [(wban, 5)]),
+        "STATION NAME": pc.utf8_upper(_phrases(rng, n_stations, max_words=2)),
+        "CTRY": pa.array([c[0] for c in GSOD_COUNTRIES]).take(country),
+        "STATE": pc.if_else(pa.array(us), pa.array([s[0] for s in STATES]).take(rng.integers(0, len(STATES),
+                                                                                               n_stations)),
+                            pa.nulls(n_stations, pa.string())),
+        "ICAO": pa.nulls(n_stations, pa.string()),
+        "LAT": _round(rng.uniform(boxes[:, 0], boxes[:, 2]), 3),
+        "LON": _round(rng.uniform(boxes[:, 1], boxes[:, 3]), 3),
+        "ELEV(M)": _round(rng.gamma(1.5, 200, n_stations), 1),
+        "BEGIN": pa.array(np.full(n_stations, 19730101)),
+        "END": pa.array(np.full(n_stations, 20231231)),
+    })
+
+
+def _gsod_year(rng, station, lat, days):
+    """One station-year of GSOD CSV rows (imperial units, 9999.9-style missing values)."""
+    n = len(days)
+    day_of_year = (days.astype("datetime64[D]") - days.astype("datetime64[D]").astype("datetime64[Y]")).astype(
+        np.int64)
+    temp = 75 - 0.9 * abs(lat) + 20 * np.cos(2 * np.pi * (day_of_year - 200) / 365.25) + rng.normal(0, 6, n)
+    rain = rng.random(n) < 0.3
+    prcp = np.where(rain, rng.exponential(0.25, n), 0)
+    snow = rain & (temp < 32)
+    events = [rng.random(n) < 0.05, rain & ~snow, snow, rng.random(n) < 0.002, rain & (rng.random(n) < 0.1),
+              rng.random(n) < 0.0002]
+
+    def missing(values, sentinel, share):
+        return pa.array(np.round(np.where(rng.random(n) < share, sentinel, values), 2))
+
+    return pa.table({
+        "STATION": pa.array(np.full(n, station)),
+        "DATE": iso_date(days * SECONDS_PER_DAY),
+        "LATITUDE": pa.array(np.full(n, lat)),
+        "TEMP": pa.array(np.round(temp, 1)),
+        "DEWP": missing(temp - rng.uniform(3, 20, n), 9999.9, 0.02),
+        "SLP": missing(rng.normal(1015, 8, n), 9999.9, 0.1),
+        "VISIB": missing(np.minimum(rng.exponential(12, n), 10), 999.9, 0.05),
+        "WDSP": missing(rng.gamma(2, 3, n), 999.9, 0.01),
+        "MAX": missing(temp + rng.uniform(4, 15, n), 9999.9, 0.01),
+        "MIN": missing(temp - rng.uniform(4, 15, n), 9999.9, 0.01),
+        "PRCP": missing(prcp, 99.99, 0.05),
+        "SNDP": missing(np.where(snow, rng.uniform(0.5, 8, n), 0), 999.9, 0.9),
+        "FRSHTT": _fixed_width(n, [(sum(flag * 10 ** (5 - i) for i, flag in enumerate(events)), 6)]),
+    })
+
+
+def write_gsod(directory, rows, seed, fmt, start, end):
+    """isd-history.csv plus one <year>/<USAF><WBAN>.csv per station-year (GSOD is only read as CSV)."""
+    weather = directory / DATASETS["gsod"]["target_dir"]
+    days = np.arange(start // SECONDS_PER_DAY, (end - 1) // SECONDS_PER_DAY + 1)
+    years = days.astype("datetime64[D]").astype("datetime64[Y]").astype(np.int64) + 1970
+    n_stations = max(1, -(-rows // len(days)))
+    history = gsod_stations(n_stations, seed)
+    _write_table(weather / "isd-history.csv", [history])
+
+    paths = [weather / "isd-history.csv"]
+    station_ids = pc.binary_join_element_wise(history["USAF"], history["WBAN"], "").to_pylist()
+    lats = history["LAT"].to_numpy()
+    for i, (station, lat) in enumerate(zip(station_ids, lats, strict=True)):
+        rng = _rng(seed, "gsod", i)
+        for year in np.unique(years):
+            path = weather / str(year) / f"{station}.csv"
+            _write_table(path, [_gsod_year(rng, station, lat, days[years == year])], quoting="all_valid")
+            paths.append(path)
+    return paths
+
+
+# --- Streaming catalogs ----------------------------------------------------------
+
+GENRES = ["Dramas", "Comedies", "Documentaries", "Action & Adventure", "International Movies", "Kids' TV",
+          "Thrillers", "Romantic Movies", "Horror Movies", "Stand-Up Comedy", "Reality TV", "Anime Series"]
+
+RATINGS = [("TV-MA", 36), ("TV-14", 25), ("TV-PG", 10), ("R", 9), ("PG-13", 6), ("TV-Y7", 4), ("TV-Y", 3),
+           ("PG", 3), ("TV-G", 2), ("NR", 1), ("G", 1)]
+
+CATALOG_COUNTRIES = [("United States", 40), ("India", 11), ("United Kingdom", 6), ("Japan", 3), ("South Korea", 3),
+                     ("Canada", 3), ("Spain", 2), ("France", 2), ("Mexico", 2), ("Egypt", 1)]
+
+# Platform, folder, file, size relative to Netflix
+PLATFORMS = [("netflix", "netflix", "netflix_titles", 1.0),
+             ("amazon", "amazon_prime", "amazon_prime_titles", 1.1),
+             ("disney", "disney_plus", "disney_plus_titles", 0.165)]
+
+# Target platform -> [(source platform, share of the target's rows copied from it)]
+PLANTED_SHARES = {"amazon": [("netflix", 0.15)], "disney": [("netflix", 0.1), ("amazon", 0.1)]}
+
+# Title perturbations applied to planted copies: name -> function(Arrow strings) -> strings
+TITLE_EDITS = {
+    "exact": lambda t: t,
+    "lowercase": pc.utf8_lower,
+    "uppercase": pc.utf8_upper,
+    "and_ampersand": lambda t: pc.replace_substring(pc.replace_substring(t, " And ", " & "), " The ", " the "),
+    "drop_the": lambda t: pc.replace_substring_regex(t, "^The ", ""),
+    "add_the": lambda t: pc.binary_join_element_wise("The", t, " "),
+    "punctuation": lambda t: pc.binary_join_element_wise(t, "!", ""),
+    "typo_vowel": lambda t: pc.replace_substring_regex(t, "([aeiou])([a-z])", "\\2\\1", max_replacements=1),
+    "typo_drop": lambda t: pc.replace_substring_regex(t, "^(..[^aeiou]*)[aeiou]", "\\1"),
+    "subtitle": lambda t: pc.binary_join_element_wise(t, "The Movie", ": "),
+}
+
+# Share of planted copies whose release year is off by one
+YEAR_SHIFT_SHARE = 0.15
+
+
+def _catalog(rng, n):
+    """n original titles with every column of the shivamb *_titles.csv files."""
+    movie = rng.random(n) < 0.7
+    seasons = rng.geometric(0.55, n)
+    minutes = pc.cast(pa.array(rng.integers(70, 160, n)), pa.string())
+    added = _timestamps(rng, n, _epoch("2015-01-01"), _epoch("2022-01-01"), hourly=False)
+    year, month, day, *_ = _civil(added)
+    title = _phrases(rng, n, max_words=4)
+    title = pc.if_else(pa.array(rng.random(n) < 0.25), pc.binary_join_element_wise("The", title, " "), title)
+    title = pc.if_else(pa.array(rng.random(n) < 0.05), pc.binary_join_element_wise(title, "2", " "), title)
+    names = pa.array(NAMES)
+
+    def people(k):
+        parts = [pc.binary_join_element_wise(names.take(rng.integers(0, 25, n)), names.take(rng.integers(25, 50, n)),
+                                             " ") for _ in range(k)]
+        return pc.binary_join_element_wise(*parts, ", ")
+
+    return {
+        "show_id": pc.binary_join_element_wise("s", pc.cast(pa.array(np.arange(1, n + 1)), pa.string()), ""),
+        "type": pa.array(np.where(movie, "Movie", "TV Show")),
+        "title": title,
+        "director": _with_nulls(rng, people(1), 0.3),
+        "cast": _with_nulls(rng, people(3), 0.1),
+        "country": _with_nulls(rng, _pick(rng, *zip(*CATALOG_COUNTRIES, strict=True), n), 0.1),
+        "date_added": pc.binary_join_element_wise(pa.array(MONTH_NAMES).take(month - 1), " ",
+                                                  pc.cast(pa.array(day), pa.string()), ", ",
+                                                  pc.cast(pa.array(year), pa.string()), ""),
+        "release_year": pa.array((2021 - np.minimum(rng.geometric(0.12, n) - 1, 80)).astype(np.int16)),
+        "rating": _pick(rng, *zip(*RATINGS, strict=True), n),
+        "duration": pc.if_else(pa.array(movie), pc.binary_join_element_wise(minutes, " min", ""),
+                               pc.binary_join_element_wise(pc.cast(pa.array(seasons), pa.string()),
+                                                           pc.if_else(pa.array(seasons > 1), " Seasons", " Season"),
+                                                           "")),
+        "listed_in": pc.binary_join_element_wise(_pick(rng, GENRES, np.ones(len(GENRES)), n),
+                                                 _pick(rng, GENRES, np.ones(len(GENRES)), n), ", "),
+        "description": _phrases(rng, n, min_words=6, max_words=12),
+    }
+
+
+def streaming_catalogs(netflix_rows, seed=0):
+    """{platform: Arrow table} plus the planted-match table (left/right platform and show_id, edit)."""
+    columns_of, planted = {}, []
+    for platform, _, _, scale in PLATFORMS:
+        rng = _rng(seed, f"streaming_{platform}", 0)
+        n = max(1, round(netflix_rows * scale))
+        columns = _catalog(rng, n)
+        rows = rng.permutation(n)
+        taken = 0
+        for source, share in PLANTED_SHARES.get(platform, []):
+            original = columns_of[source]
+            size = len(original["show_id"])
+            k = min(int(n * share), size)
+            # replace_with_mask fills the masked rows in order, so targets go in ascending order
+            target = np.sort(rows[taken:taken + k])
+            taken += k
+            picked = rng.choice(size, k, replace=False)
+            edit = rng.choice(len(TITLE_EDITS), k)
+            titles = original["title"].take(picked)
+            years = original["release_year"].take(picked).to_numpy()
+            years = years + (rng.random(k) < YEAR_SHIFT_SHARE) * rng.choice(np.array([-1, 1], dtype=np.int16), k)
+            mask = np.zeros(n, dtype=bool)
+            mask[target] = True
+            copies = {"title": pc.choose(pa.array(edit), *[func(titles) for func in TITLE_EDITS.values()]),
+                      "release_year": pa.array(years.astype(np.int16)), "type": original["type"].take(picked)}
+            for name, values in copies.items():
+                columns[name] = pc.replace_with_mask(columns[name], pa.array(mask), values)
+            planted.append(pa.table({
+                "left_platform": pa.array(np.full(k, source)),
+                "left_id": original["show_id"].take(picked),
+                "right_platform": pa.array(np.full(k, platform)),
+                "right_id": columns["show_id"].take(pa.array(target)),
+                "edit": pa.array(list(TITLE_EDITS)).take(edit),
+            }))
+        columns_of[platform] = columns
+    return {platform: pa.table(columns) for platform, columns in columns_of.items()}, pa.concat_tables(planted)
+
+
+def write_streaming(directory, rows, seed, fmt, start, end):
+    """The three *_titles.csv files plus netflix/planted_matches.csv (always CSV, as in the download)."""
+    catalogs, planted = streaming_catalogs(rows, seed)
+    paths = []
+    for platform, folder, file_name, _ in PLATFORMS:
+        paths.append(directory / folder / f"{file_name}.csv")
+        _write_table(paths[-1], [catalogs[platform]])
+    paths.append(directory / "netflix" / "planted_matches.csv")
+    _write_table(paths[-1], [planted])
+    return paths
+
+
+# --- Registry ----------------------------------------------------------------------
+
+# Dataset -> folder under data/raw (as in download_datasets.py), default period, writer
+DATASETS = {
+    "311_requests": {"target_dir": "311_requests", "period": ("2010-01-01", "2020-01-01"),
+                     "write": partial(_write_rows, "311_requests", "311_Service_Requests", requests_311)},
+    "nypd_crime": {"target_dir": "nypd_crime", "period": ("2006-01-01", "2020-01-01"),
+                   "write": partial(_write_rows, "nypd_crime", "NYPD_Complaint_Data_Historic", nypd_complaints)},
+    "taxi": {"target_dir": "taxi", "period": ("2019-01-01", "2020-01-01"), "write": write_taxi},
+    "accidents": {"target_dir": "accidents", "period": ("2016-02-08", "2023-04-01"), "write": write_accidents},
+    "gsod": {"target_dir": "weather", "period": ("2016-01-01", "2024-01-01"), "write": write_gsod},
+    "hotel_bookings": {"target_dir": "hotel_bookings", "period": ("2015-07-01", "2017-09-01"),
+                       "write": partial(_write_rows, "hotel_bookings", "hotel_bookings", hotel_bookings)},
+    "streaming": {"target_dir": "netflix", "period": (None, None), "write": write_streaming},
+}
+
+
+def generate(name, rows, output_dir="data/raw", seed=0, fmt="csv", start=None, end=None):
+    """Write dataset name with rows rows under output_dir; returns the files written.
+
+    start/end (dates, end exclusive) override the dataset's default period.
+    """
+    if name not in DATASETS:
+        raise ValueError(f"Unknown dataset {name!r}. Datasets: {', '.join(DATASETS)}")
+    default_start, default_end = DATASETS[name]["period"]
+    start, end = start or default_start, end or default_end
+    return DATASETS[name]["write"](Path(output_dir), parse_rows(rows), seed, fmt,
+                                   start and _epoch(start), end and _epoch(end))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate seeded synthetic versions of the lab datasets")
+    parser.add_argument("datasets", nargs="+", choices=[*DATASETS, "all"])
+    parser.add_argument("--rows", default="100K", help="Rows per dataset, e.g. 10K, 2.5M, 100M (default: 100K)")
+    parser.add_argument("--output", default="data/raw", help="A lab's data/raw folder (default: data/raw)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv",
+                        help="Format of the large row tables (lookups and catalogs are always CSV)")
+    parser.add_argument("--start", help="First date (YYYY-MM-DD), overriding the dataset's default period")
+    parser.add_argument("--end", help="Day after the last date (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    rows = parse_rows(args.rows)
+    for name in DATASETS if "all" in args.datasets else args.datasets:
+        started = time.perf_counter()
+        paths = generate(name, rows, args.output, args.seed, args.format, args.start, args.end)
+        seconds = time.perf_counter() - started
+        size_mb = sum(p.stat().st_size for p in paths) / 1e6
+        folder = Path(args.output) / DATASETS[name]["target_dir"]
+        print(f"✅ {name}: {rows:,} rows, {len(paths):,} file{'s' if len(paths) > 1 else ''}, {size_mb:,.1f} MB "
+              f"in {seconds:.1f}s ({rows / seconds / 1e6:.2f}M rows/s) -> {folder}")
+
+
+if __name__ == "__main__":
+    main()